@@ -0,0 +1,66 @@
+"""
+Benchmark: eerste contextrequest op een verse verbinding, met en zonder statement warm-up
+
+Per meting wordt een nieuwe pool van één verbinding gemaakt (buiten de meting);
+gemeten wordt de eerste sequentiële context assembly daarop. Zonder warm-up betaalt
+die request Parse/Describe voor ieder statement, met warm-up (pool init-hook) niet.
+    python -m benchmarks.bench_cold_start --trials 50
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import asyncpg
+
+from benchmarks.bench_context_assembly import DEFAULT_DSN, pick_user_and_domain
+from benchmarks.timing import measure_async, print_report
+from src.api.context_service import assemble_context_sequential
+from src.api.statements import PreparedConnection, prepare_statements
+
+
+async def first_request_ms(dsn: str, user, domain_id, init) -> float:
+    pool = await asyncpg.create_pool(
+        dsn, min_size=1, max_size=1, init=init, connection_class=PreparedConnection
+    )
+    try:
+        async with pool.acquire() as conn:
+            start = time.perf_counter()
+            await assemble_context_sequential(conn, domain_id, user)
+            return (time.perf_counter() - start) * 1000
+    finally:
+        await pool.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL", DEFAULT_DSN))
+    parser.add_argument("--trials", type=int, default=50)
+    args = parser.parse_args()
+
+    pool = await asyncpg.create_pool(
+        args.dsn, min_size=1, max_size=1, init=prepare_statements, connection_class=PreparedConnection
+    )
+    try:
+        user, domain_id = await pick_user_and_domain(pool)
+
+        async def steady():
+            async with pool.acquire() as conn:
+                await assemble_context_sequential(conn, domain_id, user)
+
+        steady_ms = await measure_async(steady, args.trials * 4)
+    finally:
+        await pool.close()
+
+    cold = [await first_request_ms(args.dsn, user, domain_id, None) for _ in range(args.trials)]
+    warm = [await first_request_ms(args.dsn, user, domain_id, prepare_statements) for _ in range(args.trials)]
+
+    print(f"Eerste request op een nieuwe verbinding, domein {domain_id}")
+    print_report("cold (geen warm-up)", cold)
+    print_report("warm-up via init-hook", warm)
+    print_report("steady state", steady_ms)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
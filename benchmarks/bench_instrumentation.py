@@ -0,0 +1,81 @@
+"""
+Benchmark: overhead van de latency-instrumentatie, los van de database
+
+De database-aanroep zelf wordt vervangen door een lege coroutine, zodat alleen
+de kosten van InstrumentedConnection (timing, querynaam, histogram) en van de
+MetricsMiddleware per request overblijven.
+    python -m benchmarks.bench_instrumentation --iterations 2000 --batch 100
+"""
+
+import argparse
+import asyncio
+
+import asyncpg
+
+from benchmarks.timing import measure_async, print_report
+from src.api import instrumentation
+from src.api.instrumentation import InstrumentedConnection, MetricsMiddleware
+
+
+async def _no_query(self, query, *args, **kwargs):
+    return []
+
+
+async def fetch_related_domains(conn):
+    return await conn.fetch("SELECT 1")
+
+
+async def _app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _send(message):
+    pass
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def main(iterations: int, batch: int) -> None:
+    # Alleen binnen deze benchmark: geen echte verbinding nodig
+    asyncpg.Connection.fetch = _no_query
+    plain = object.__new__(asyncpg.Connection)
+    instrumented = object.__new__(InstrumentedConnection)
+    plain._aborted = instrumented._aborted = True  # Connection.__del__ zonder verbinding
+
+    async def run_batch(conn):
+        for _ in range(batch):
+            await fetch_related_domains(conn)
+
+    print(f"Per sample {batch} statements / requests")
+    plain_ms = await measure_async(lambda: run_batch(plain), iterations)
+    instrumented_ms = await measure_async(lambda: run_batch(instrumented), iterations)
+    print_report("statement zonder meting", plain_ms)
+    print_report("statement met meting", instrumented_ms)
+
+    scope = {"type": "http", "method": "GET", "path": "/context/x", "headers": []}
+    middleware = MetricsMiddleware(_app)
+
+    async def run_requests(app):
+        for _ in range(batch):
+            await app(dict(scope), _receive, _send)
+
+    bare_ms = await measure_async(lambda: run_requests(_app), iterations)
+    measured_ms = await measure_async(lambda: run_requests(middleware), iterations)
+    print_report("request zonder middleware", bare_ms)
+    print_report("request met middleware", measured_ms)
+
+    per_statement = (sum(instrumented_ms) - sum(plain_ms)) / len(plain_ms) / batch * 1000
+    per_request = (sum(measured_ms) - sum(bare_ms)) / len(bare_ms) / batch * 1000
+    print(f"Overhead: {per_statement:.2f} µs per statement, {per_request:.2f} µs per request")
+    print(f"Series in registry: {sum(len(f._series) for f in instrumentation.metrics.families.values())}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.batch))
@@ -0,0 +1,156 @@
+"""
+Micro-benchmark: metadata-extractie op grote documenten
+
+Vergelijkt de trefwoordclassificatie in één Aho-Corasick scan met de vorige aanpak
+(per classificatiestap content.lower() en een substring-zoekactie per trefwoord,
+wetsverwijzingen via re.search per patroon), en meet de volledige extractie, zowel
+op de hele tekst als per pagina (extract_metadata_from_chunks), met piekgeheugen,
+en de TF-IDF tagscoring per document tegen een opgewarmd corpus.
+Met --batch daarnaast de doorvoer van extract_metadata_batch (process pool) tegenover
+sequentieel extraheren. Draait zonder database op synthetische documenten.
+    python -m benchmarks.bench_metadata_extraction --pages 200 --iterations 20
+    python -m benchmarks.bench_metadata_extraction --batch 64 --batch-pages 20 --workers 4
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import time
+import tracemalloc
+
+from benchmarks.timing import measure, print_report
+from src.services.ai_metadata_service import (
+    CONFIDENTIAL_INDICATORS,
+    DUTCH_CITIES,
+    LEGAL_REFERENCES,
+    PUBLIC_INDICATORS,
+    RETENTION_RULES,
+    SUBJECT_KEYWORDS,
+    WOO_INDICATORS,
+    AIMetadataService,
+)
+
+FILLER = (
+    "de het een van voor en in op is aan gemeente provincie college raad wij hierbij "
+    "voorstel regeling uitvoering inwoners organisatie planning budget rapportage "
+    "Maria Jansen Pieter de Vries Almere Lelystad"
+).split()
+
+KEYWORDS = [kw for kws in SUBJECT_KEYWORDS.values() for kw in kws] + WOO_INDICATORS + [
+    "Algemene wet bestuursrecht", "Wet open overheid", "Woo", "Omgevingswet", "openbaar",
+]
+
+
+def synthetic_pages(pages: int, seed: int, words_per_page: int = 500):
+    """Pagina's van ongeveer 3KB; ~5% trefwoorden, de rest vulwoorden"""
+    rng = random.Random(seed)
+    for _ in range(pages):
+        yield " ".join(
+            rng.choice(KEYWORDS) if rng.random() < 0.05 else rng.choice(FILLER)
+            for _ in range(words_per_page)
+        ) + "\n\n"
+
+
+def synthetic_document(pages: int, seed: int, words_per_page: int = 500) -> str:
+    return "".join(synthetic_pages(pages, seed, words_per_page))
+
+
+def peak_memory_kb(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def previous_keyword_pass(content: str) -> None:
+    """De trefwoordstappen zoals ze vóór de scanner werkten, ter vergelijking"""
+    content_lower = content.lower()
+    for keywords in SUBJECT_KEYWORDS.values():
+        sum(1 for kw in keywords if kw in content_lower)
+    for aliases in LEGAL_REFERENCES:
+        pattern = "(" + "|".join(aliases) + ")"
+        if re.search(pattern, content, re.IGNORECASE):
+            re.search(pattern, content, re.IGNORECASE).group(0)
+    content_lower = content.lower()
+    sum(1 for ind in WOO_INDICATORS if ind in content_lower)
+    content_lower = content.lower()
+    any(ind in content_lower for ind in CONFIDENTIAL_INDICATORS)
+    any(ind in content_lower for ind in PUBLIC_INDICATORS)
+    content_lower = content.lower()
+    any(doc_type in content_lower for doc_type in RETENTION_RULES)
+    [city for city in DUTCH_CITIES if city in content]
+
+
+async def batch_throughput(service: AIMetadataService, documents) -> None:
+    started = time.perf_counter()
+    for document in documents:
+        service.extract_metadata(document["content"], document["filename"])
+    sequential = time.perf_counter() - started
+
+    # Eerste ronde start de workers (spawn); die telt niet mee
+    async for _ in service.extract_metadata_batch(documents[:service.max_workers]):
+        pass
+    started = time.perf_counter()
+    first = None
+    async for _ in service.extract_metadata_batch(documents):
+        first = first or time.perf_counter() - started
+    pooled = time.perf_counter() - started
+    service.close()
+
+    print(f"sequentieel: {len(documents) / sequential:8.1f} docs/s")
+    print(
+        f"batch ({service.max_workers} workers): {len(documents) / pooled:8.1f} docs/s, "
+        f"eerste resultaat na {first * 1000:.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch", type=int, default=0, help="Aantal documenten voor de batchmeting")
+    parser.add_argument("--batch-pages", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    service = AIMetadataService(max_workers=args.workers)
+    content = synthetic_document(args.pages, args.seed)
+    print(f"{args.pages} pagina's, {len(content) / 1024:.0f} KB")
+
+    pages = list(synthetic_pages(args.pages, args.seed))
+
+    def full_extraction():
+        service.extract_metadata(content, "2025-03-15_Raadsvoorstel_v2.pdf")
+
+    def chunked_extraction():
+        service.extract_metadata_from_chunks(iter(pages), "2025-03-15_Raadsvoorstel_v2.pdf")
+
+    print_report("trefwoorden: vorige aanpak", measure(lambda: previous_keyword_pass(content), args.iterations, 2))
+    print_report("trefwoorden: één scan", measure(lambda: service.scanner.scan(content), args.iterations, 2))
+    print_report("volledige extractie", measure(full_extraction, args.iterations, 2))
+    print_report("per pagina", measure(chunked_extraction, args.iterations, 2))
+    print(
+        f"piekgeheugen: hele tekst {peak_memory_kb(full_extraction):.0f} KB, "
+        f"per pagina {peak_memory_kb(chunked_extraction):.0f} KB (exclusief de invoer zelf)"
+    )
+
+    term_freqs = [service._analyse_content(synthetic_pages(5, args.seed + i), None)[1] for i in range(200)]
+    for term_freq in term_freqs[:100]:
+        service.tag_engine.observe(term_freq)
+    remaining = iter(term_freqs[100:] * args.iterations)
+    print_report("tags (TF-IDF, 5 pagina's)", measure(lambda: service.tag_engine.tags(next(remaining)), 90, 10))
+
+    if args.batch:
+        documents = [
+            {"content": synthetic_document(args.batch_pages, args.seed + i), "filename": f"document_{i}.pdf"}
+            for i in range(args.batch)
+        ]
+        asyncio.run(batch_throughput(service, documents))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Micro-benchmark: serialisatie van context- en zoekresponses
+
+Vergelijkt per endpoint het gevalideerde pad (rij → dict → Pydantic model →
+response_model validatie → JSON) met het snelle pad (rij → orjson bytes).
+Draait zonder database op synthetische rijen met dezelfde kolommen als de views.
+    python -m benchmarks.bench_serialization --objects 20 --iterations 2000
+"""
+
+import argparse
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.timing import measure, print_report
+from src.api.context_service import (
+    ALL_CONTEXT_SECTIONS,
+    ContextResponse,
+    ContextSection,
+    build_context_response,
+    render_context,
+)
+from src.api.serialization import dumps
+
+ORG_ID = uuid.uuid4()
+USER_ID = uuid.uuid4()
+
+
+def domain_row(i: int) -> dict:
+    return {
+        "id": uuid.uuid4(), "type": "zaak", "name": f"Zaak {i}",
+        "description": "Subsidieaanvraag circulaire economie", "status": "actief",
+        "organization_id": ORG_ID, "owner_user_id": USER_ID, "metadata": {},
+        "created_at": datetime(2025, 1, 1), "updated_at": datetime(2025, 1, 2),
+        "relation_type": "gerelateerd_aan",
+    }
+
+
+def object_row(domain_id, i: int) -> dict:
+    return {
+        "id": uuid.uuid4(), "domain_id": domain_id, "object_type": "document",
+        "title": f"Besluit subsidieaanvraag {i}", "content_location": f"/docs/{i}.pdf",
+        "mime_type": "application/pdf", "size_bytes": 120000, "checksum": "ab" * 32,
+        "created_by": USER_ID, "created_at": datetime(2025, 1, 1) + timedelta(hours=i),
+        "modified_by": None, "modified_at": None, "classification": "intern",
+        "retention_period": 7, "retention_trigger": None, "destruction_date": None,
+        "is_woo_relevant": True, "woo_publication_date": None, "privacy_level": "normaal",
+        "full_text_search": "'besluit':1 'subsidieaanvraag':2", "tags": ["subsidie", "circulair"],
+        "metadata": {}, "domain_name": "Zaak", "domain_type": "zaak",
+        "created_by_name": "Maria Jansen", "modified_by_name": None,
+        "organization_name": "Provincie Flevoland",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--objects", type=int, default=20)
+    parser.add_argument("--search-rows", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    domain = domain_row(0)
+    sections = {
+        ContextSection.RELATED_DOMAINS: [domain_row(i) for i in range(10)],
+        ContextSection.RECENT_OBJECTS: [object_row(domain["id"], i) for i in range(args.objects)],
+        ContextSection.RECOMMENDED_APPS: [],
+        ContextSection.STAKEHOLDERS: [
+            {"id": uuid.uuid4(), "type": "bedrijf", "name": f"Partij {i}", "role": "aanvrager"}
+            for i in range(5)
+        ],
+        ContextSection.USER_PERMISSIONS: {"can_read": True, "can_write": True,
+                                          "can_delete": False, "can_share": True},
+    }
+    assert set(sections) == ALL_CONTEXT_SECTIONS
+    search_rows = [object_row(domain["id"], i) | {"rank": 0.5} for i in range(args.search_rows)]
+
+    def context_validated():
+        model = build_context_response(domain, sections)
+        # FastAPI valideert het resultaat opnieuw tegen response_model
+        validated = ContextResponse.model_validate(model.model_dump())
+        json.dumps(jsonable_encoder(validated)).encode()
+
+    def context_fast():
+        dumps(render_context(domain, sections))
+
+    def search_validated():
+        json.dumps(jsonable_encoder({"results": [dict(r) for r in search_rows]})).encode()
+
+    def search_fast():
+        dumps({"results": search_rows})
+
+    print(f"GET /context ({args.objects} objecten)")
+    print_report("validated", measure(context_validated, args.iterations))
+    print_report("fast", measure(context_fast, args.iterations))
+    print(f"GET /search ({args.search_rows} rijen)")
+    print_report("validated", measure(search_validated, args.iterations))
+    print_report("fast", measure(search_fast, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
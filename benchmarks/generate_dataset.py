@@ -0,0 +1,469 @@
+"""
+Synthetische dataset op schaal voor het IOU-schema (incl. GraphRAG-tabellen)
+
+Reproduceerbaar: dezelfde --seed en schaal geven exact dezelfde rijen (ook de UUIDs).
+Alles gaat via COPY; per-rij triggers worden uitgeschakeld (session_replication_role,
+vereist superuser) of overgeslagen via iou.bulk_ingest, waarna afgeleide data
+(full-text search, user_organization_access, domain_versions) set-based wordt opgebouwd.
+
+    psql -d iou_context -f src/models/organizational_context.sql
+    psql -d iou_context -f src/models/graphrag_extensions.sql
+    python -m benchmarks.generate_dataset --users 10000 --domains 100000 --objects 1000000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Iterator, List, Sequence, Tuple
+from uuid import UUID
+
+import asyncpg
+
+from benchmarks.bench_context_assembly import DEFAULT_DSN
+
+ORGANIZATION_TYPES = ["gemeente", "provincie", "waterschap", "rijk"]
+PLACES = [
+    "Almere", "Lelystad", "Dronten", "Zeewolde", "Urk", "Emmeloord", "Zwolle", "Utrecht",
+    "Amersfoort", "Apeldoorn", "Deventer", "Harderwijk", "Kampen", "Nijkerk", "Ede", "Arnhem",
+]
+DEPARTMENTS = [
+    "Mobiliteit & Bereikbaarheid", "Economie & Duurzaamheid", "Ruimte & Leefomgeving",
+    "Juridische Zaken", "ICT & Digitalisering", "Vergunningen & Handhaving",
+    "Sociaal Domein", "Financiën", "Communicatie", "Stadsontwikkeling",
+]
+ROLES = [
+    ("Beleidsmedewerker", {"can_read": True, "can_write": True, "can_delete": False, "can_share": True}),
+    ("Projectleider", {"can_read": True, "can_write": True, "can_delete": True, "can_share": True}),
+    ("Juridisch Adviseur", {"can_read": True, "can_write": True, "can_delete": False, "can_share": False}),
+    ("Data Analist", {"can_read": True, "can_write": True, "can_delete": False, "can_share": True}),
+    ("Vergunningverlener", {"can_read": True, "can_write": True, "can_delete": False, "can_share": False}),
+    ("Raadpleger", {"can_read": True, "can_write": False, "can_delete": False, "can_share": False}),
+]
+FIRST_NAMES = [
+    "Maria", "Jan", "Sophie", "Peter", "Lisa", "Tom", "Emma", "Daan", "Sanne", "Bram",
+    "Fleur", "Lucas", "Anouk", "Thijs", "Eva", "Ruben", "Iris", "Jesse", "Noor", "Sem",
+]
+LAST_NAMES = [
+    "Jansen", "Bakker", "de Vries", "van den Berg", "Vermeulen", "Hendriks", "Visser",
+    "Smit", "Meijer", "de Boer", "Mulder", "de Groot", "Bos", "Vos", "Peters", "Dekker",
+]
+DOMAIN_TYPES = ["zaak", "project", "beleid", "expertise"]
+DOMAIN_TYPE_WEIGHTS = [0.6, 0.2, 0.15, 0.05]
+DOMAIN_STATUSES = ["actief", "afgerond", "gearchiveerd"]
+CASE_TYPES = ["subsidie", "vergunning", "bezwaar", "handhaving", "melding", "woo-verzoek"]
+PROJECT_PHASES = ["initiatief", "definitie", "ontwerp", "realisatie", "nazorg"]
+POLICY_AREAS = ["mobiliteit", "duurzaamheid", "economie", "wonen", "zorg", "onderwijs"]
+POLICY_CYCLES = ["voorbereiding", "vaststelling", "uitvoering", "evaluatie"]
+OBJECT_TYPES = ["document", "email", "chat", "besluit", "data"]
+OBJECT_TYPE_WEIGHTS = [0.5, 0.25, 0.1, 0.1, 0.05]
+MIME_TYPES = {
+    "document": "application/pdf", "email": "message/rfc822", "chat": "text/plain",
+    "besluit": "application/pdf", "data": "text/csv",
+}
+CLASSIFICATIONS = ["openbaar", "intern", "vertrouwelijk", "geheim"]
+CLASSIFICATION_WEIGHTS = [0.3, 0.5, 0.18, 0.02]
+PRIVACY_LEVELS = ["geen", "normaal", "bijzonder", "strafrechtelijk"]
+SUBJECTS = [
+    "windpark", "fietspad", "zonnepanelen", "woningbouw", "bestemmingsplan", "subsidieaanvraag",
+    "omgevingsvergunning", "bezwaarschrift", "natuurbeheer", "waterberging", "laadpalen",
+    "verkeersbesluit", "aanbesteding", "begroting", "jaarverslag", "handhavingsverzoek",
+    "geluidsoverlast", "bodemsanering", "stikstof", "energietransitie", "openbaar vervoer",
+    "dijkversterking", "monumentenzorg", "jeugdzorg", "participatie", "evenementenvergunning",
+]
+DOCUMENT_KINDS = [
+    "Adviesnota", "Besluit", "Memo", "Rapportage", "Brief", "Notulen", "Offerte",
+    "Contract", "Presentatie", "Onderzoek", "Verslag", "Aanvraag", "Zienswijze",
+]
+TAGS = [
+    "woo", "avg", "archief", "financieel", "juridisch", "ruimtelijk", "participatie",
+    "spoed", "extern", "intern", "bestuur", "raad", "provinciale staten", "gedeputeerde",
+]
+STAKEHOLDER_TYPES = ["burger", "bedrijf", "organisatie", "intern"]
+STAKEHOLDER_ROLES = ["aanvrager", "adviseur", "belanghebbende", "bezwaarmaker", "uitvoerder"]
+RELATION_TYPES = ["gerelateerd_aan", "voortvloeit_uit", "onderdeel_van"]
+AUDIT_ACTIONS = ["read", "create", "update", "delete"]
+AUDIT_ACTION_WEIGHTS = [0.85, 0.08, 0.06, 0.01]
+APP_TYPES = ["data_explorer", "document_generator", "compliance_checker", "workflow", "kaart"]
+ENTITY_TYPES = ["PERSON", "ORGANIZATION", "LOCATION", "CONCEPT", "EVENT", "LAW"]
+LAWS = ["Wet open overheid", "Archiefwet", "AVG", "Omgevingswet", "Awb", "Wet milieubeheer"]
+
+START = datetime(2020, 1, 1)
+SPAN_SECONDS = 5 * 365 * 24 * 3600
+
+
+class Generator:
+    """Reproduceerbare rijen per tabel; alle willekeur komt uit één geseede Random"""
+
+    def __init__(self, seed: int, args):
+        self.rng = random.Random(seed)
+        self.args = args
+
+    def uuid(self) -> UUID:
+        return UUID(int=self.rng.getrandbits(128), version=4)
+
+    def uuids(self, count: int) -> List[UUID]:
+        return [self.uuid() for _ in range(count)]
+
+    def score(self, low: float = 0.0, high: float = 1.0) -> Decimal:
+        """DECIMAL(3,2)-waarde; asyncpg COPY verwacht Decimal voor numeric"""
+        return Decimal(f"{self.rng.uniform(low, high):.2f}")
+
+    def timestamp(self) -> datetime:
+        return START + timedelta(seconds=self.rng.randrange(SPAN_SECONDS))
+
+    def skewed(self, items: Sequence):
+        """Scheve verdeling: de eerste elementen worden veel vaker gekozen (hot domains)"""
+        return items[int(len(items) * self.rng.random() ** 3)]
+
+    def person(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def title(self, object_type: str) -> str:
+        subject = self.rng.choice(SUBJECTS)
+        place = self.rng.choice(PLACES)
+        if object_type == "email":
+            return f"RE: {subject} {place}"
+        if object_type == "chat":
+            return f"Overleg {subject} {place}"
+        return f"{self.rng.choice(DOCUMENT_KINDS)} {subject} {place} {self.rng.randint(2020, 2025)}"
+
+
+async def copy(conn, table: str, columns: Sequence[str], records: Iterator[tuple]) -> int:
+    started = time.perf_counter()
+    status = await conn.copy_records_to_table(table, columns=list(columns), records=records)
+    count = int(status.split()[-1])
+    print(f"  {table:<28} {count:>10} rijen  {time.perf_counter() - started:6.1f}s")
+    return count
+
+
+async def disable_triggers(conn) -> bool:
+    try:
+        async with conn.transaction():  # savepoint: een mislukte SET breekt de transactie niet af
+            await conn.execute("SET LOCAL session_replication_role = replica")
+        return True
+    except asyncpg.InsufficientPrivilegeError:
+        # Zonder superuser: alleen de information_objects-triggers slaan zichzelf over
+        await conn.execute("SET LOCAL iou.bulk_ingest = 'on'")
+        print("  (geen superuser: per-rij triggers op kleine tabellen blijven actief)")
+        return False
+
+
+async def has_table(conn, name: str) -> bool:
+    return await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", name)
+
+
+async def generate(conn, gen: Generator, args) -> None:
+    rng = gen.rng
+
+    # Organisaties en afdelingen
+    org_ids = gen.uuids(args.organizations)
+    await copy(conn, "organizations", ("id", "name", "type", "parent_org_id"), (
+        (org_id, f"{org_type.title()} {rng.choice(PLACES)} {i}",
+         org_type, org_ids[0] if i and rng.random() < 0.2 else None)
+        for i, org_id in enumerate(org_ids)
+        for org_type in [rng.choice(ORGANIZATION_TYPES)]
+    ))
+
+    departments = [(gen.uuid(), org_id, name) for org_id in org_ids
+                   for name in rng.sample(DEPARTMENTS, args.departments_per_org)]
+    await copy(conn, "departments", ("id", "organization_id", "name"), iter(departments))
+
+    role_ids = gen.uuids(len(ROLES))
+    await copy(conn, "roles", ("id", "name", "description", "permissions"), (
+        (role_id, name, f"Rol {name}", json.dumps(permissions))
+        for role_id, (name, permissions) in zip(role_ids, ROLES)
+    ))
+
+    # Gebruikers: e-mail uniek via volgnummer
+    user_ids = gen.uuids(args.users)
+    user_departments = [rng.choice(departments) for _ in user_ids]
+    await copy(conn, "users", ("id", "email", "name", "department_id", "active"), (
+        (user_id, f"gebruiker{i}@{dept[1].hex[:8]}.example.nl", gen.person(), dept[0], rng.random() > 0.02)
+        for i, (user_id, dept) in enumerate(zip(user_ids, user_departments))
+    ))
+    await copy(conn, "user_roles", ("user_id", "role_id", "valid_until"), (
+        (user_id, role_id, None if rng.random() > 0.05 else gen.timestamp())
+        for user_id in user_ids
+        for role_id in rng.sample(role_ids, rng.randint(1, 2))
+    ))
+
+    # Domeinen, verdeeld over organisaties; eigenaar uit dezelfde organisatie waar mogelijk
+    users_by_org = {}
+    for user_id, dept in zip(user_ids, user_departments):
+        users_by_org.setdefault(dept[1], []).append(user_id)
+
+    domain_ids = gen.uuids(args.domains)
+    domains = []
+    for i, domain_id in enumerate(domain_ids):
+        org_id = rng.choice(org_ids)
+        domain_type = rng.choices(DOMAIN_TYPES, DOMAIN_TYPE_WEIGHTS)[0]
+        owner = rng.choice(users_by_org.get(org_id) or user_ids)
+        domains.append((domain_id, domain_type, org_id, owner))
+
+    await copy(conn, "information_domains", (
+        "id", "type", "name", "description", "status", "organization_id",
+        "owner_user_id", "metadata", "created_at"
+    ), (
+        (domain_id, domain_type, f"{domain_type.title()} {rng.choice(SUBJECTS)} {rng.choice(PLACES)} {i}",
+         None, rng.choice(DOMAIN_STATUSES), org_id, owner,
+         json.dumps({"generated": True, "seed": args.seed}), gen.timestamp())
+        for i, (domain_id, domain_type, org_id, owner) in enumerate(domains)
+    ))
+
+    await copy(conn, "cases", (
+        "id", "case_number", "case_type", "subject", "start_date", "target_date",
+        "legal_basis", "retention_period", "disclosure_class"
+    ), (
+        (domain_id, f"Z-{i:08d}", rng.choice(CASE_TYPES), f"Aanvraag {rng.choice(SUBJECTS)}",
+         date(2020, 1, 1) + timedelta(days=rng.randrange(1800)), None,
+         rng.choice(LAWS), rng.choice([5, 7, 10, 20]), rng.choice(CLASSIFICATIONS[:2]))
+        for i, (domain_id, domain_type, _, _) in enumerate(domains) if domain_type == "zaak"
+    ))
+    await copy(conn, "projects", ("id", "project_code", "budget", "project_phase"), (
+        (domain_id, f"P-{i:08d}", Decimal(rng.randint(10, 5000) * 1000), rng.choice(PROJECT_PHASES))
+        for i, (domain_id, domain_type, _, _) in enumerate(domains) if domain_type == "project"
+    ))
+    await copy(conn, "policy_topics", ("id", "policy_area", "policy_cycle"), (
+        (domain_id, rng.choice(POLICY_AREAS), rng.choice(POLICY_CYCLES))
+        for domain_id, domain_type, _, _ in domains if domain_type == "beleid"
+    ))
+
+    # Relaties en stakeholders
+    relations = set()
+    for domain_id in domain_ids:
+        for _ in range(rng.randint(0, args.relations_per_domain * 2)):
+            relations.add((domain_id, gen.skewed(domain_ids), rng.choice(RELATION_TYPES)))
+    await copy(conn, "domain_relations", ("from_domain_id", "to_domain_id", "relation_type"), (
+        r for r in sorted(relations) if r[0] != r[1]
+    ))
+
+    stakeholder_ids = gen.uuids(args.stakeholders)
+    await copy(conn, "stakeholders", ("id", "type", "name", "contact_details"), (
+        (stakeholder_id, stakeholder_type,
+         gen.person() if stakeholder_type == "burger" else f"{rng.choice(SUBJECTS).title()} {rng.choice(PLACES)} BV",
+         json.dumps({"plaats": rng.choice(PLACES)}))
+        for stakeholder_id in stakeholder_ids
+        for stakeholder_type in [rng.choice(STAKEHOLDER_TYPES)]
+    ))
+    await copy(conn, "domain_stakeholders", ("domain_id", "stakeholder_id", "role"), (
+        (domain_id, stakeholder_id, rng.choice(STAKEHOLDER_ROLES))
+        for domain_id in domain_ids
+        for stakeholder_id in rng.sample(stakeholder_ids, min(len(stakeholder_ids), rng.randint(0, 4)))
+    ))
+
+    # Informatieobjecten via staging, zodat full_text_search set-based berekend wordt
+    await conn.execute("""
+        CREATE TEMP TABLE staging_information_objects
+        (LIKE information_objects INCLUDING DEFAULTS)
+    """)
+    object_columns = (
+        "id", "domain_id", "object_type", "title", "content_location", "mime_type",
+        "size_bytes", "created_by", "created_at", "classification", "retention_period",
+        "is_woo_relevant", "privacy_level", "tags", "metadata"
+    )
+    objects: List[Tuple[UUID, UUID]] = []  # (object_id, domain_id) voor entity_occurrences
+    remaining = args.objects
+    while remaining > 0:
+        batch = min(remaining, args.batch_size)
+        remaining -= batch
+        rows = []
+        for _ in range(batch):
+            object_id = gen.uuid()
+            domain_id, _, org_id, _ = gen.skewed(domains)
+            object_type = rng.choices(OBJECT_TYPES, OBJECT_TYPE_WEIGHTS)[0]
+            objects.append((object_id, domain_id))
+            rows.append((
+                object_id, domain_id, object_type, gen.title(object_type),
+                f"s3://iou-archief/{domain_id}/{object_id}", MIME_TYPES[object_type],
+                rng.randint(1_000, 20_000_000), rng.choice(users_by_org.get(org_id) or user_ids),
+                gen.timestamp(), rng.choices(CLASSIFICATIONS, CLASSIFICATION_WEIGHTS)[0],
+                rng.choice([5, 7, 10, 20]), rng.random() < 0.3, rng.choice(PRIVACY_LEVELS),
+                rng.sample(TAGS, rng.randint(0, 3)), json.dumps({"generated": True})
+            ))
+        await copy(conn, "staging_information_objects", object_columns, iter(rows))
+        await conn.execute(f"""
+            INSERT INTO information_objects ({', '.join(object_columns)}, full_text_search)
+            SELECT {', '.join(object_columns)},
+                to_tsvector('dutch', coalesce(title, '') || ' ' || coalesce(array_to_string(tags, ' '), ''))
+            FROM staging_information_objects
+        """)
+        await conn.execute("TRUNCATE staging_information_objects")
+
+    # Apps en gebruik
+    app_ids = gen.uuids(args.apps)
+    await copy(conn, "apps", ("id", "name", "description", "app_type", "relevant_for_domain_types", "active"), (
+        (app_id, f"App {i} {rng.choice(APP_TYPES)}", "Gegenereerde app", rng.choice(APP_TYPES),
+         rng.sample(DOMAIN_TYPES, rng.randint(1, 3)), True)
+        for i, app_id in enumerate(app_ids)
+    ))
+    usage = {}
+    for user_id in user_ids:
+        for _ in range(rng.randint(0, 8)):
+            key = (user_id, gen.skewed(app_ids), gen.skewed(domain_ids))
+            usage[key] = usage.get(key, 0) + rng.randint(1, 20)
+    await copy(conn, "user_app_usage", ("user_id", "app_id", "domain_id", "usage_count", "last_used_at"), (
+        (*key, count, gen.timestamp()) for key, count in usage.items()
+    ))
+
+    # Audit trail, verspreid over de maandpartities
+    if await conn.fetchval("SELECT to_regproc('ensure_audit_partitions') IS NOT NULL"):
+        await conn.fetchval("SELECT ensure_audit_partitions($1, 3)", START.date())
+    await copy(conn, "audit_log", ("user_id", "action", "object_type", "object_id", "domain_id", "timestamp"), (
+        # Leesacties loggen het domein zelf, zoals GET /context doet
+        (user_id, action, "domain" if action == "read" else "information_object",
+         domain_id if action == "read" else object_id, domain_id, gen.timestamp())
+        for _ in range(args.audit_events)
+        for user_id in [rng.choice(user_ids)]
+        for object_id, domain_id in [rng.choice(objects) if objects else (None, gen.skewed(domain_ids))]
+        for action in [rng.choices(AUDIT_ACTIONS, AUDIT_ACTION_WEIGHTS)[0]]
+    ))
+
+    await copy(conn, "business_rules", (
+        "rule_name", "rule_category", "legal_basis", "rule_logic",
+        "applies_to_domain_types", "applies_to_object_types", "active"
+    ), (
+        (f"Bewaartermijn {case_type}", "archivering", "Archiefwet",
+         json.dumps({
+             "conditions": [{"field": "domain.case_type", "operator": "equals", "value": case_type}],
+             "actions": [{"set_field": "retention_period", "value": rng.choice([5, 7, 10, 20])}],
+         }),
+         ["zaak"], OBJECT_TYPES, True)
+        for case_type in CASE_TYPES
+    ))
+
+    if args.graphrag and await has_table(conn, "graph_entities"):
+        await generate_graphrag(conn, gen, args, domain_ids, objects)
+    elif args.graphrag:
+        print("  graphrag_extensions.sql niet geladen: GraphRAG-tabellen overgeslagen")
+
+
+async def generate_graphrag(conn, gen: Generator, args, domain_ids, objects) -> None:
+    rng = gen.rng
+    entity_ids = gen.uuids(args.entities)
+    await copy(conn, "graph_entities", (
+        "id", "entity_type", "entity_name", "canonical_name", "confidence_score", "source_count"
+    ), (
+        (entity_id, entity_type, name, f"{name.lower()} {i}", gen.score(0.5, 1.0), rng.randint(1, 200))
+        for i, entity_id in enumerate(entity_ids)
+        for entity_type in [rng.choice(ENTITY_TYPES)]
+        for name in [
+            gen.person() if entity_type == "PERSON"
+            else rng.choice(LAWS) if entity_type == "LAW"
+            else rng.choice(PLACES) if entity_type == "LOCATION"
+            else rng.choice(SUBJECTS).title()
+        ]
+    ))
+    await copy(conn, "entity_occurrences", (
+        "entity_id", "object_id", "domain_id", "position_in_text", "salience_score"
+    ), (
+        (gen.skewed(entity_ids), object_id, domain_id, rng.randint(0, 5000), gen.score())
+        for object_id, domain_id in rng.sample(objects, min(len(objects), args.entities * 5))
+    ))
+    relationships = {
+        (gen.skewed(entity_ids), gen.skewed(entity_ids), rng.choice(["RELATED_TO", "MENTIONS", "PART_OF"]))
+        for _ in range(args.entities * 2)
+    }
+    await copy(conn, "entity_relationships", (
+        "source_entity_id", "target_entity_id", "relationship_type", "relationship_strength", "evidence_count"
+    ), (
+        (*r, gen.score(), rng.randint(1, 50)) for r in sorted(relationships) if r[0] != r[1]
+    ))
+    community_ids = gen.uuids(max(1, args.entities // 100))
+    await copy(conn, "graph_communities", ("id", "community_name", "key_themes", "member_count"), (
+        (community_id, f"Community {i}", rng.sample(SUBJECTS, 3), 0)
+        for i, community_id in enumerate(community_ids)
+    ))
+    await copy(conn, "community_members", ("community_id", "domain_id", "membership_score"), (
+        (rng.choice(community_ids), domain_id, gen.score())
+        for domain_id in rng.sample(domain_ids, min(len(domain_ids), len(community_ids) * 20))
+    ))
+    relations = {
+        (gen.skewed(domain_ids), gen.skewed(domain_ids), "SHARED_ENTITIES")
+        for _ in range(len(domain_ids) // 10)
+    }
+    await copy(conn, "graphrag_domain_relations", (
+        "from_domain_id", "to_domain_id", "relation_reason", "relation_strength", "shared_entity_count"
+    ), (
+        (*r, gen.score(), rng.randint(1, 20)) for r in sorted(relations) if r[0] != r[1]
+    ))
+
+
+async def rebuild_derived(conn) -> None:
+    """Afgeleide data die normaal door triggers wordt bijgehouden"""
+    started = time.perf_counter()
+    await conn.execute("""
+        INSERT INTO user_organization_access (user_id, organization_id)
+        SELECT u.id, d.organization_id
+        FROM users u JOIN departments d ON u.department_id = d.id
+        ON CONFLICT DO NOTHING
+    """)
+    await conn.execute("""
+        INSERT INTO domain_versions (domain_id)
+        SELECT id FROM information_domains
+        ON CONFLICT (domain_id) DO NOTHING
+    """)
+    if await has_table(conn, "graph_communities"):
+        await conn.execute("""
+            UPDATE graph_communities gc
+            SET member_count = (SELECT count(*) FROM community_members cm WHERE cm.community_id = gc.id)
+        """)
+    print(f"  afgeleide data opgebouwd        {time.perf_counter() - started:6.1f}s")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL", DEFAULT_DSN))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--organizations", type=int, default=50)
+    parser.add_argument("--departments-per-org", type=int, default=6)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--domains", type=int, default=100_000)
+    parser.add_argument("--objects", type=int, default=1_000_000)
+    parser.add_argument("--stakeholders", type=int, default=50_000)
+    parser.add_argument("--relations-per-domain", type=int, default=2)
+    parser.add_argument("--apps", type=int, default=40)
+    parser.add_argument("--entities", type=int, default=20_000)
+    parser.add_argument("--audit-events", type=int, default=1_000_000)
+    parser.add_argument("--no-graphrag", dest="graphrag", action="store_false")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--truncate", action="store_true", help="Leeg alle tabellen eerst")
+    return parser
+
+
+async def load_dataset(conn, args) -> None:
+    started = time.perf_counter()
+    if args.truncate:
+        await conn.execute("""
+            TRUNCATE organizations, departments, roles, users, business_rules, apps,
+                stakeholders, audit_log RESTART IDENTITY CASCADE
+        """)
+        if await has_table(conn, "graph_entities"):
+            await conn.execute("TRUNCATE graph_entities, graph_communities CASCADE")
+    elif await conn.fetchval("SELECT EXISTS (SELECT 1 FROM information_objects)"):
+        raise SystemExit("Database bevat al data; gebruik --truncate voor een schone dataset")
+
+    print(f"Genereren met seed {args.seed}")
+    async with conn.transaction():
+        await disable_triggers(conn)
+        await generate(conn, Generator(args.seed, args), args)
+        await rebuild_derived(conn)
+
+    await conn.execute("ANALYZE")
+    print(f"Klaar in {time.perf_counter() - started:.1f}s")
+
+
+async def main():
+    args = build_parser().parse_args()
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        await load_dataset(conn, args)
+    finally:
+        await conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,245 @@
+"""
+Load test: gemengde workload tegen de context service, per endpoint throughput en p50/p95/p99
+
+Zonder --url draait de app in-process (httpx ASGITransport, startup zoals uvicorn);
+load generator en app delen dan één event loop, dus de latencies zijn een bovengrens.
+In-process verbindt de app via DB_HOST/DB_NAME/..., --dsn dient alleen om gebruikers
+en domeinen te kiezen. Met --url wordt een draaiende server (bijv. uvicorn met
+meerdere workers) belast.
+
+    python -m benchmarks.generate_dataset --users 10000 --domains 100000 --objects 1000000
+    python -m benchmarks.load_test --concurrency 32 --duration 60
+    python -m benchmarks.load_test --url http://localhost:8000 --mix context=6,search=2,writes=1
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import asyncpg
+import httpx
+
+from benchmarks.bench_context_assembly import DEFAULT_DSN
+from benchmarks.generate_dataset import SUBJECTS, TAGS
+from benchmarks.timing import summarize
+
+DEFAULT_MIX = "context=10,search=3,apps=2,context_batch=1"
+
+
+class Workload:
+    """Gebruikers met domeinen uit hun eigen organisatie, zodat requests niet op 403 stranden"""
+
+    def __init__(self, users: List[Tuple[str, List[str]]], app_ids: List[str], seed: int):
+        self.users = users
+        self.app_ids = app_ids
+        self.rng = random.Random(seed)
+
+    @classmethod
+    async def load(cls, dsn: str, sample_users: int, domains_per_org: int, seed: int) -> "Workload":
+        conn = await asyncpg.connect(dsn)
+        try:
+            domains = {
+                row["organization_id"]: [str(d) for d in row["domain_ids"]]
+                for row in await conn.fetch("""
+                    SELECT organization_id, array_agg(id) as domain_ids
+                    FROM (
+                        SELECT id, organization_id,
+                            row_number() OVER (PARTITION BY organization_id ORDER BY md5(id::text)) as rn
+                        FROM information_domains
+                    ) d
+                    WHERE rn <= $1
+                    GROUP BY organization_id
+                """, domains_per_org)
+            }
+            users = [
+                (str(row["user_id"]), domains[row["organization_id"]])
+                for row in await conn.fetch("""
+                    SELECT u.id as user_id, d.organization_id
+                    FROM users u
+                    JOIN departments d ON u.department_id = d.id
+                    JOIN user_roles ur ON ur.user_id = u.id
+                    JOIN roles r ON ur.role_id = r.id
+                    WHERE u.active = true AND r.permissions->>'can_write' = 'true'
+                    GROUP BY u.id, d.organization_id
+                    ORDER BY md5(u.id::text)
+                    LIMIT $1
+                """, sample_users)
+                if row["organization_id"] in domains
+            ]
+            app_ids = [str(row["id"]) for row in await conn.fetch("SELECT id FROM apps WHERE active = true")]
+        finally:
+            await conn.close()
+        if not users:
+            raise SystemExit("Geen gebruikers met domeinen gevonden - draai eerst benchmarks.generate_dataset")
+        return cls(users, app_ids, seed)
+
+    def pick(self) -> Tuple[str, List[str]]:
+        return self.rng.choice(self.users)
+
+    def search_term(self) -> str:
+        return self.rng.choice(SUBJECTS).split()[0]
+
+
+# ============================================
+# REQUESTS PER ENDPOINT
+# ============================================
+
+async def context(client: httpx.AsyncClient, w: Workload) -> httpx.Response:
+    user_id, domains = w.pick()
+    return await client.get(f"/context/{w.rng.choice(domains)}", headers=auth(user_id))
+
+
+async def search(client: httpx.AsyncClient, w: Workload) -> httpx.Response:
+    user_id, _ = w.pick()
+    params = {"q": w.search_term(), "limit": 20}
+    if w.rng.random() < 0.5:
+        params["view"] = "compact"
+    return await client.get("/search", params=params, headers=auth(user_id))
+
+
+async def apps(client: httpx.AsyncClient, w: Workload) -> httpx.Response:
+    user_id, domains = w.pick()
+    return await client.get(
+        "/apps/recommended", params={"domain_id": w.rng.choice(domains)}, headers=auth(user_id)
+    )
+
+
+async def context_batch(client: httpx.AsyncClient, w: Workload) -> httpx.Response:
+    user_id, domains = w.pick()
+    body = {"domain_ids": w.rng.sample(domains, min(len(domains), 10))}
+    return await client.post("/context:batch", json=body, headers=auth(user_id))
+
+
+async def writes(client: httpx.AsyncClient, w: Workload) -> httpx.Response:
+    user_id, domains = w.pick()
+    domain_id = w.rng.choice(domains)
+    if w.app_ids and w.rng.random() < 0.5:
+        return await client.post(
+            f"/apps/{w.rng.choice(w.app_ids)}/usage", params={"domain_id": domain_id}, headers=auth(user_id)
+        )
+    body = {
+        "domain_id": domain_id,
+        "object_type": "document",
+        "title": f"Loadtest {w.search_term()} {uuid.UUID(int=w.rng.getrandbits(128)).hex[:8]}",
+        "content_location": "s3://iou-loadtest/document.pdf",
+        "mime_type": "application/pdf",
+        "tags": w.rng.sample(TAGS, 2),
+        "created_by": user_id,
+    }
+    return await client.post("/objects", json=body, headers=auth(user_id))
+
+
+ENDPOINTS = {
+    "context": context,
+    "search": search,
+    "apps": apps,
+    "context_batch": context_batch,
+    "writes": writes,
+}
+
+
+def auth(user_id: str) -> Dict[str, str]:
+    # Demo-authenticatie: het bearer token is het gebruikers-id
+    return {"Authorization": f"Bearer {user_id}"}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Onbekend endpoint in --mix: {name} (kies uit {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# ============================================
+# AANSTURING
+# ============================================
+
+async def worker(client, workload: Workload, mix: Dict[str, float], deadline: float, results) -> None:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < deadline:
+        name = workload.rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            status = (await ENDPOINTS[name](client, workload)).status_code
+        except httpx.HTTPError:
+            status = 0
+        results[name].append(((time.perf_counter() - started) * 1000, status))
+
+
+async def run(client, workload: Workload, mix, concurrency: int, duration: float, warmup: float):
+    if warmup:
+        await asyncio.gather(*(
+            worker(client, workload, mix, time.perf_counter() + warmup, defaultdict(list))
+            for _ in range(concurrency)
+        ))
+
+    results: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        worker(client, workload, mix, started + duration, results) for _ in range(concurrency)
+    ))
+    return results, time.perf_counter() - started
+
+
+def report(results: Dict[str, List[Tuple[float, int]]], elapsed: float, concurrency: int) -> None:
+    print(f"{elapsed:.1f}s, {concurrency} gelijktijdige clients")
+    print(f"{'endpoint':<16}{'n':>8}{'fouten':>8}{'503':>6}{'req/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}")
+    total = 0
+    for name, samples in sorted(results.items()):
+        total += len(samples)
+        errors = sum(1 for _, status in samples if status == 0 or (status >= 400 and status != 503))
+        shed = sum(1 for _, status in samples if status == 503)
+        ok = [ms for ms, status in samples if 0 < status < 400]
+        line = f"{name:<16}{len(samples):>8}{errors:>8}{shed:>6}{len(samples) / elapsed:>9.1f}"
+        if len(ok) >= 2:
+            s = summarize(ok)
+            line += f"{s['p50']:>8.1f}ms{s['p95']:>8.1f}ms{s['p99']:>8.1f}ms"
+        print(line)
+    print(f"{'totaal':<16}{total:>8}{'':>14}{total / elapsed:>9.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL", DEFAULT_DSN))
+    parser.add_argument("--url", help="Basis-URL van een draaiende server; zonder: in-process")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Gewichten per endpoint (standaard {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--sample-users", type=int, default=2000)
+    parser.add_argument("--domains-per-org", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    workload = await Workload.load(args.dsn, args.sample_users, args.domains_per_org, args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30.0) as client:
+            results, elapsed = await run(client, workload, mix, args.concurrency, args.duration, args.warmup)
+    else:
+        from src.api import context_service
+
+        await context_service.startup()
+        try:
+            transport = httpx.ASGITransport(app=context_service.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=30.0) as client:
+                results, elapsed = await run(client, workload, mix, args.concurrency, args.duration, args.warmup)
+        finally:
+            await context_service.shutdown()
+
+    report(results, elapsed, args.concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,349 @@
+"""
+Plan-regressiesuite voor de hot queries van het schema
+
+Draait EXPLAIN (ANALYZE, BUFFERS) op iedere benoemde query tegen een geschaalde dataset
+en controleert:
+- vaste regels per query (geen seq scan op bepaalde tabellen, verplicht indexgebruik,
+  maximaal aantal door een join filter weggegooide rijen, partition pruning van audit_log)
+- de opgeslagen baseline: afwijkende planvorm of meer dan --buffer-tolerance keer zoveel
+  buffers faalt luid (exitcode 1); bewust geaccepteerde wijzigingen via --update-baselines
+- een ontbrekende baseline (bestand of query) faalt ook; baselines worden alleen met
+  --update-baselines vastgelegd, nooit stilzwijgend bij een gewone run
+
+Bootstrap (eenmalig, en na een bewuste schemawijziging): baselines horen bij de
+standaarddataset van benchmarks.generate_dataset (--seed 42, standaardschaal). Leg ze vast
+tegen een lege database met het schema en commit benchmarks/plan_baselines.json:
+
+    python -m benchmarks.plan_regression --generate --update-baselines
+
+CI (.github/workflows/plan-regression.yml) doet deze bootstrap zelf zolang het bestand
+ontbreekt en levert het als artifact op; daarna vergelijkt iedere run ertegen.
+
+    python -m benchmarks.plan_regression --generate --objects 1000000   # dataset laden + testen
+    python -m benchmarks.plan_regression
+    python -m benchmarks.plan_regression --update-baselines
+"""
+
+import argparse
+import asyncio
+import difflib
+import fnmatch
+import json
+import os
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import asyncpg
+
+from benchmarks import generate_dataset
+from benchmarks.bench_context_assembly import DEFAULT_DSN
+from src.api import statements
+from src.services.graphrag_service import (
+    DOMAIN_PAIRS_QUERY,
+    ENTITY_NETWORK_QUERY,
+    SHARED_ENTITY_DOMAINS_QUERY,
+)
+
+DEFAULT_BASELINES = os.path.join(os.path.dirname(__file__), "plan_baselines.json")
+
+
+@dataclass
+class HotQuery:
+    name: str
+    sql: str
+    params_sql: Optional[str] = None  # levert één rij met de parameters van sql
+    forbid_seq_scan: Tuple[str, ...] = ()  # tabelnamen, glob-patronen toegestaan
+    require_index: Tuple[str, ...] = ()  # minstens één van deze indexen (glob) moet gebruikt worden
+    max_join_filter_removed: Optional[int] = None
+    max_partitions: Optional[int] = None  # audit_log partities in het plan (na pruning)
+
+
+HOTTEST_DOMAIN = """
+    SELECT domain_id FROM information_objects
+    GROUP BY domain_id ORDER BY count(*) DESC, domain_id LIMIT 1
+"""
+
+AUDIT_WINDOW_PARAMS = """
+    SELECT {column}, max_ts - INTERVAL '30 days', max_ts
+    FROM (
+        SELECT {column}, max(timestamp) as max_ts FROM audit_log
+        WHERE {column} IS NOT NULL
+        GROUP BY {column} ORDER BY count(*) DESC, {column} LIMIT 1
+    ) busiest
+"""
+
+HOT_QUERIES = [
+    HotQuery(
+        "entity_network",
+        ENTITY_NETWORK_QUERY,
+        """
+            SELECT source_entity_id, 2 FROM entity_relationships
+            GROUP BY source_entity_id ORDER BY count(*) DESC, source_entity_id LIMIT 1
+        """,
+        forbid_seq_scan=("entity_relationships", "graph_entities"),
+        require_index=("idx_entity_rel_source", "idx_entity_rel_target"),
+    ),
+    HotQuery(
+        "entity_cooccurrence",
+        "SELECT * FROM v_entity_cooccurrence WHERE entity_1 = $1 LIMIT 20",
+        """
+            SELECT e.entity_name FROM entity_occurrences eo JOIN graph_entities e ON eo.entity_id = e.id
+            GROUP BY e.id, e.entity_name ORDER BY count(*) DESC, e.id LIMIT 1
+        """,
+        forbid_seq_scan=("entity_occurrences",),
+    ),
+    HotQuery(
+        "shared_entity_domains",
+        SHARED_ENTITY_DOMAINS_QUERY,
+        """
+            SELECT domain_id FROM entity_occurrences WHERE domain_id IS NOT NULL
+            GROUP BY domain_id ORDER BY count(*) DESC, domain_id LIMIT 1
+        """,
+        forbid_seq_scan=("entity_occurrences",),
+    ),
+    HotQuery(
+        "domain_pairs",
+        DOMAIN_PAIRS_QUERY,
+        max_join_filter_removed=1_000_000,
+    ),
+    HotQuery(
+        "search",
+        statements.SEARCH_STATEMENTS[(False, False, False, False, True)],
+        "SELECT 'windpark', array_agg(id), 50 FROM organizations",
+        forbid_seq_scan=("information_objects",),
+        require_index=("idx_info_objects_fts",),
+    ),
+    HotQuery(
+        "search_compact",
+        statements.SEARCH_STATEMENTS[(True, False, False, False, True)],
+        "SELECT 'fietspad', array_agg(id), 50 FROM organizations",
+        forbid_seq_scan=("information_objects",),
+        require_index=("idx_info_objects_fts",),
+    ),
+    HotQuery(
+        "fetch_recent_objects",
+        statements.FETCH_RECENT_OBJECTS,
+        HOTTEST_DOMAIN,
+        forbid_seq_scan=("information_objects",),
+        require_index=("idx_info_objects_domain",),
+    ),
+    HotQuery(
+        "fetch_related_domains",
+        statements.FETCH_RELATED_DOMAINS,
+        HOTTEST_DOMAIN,
+        forbid_seq_scan=("domain_relations", "information_domains"),
+    ),
+    HotQuery(
+        "fetch_stakeholders",
+        statements.FETCH_STAKEHOLDERS,
+        HOTTEST_DOMAIN,
+        forbid_seq_scan=("domain_stakeholders", "stakeholders"),
+    ),
+    HotQuery(
+        "audit_user_window",
+        """
+            SELECT * FROM audit_log
+            WHERE user_id = $1 AND timestamp >= $2 AND timestamp < $3
+            ORDER BY timestamp DESC LIMIT 100
+        """,
+        AUDIT_WINDOW_PARAMS.format(column="user_id"),
+        forbid_seq_scan=("audit_log_*",),
+        max_partitions=2,
+    ),
+    HotQuery(
+        "audit_domain_window",
+        """
+            SELECT * FROM audit_log
+            WHERE domain_id = $1 AND timestamp >= $2 AND timestamp < $3
+            ORDER BY timestamp DESC LIMIT 100
+        """,
+        AUDIT_WINDOW_PARAMS.format(column="domain_id"),
+        forbid_seq_scan=("audit_log_*",),
+        max_partitions=2,
+    ),
+]
+
+
+# ============================================
+# PLANANALYSE
+# ============================================
+
+def walk(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+def shape(plan: Dict[str, Any]) -> List[str]:
+    """Planvorm zonder kosten en aantallen: node type, relatie en index, ingesprongen per niveau"""
+    lines = []
+
+    def visit(node, depth):
+        detail = ", ".join(
+            node[key] for key in ("Relation Name", "Index Name") if key in node
+        )
+        lines.append("  " * depth + node["Node Type"] + (f" ({detail})" if detail else ""))
+        for child in node.get("Plans", []):
+            visit(child, depth + 1)
+
+    visit(plan, 0)
+    return lines
+
+
+def check_rules(query: HotQuery, plan: Dict[str, Any]) -> List[str]:
+    nodes = list(walk(plan))
+    failures = []
+    for node in nodes:
+        relation = node.get("Relation Name", "")
+        if node["Node Type"] == "Seq Scan" and matches(relation, query.forbid_seq_scan):
+            failures.append(f"seq scan op {relation}")
+        removed = node.get("Rows Removed by Join Filter", 0) * node.get("Actual Loops", 1)
+        if query.max_join_filter_removed is not None and removed > query.max_join_filter_removed:
+            failures.append(f"{node['Node Type']} gooit {removed} rijen weg via join filter")
+
+    if query.require_index:
+        if not any(matches(node.get("Index Name", ""), query.require_index) for node in nodes):
+            failures.append(f"geen van de indexen {', '.join(query.require_index)} gebruikt")
+
+    if query.max_partitions is not None:
+        partitions = {
+            node["Relation Name"] for node in nodes
+            if node.get("Relation Name", "").startswith("audit_log_")
+        }
+        if len(partitions) > query.max_partitions:
+            failures.append(
+                f"{len(partitions)} partities gescand (max {query.max_partitions}): "
+                + ", ".join(sorted(partitions))
+            )
+    return failures
+
+
+def matches(name: str, patterns: Tuple[str, ...]) -> bool:
+    return bool(name) and any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def check_baseline(
+    current: Dict[str, Any], baseline: Optional[Dict[str, Any]], tolerance: float
+) -> List[str]:
+    if baseline is None:
+        return ["geen baseline; leg die vast met --update-baselines"]
+    failures = []
+    if current["shape"] != baseline["shape"]:
+        diff = difflib.unified_diff(baseline["shape"], current["shape"], "baseline", "huidig", lineterm="")
+        failures.append("planvorm gewijzigd:\n      " + "\n      ".join(diff))
+    # Kleine absolute marge, zodat een baseline van een paar blocks niet bij ieder verschil faalt
+    budget = max(baseline["buffers"] * tolerance, baseline["buffers"] + 100)
+    if current["buffers"] > budget:
+        failures.append(f"buffers {current['buffers']} > {budget:.0f} (baseline {baseline['buffers']})")
+    return failures
+
+
+async def explain(conn, query: HotQuery) -> Dict[str, Any]:
+    params = ()
+    if query.params_sql:
+        row = await conn.fetchrow(query.params_sql)
+        if row is None or row[0] is None:
+            raise LookupError("geen parameters gevonden in de dataset")
+        params = tuple(row)
+
+    raw = await conn.fetchval("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query.sql, *params)
+    result = json.loads(raw)[0]
+    plan = result["Plan"]
+    return {
+        "plan": plan,
+        "shape": shape(plan),
+        "buffers": plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0),
+        "rows": plan.get("Actual Rows", 0),
+        "execution_ms": round(result["Execution Time"], 2),
+    }
+
+
+# ============================================
+# AANSTURING
+# ============================================
+
+def load_baselines(path: str) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(path: str, baselines: Dict[str, Dict[str, Any]]) -> None:
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL", DEFAULT_DSN))
+    parser.add_argument("--baselines", default=DEFAULT_BASELINES)
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("--buffer-tolerance", type=float, default=2.0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="statement_timeout per query (s)")
+    parser.add_argument("--only", action="append", help="Alleen deze query (herhaalbaar)")
+    parser.add_argument(
+        "--generate", action="store_true",
+        help="Laad eerst een schone dataset; overige opties gaan naar benchmarks.generate_dataset"
+    )
+    args, dataset_args = parser.parse_known_args()
+    if dataset_args and not args.generate:
+        parser.error(f"onbekende opties: {' '.join(dataset_args)}")
+
+    if not args.update_baselines and not os.path.exists(args.baselines):
+        print(
+            f"FAIL geen baselines in {args.baselines}; leg die vast met "
+            "--generate --update-baselines en commit het bestand (zie de moduledocstring)"
+        )
+        return 1
+
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        if args.generate:
+            dataset = generate_dataset.build_parser().parse_args(dataset_args + ["--truncate"])
+            await generate_dataset.load_dataset(conn, dataset)
+
+        await conn.execute(f"SET statement_timeout = {int(args.timeout * 1000)}")
+        baselines = load_baselines(args.baselines)
+        failed = False
+
+        for query in HOT_QUERIES:
+            if args.only and query.name not in args.only:
+                continue
+            try:
+                current = await explain(conn, query)
+            except (asyncpg.QueryCanceledError, LookupError) as e:
+                print(f"FAIL {query.name}: {e}")
+                failed = True
+                continue
+
+            failures = check_rules(query, current["plan"])
+            if not args.update_baselines:
+                failures += check_baseline(current, baselines.get(query.name), args.buffer_tolerance)
+
+            status = "FAIL" if failures else "ok  "
+            print(
+                f"{status} {query.name:<24} {current['execution_ms']:>10.2f}ms "
+                f"buffers={current['buffers']:<8} rows={current['rows']}"
+            )
+            for failure in failures:
+                print(f"    - {failure}")
+            if failures:
+                print("      " + "\n      ".join(current["shape"]))
+                failed = True
+            elif args.update_baselines:
+                baselines[query.name] = {
+                    key: current[key] for key in ("shape", "buffers", "rows", "execution_ms")
+                }
+
+        if args.update_baselines:
+            save_baselines(args.baselines, baselines)
+        return 1 if failed else 0
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,54 @@
+"""
+Gedeelde meethulpen voor de benchmarks
+"""
+
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 en gemiddelde van een reeks metingen (milliseconden)"""
+    ordered = sorted(samples_ms)
+    cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+    return {
+        "n": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "p50": cuts[49],
+        "p95": cuts[94],
+        "p99": cuts[98],
+    }
+
+
+def print_report(label: str, samples_ms: List[float]) -> None:
+    s = summarize(samples_ms)
+    print(
+        f"{label:<28} n={s['n']:<6} mean={s['mean']:8.3f}ms "
+        f"p50={s['p50']:8.3f}ms p95={s['p95']:8.3f}ms p99={s['p99']:8.3f}ms"
+    )
+
+
+async def measure_async(fn: Callable[[], Awaitable], iterations: int, warmup: int = 10) -> List[float]:
+    """Meet de latency van een async callable, na een korte warm-up"""
+    for _ in range(warmup):
+        await fn()
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int = 10) -> List[float]:
+    """Meet de latency van een synchrone callable, na een korte warm-up"""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
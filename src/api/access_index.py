@@ -0,0 +1,108 @@
+"""
+In-memory domeintoegangsindex
+Vervangt de join information_domains → organizations → departments → users
+per toegangscheck door twee dictionary lookups
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, FrozenSet, Optional
+
+from asyncpg.pool import Pool
+
+logger = logging.getLogger(__name__)
+
+
+class DomainAccessIndex:
+    """
+    Spiegel van user_organization_access plus een domein → organisatie mapping
+
+    Een gebruiker heeft toegang tot een domein als het domein hoort bij een
+    organisatie waar de gebruiker (via zijn afdeling) werkt. De tabel wordt door
+    triggers bijgehouden; wijzigingen komen binnen via NOTIFY domain_access_changed.
+    """
+
+    CHANNEL = "domain_access_changed"
+
+    def __init__(self):
+        self._orgs_by_user: Dict[str, FrozenSet[str]] = {}
+        self._org_by_domain: Dict[str, str] = {}
+        self._pool: Optional[Pool] = None
+        self._pending: set = set()
+
+    async def load(self, pool: Pool) -> None:
+        self._pool = pool
+        async with pool.acquire() as conn:
+            users = await conn.fetch("""
+                SELECT user_id, array_agg(organization_id) as organization_ids
+                FROM user_organization_access
+                GROUP BY user_id
+            """)
+            domains = await conn.fetch("""
+                SELECT id, organization_id FROM information_domains
+            """)
+
+        self._orgs_by_user = {
+            str(r['user_id']): frozenset(str(o) for o in r['organization_ids'])
+            for r in users
+        }
+        self._org_by_domain = {str(r['id']): str(r['organization_id']) for r in domains}
+
+    async def has_access(self, conn, domain_id: Any, user_id: Any) -> bool:
+        org_id = self._org_by_domain.get(str(domain_id))
+        if org_id is None:
+            org_id = await self._load_domain(conn, domain_id)
+            if org_id is None:
+                return False
+
+        return org_id in await self.accessible_organizations(conn, user_id)
+
+    async def accessible_organizations(self, conn, user_id: Any) -> FrozenSet[str]:
+        orgs = self._orgs_by_user.get(str(user_id))
+        if orgs is None:
+            orgs = await self._load_user(conn, user_id)
+        return orgs
+
+    def add_domain(self, domain_id: Any, organization_id: Any) -> None:
+        self._org_by_domain[str(domain_id)] = str(organization_id)
+
+    def on_notify(self, connection, pid, channel, payload: str) -> None:
+        """asyncpg listener callback: plan herladen van het geraakte deel in"""
+        task = asyncio.get_running_loop().create_task(self._refresh(payload))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def stats(self) -> Dict[str, int]:
+        return {"users": len(self._orgs_by_user), "domains": len(self._org_by_domain)}
+
+    async def _refresh(self, payload: str) -> None:
+        try:
+            kind, _, key = payload.partition(":")
+            if kind == "user":
+                async with self._pool.acquire() as conn:
+                    await self._load_user(conn, key)
+            elif kind == "domain":
+                async with self._pool.acquire() as conn:
+                    await self._load_domain(conn, key)
+            else:
+                await self.load(self._pool)
+        except Exception:
+            logger.exception("Verversen van toegangsindex mislukt (%s)", payload)
+
+    async def _load_user(self, conn, user_id: Any) -> FrozenSet[str]:
+        rows = await conn.fetch("""
+            SELECT organization_id FROM user_organization_access WHERE user_id = $1
+        """, user_id)
+        orgs = frozenset(str(r['organization_id']) for r in rows)
+        self._orgs_by_user[str(user_id)] = orgs
+        return orgs
+
+    async def _load_domain(self, conn, domain_id: Any) -> Optional[str]:
+        org_id = await conn.fetchval("""
+            SELECT organization_id FROM information_domains WHERE id = $1
+        """, domain_id)
+        if org_id is None:
+            self._org_by_domain.pop(str(domain_id), None)
+            return None
+        self._org_by_domain[str(domain_id)] = str(org_id)
+        return str(org_id)
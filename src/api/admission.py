@@ -0,0 +1,353 @@
+"""
+Toelatingscontrole voor databasewerk (load shedding)
+Begrenst hoeveel poolverbindingen de toegelaten requests samen kunnen vasthouden;
+de rest wacht in een begrensde wachtrij per endpoint of krijgt direct 503 met
+Retry-After, in plaats van onbegrensd achter pool.acquire() te blijven hangen.
+Lukt acquire() toch niet binnen de timeout (AcquireTimeoutPool), dan volgt dezelfde 503.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+
+class Lane(IntEnum):
+    """Prioriteit bij het vrijkomen van een plek: lager nummer gaat voor"""
+    INTERACTIVE = 0
+    STANDARD = 1
+    BACKGROUND = 2
+
+
+@dataclass
+class EndpointPolicy:
+    """
+    Limieten voor één endpoint(groep)
+    connections: hoeveel poolverbindingen één request maximaal tegelijk vasthoudt
+    """
+    name: str
+    lane: Lane
+    max_concurrent: int
+    max_queue: int
+    max_wait_seconds: float
+    connections: int = 1
+
+    @classmethod
+    def from_env(
+        cls, name: str, lane: Lane, max_concurrent: int, max_queue: int, max_wait_seconds: float,
+        connections: int = 1
+    ) -> "EndpointPolicy":
+        """
+        Standaardwaarden, te overschrijven met
+        ADMISSION_<NAME>_MAX_CONCURRENT/_MAX_QUEUE/_MAX_WAIT_SECONDS/_CONNECTIONS
+        """
+        prefix = f"ADMISSION_{name.upper()}_"
+        return cls(
+            name=name,
+            lane=lane,
+            max_concurrent=int(os.getenv(prefix + "MAX_CONCURRENT", str(max_concurrent))),
+            max_queue=int(os.getenv(prefix + "MAX_QUEUE", str(max_queue))),
+            max_wait_seconds=float(os.getenv(prefix + "MAX_WAIT_SECONDS", str(max_wait_seconds))),
+            connections=max(1, int(os.getenv(prefix + "CONNECTIONS", str(connections))))
+        )
+
+
+class Overloaded(Exception):
+    """Request geweigerd; retry_after is de geschatte wachttijd in seconden"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class _EndpointState:
+    policy: EndpointPolicy
+    active: int = 0
+    queued: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    # Voortschrijdend gemiddelde van de bedieningstijd, voor de wachttijdschatting
+    service_seconds: float = 0.05
+    recent_waits: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+
+class AdmissionController:
+    """
+    Globale capaciteit in poolverbindingen (de poolgrootte) plus limieten per endpoint
+
+    Een request telt voor zoveel verbindingen als zijn policy opgeeft (get_context met
+    parallelle lookups houdt er meer vast dan een enkele write) en krijgt een plek als
+    er globaal én voor zijn endpoint ruimte is.
+    Komt er een plek vrij, dan gaat de wachtende uit de hoogste lane voor
+    (get_context vóór search en bulk ingest). Wachten is deadline-bewust: als de
+    geschatte wachttijd de deadline al overschrijdt, volgt direct een weigering.
+    """
+
+    EWMA_WEIGHT = 0.1
+
+    def __init__(self, capacity: int = 20):
+        self.capacity = capacity
+        self._active = 0
+        self._waiters: Dict[Lane, Deque[Tuple[_EndpointState, asyncio.Future]]] = {
+            lane: deque() for lane in Lane
+        }
+        self._endpoints: Dict[str, _EndpointState] = {}
+
+    async def acquire(self, policy: EndpointPolicy, deadline_seconds: Optional[float] = None) -> float:
+        """
+        Wacht op een plek; geeft de wachttijd in seconden terug
+        Gooit Overloaded als de wachtrij vol is of de deadline niet haalbaar is
+        """
+        state = self._state(policy)
+        budget = policy.max_wait_seconds
+        if deadline_seconds is not None:
+            budget = min(budget, deadline_seconds)
+
+        # Na iedere dispatch zijn alle wachtenden door hun eigen endpointlimiet geblokkeerd;
+        # een request met ruimte dringt dus niemand voor
+        if self._can_run(state):
+            self._grant(state)
+            self._record_wait(state, 0.0)
+            return 0.0
+
+        estimate = self._estimate_wait(state)
+        if state.queued >= policy.max_queue:
+            self._reject(state)
+            raise Overloaded(f"Wachtrij voor {policy.name} is vol", estimate)
+        if estimate > budget:
+            self._reject(state)
+            raise Overloaded(f"Verwachte wachttijd voor {policy.name} overschrijdt de deadline", estimate)
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        waiter = (state, future)
+        self._waiters[policy.lane].append(waiter)
+        state.queued += 1
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=budget)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Net op tijd toegelaten maar toch afgebroken: plek teruggeven
+                self.release(policy, 0.0)
+            else:
+                future.cancel()
+                self._waiters[policy.lane].remove(waiter)
+                state.queued -= 1
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._reject(state)
+            raise Overloaded(
+                f"Geen plek binnen {budget:.1f}s voor {policy.name}", self._estimate_wait(state)
+            )
+
+        waited = time.monotonic() - started
+        self._record_wait(state, waited)
+        return waited
+
+    def release(self, policy: EndpointPolicy, service_seconds: float) -> None:
+        state = self._endpoints[policy.name]
+        state.active -= 1
+        self._active -= self._weight(policy)
+        if service_seconds > 0:
+            state.service_seconds += self.EWMA_WEIGHT * (service_seconds - state.service_seconds)
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "active_connections": self._active,
+            "queued": sum(len(w) for w in self._waiters.values()),
+            "endpoints": {
+                name: {
+                    "lane": state.policy.lane.name.lower(),
+                    "active": state.active,
+                    "queued": state.queued,
+                    "admitted": state.admitted,
+                    "rejected": state.rejected,
+                    "wait_seconds_avg": state.wait_seconds_total / state.admitted if state.admitted else 0.0,
+                    "wait_seconds_p95": _percentile(state.recent_waits, 0.95),
+                    "wait_seconds_max": state.wait_seconds_max,
+                    "service_seconds_avg": state.service_seconds,
+                }
+                for name, state in self._endpoints.items()
+            },
+        }
+
+    def _state(self, policy: EndpointPolicy) -> _EndpointState:
+        state = self._endpoints.get(policy.name)
+        if state is None:
+            state = _EndpointState(policy)
+            self._endpoints[policy.name] = state
+        return state
+
+    def _weight(self, policy: EndpointPolicy) -> int:
+        # Nooit meer dan de hele capaciteit, anders komt zo'n request er nooit in
+        return min(policy.connections, self.capacity)
+
+    def _fits(self, state: _EndpointState) -> bool:
+        return self._active + self._weight(state.policy) <= self.capacity
+
+    def _can_run(self, state: _EndpointState) -> bool:
+        return self._fits(state) and state.active < state.policy.max_concurrent
+
+    def _grant(self, state: _EndpointState) -> None:
+        state.active += 1
+        state.admitted += 1
+        self._active += self._weight(state.policy)
+
+    def _dispatch(self) -> None:
+        """Vrijgekomen plekken toewijzen, hoogste lane eerst"""
+        for lane in Lane:
+            waiters = self._waiters[lane]
+            for waiter in list(waiters):
+                state, future = waiter
+                if not self._fits(state):
+                    # Niet kleinere requests uit lagere lanes laten voorgaan (geen uithongering)
+                    return
+                if state.active >= state.policy.max_concurrent:
+                    continue
+                waiters.remove(waiter)
+                state.queued -= 1
+                self._grant(state)
+                future.set_result(None)
+
+    def _estimate_wait(self, state: _EndpointState) -> float:
+        """Wachtenden vóór ons, gedeeld door de parallelle plekken, maal de bedieningstijd"""
+        ahead = sum(len(self._waiters[lane]) for lane in Lane if lane <= state.policy.lane) + 1
+        slots = max(1, min(self.capacity // self._weight(state.policy), state.policy.max_concurrent))
+        return ahead / slots * state.service_seconds
+
+    def _record_wait(self, state: _EndpointState, waited: float) -> None:
+        state.wait_seconds_total += waited
+        state.wait_seconds_max = max(state.wait_seconds_max, waited)
+        state.recent_waits.append(waited)
+
+    def _reject(self, state: _EndpointState) -> None:
+        state.rejected += 1
+
+
+def _percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def overloaded_response(error: Overloaded) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": error.reason},
+        headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+    )
+
+
+# ============================================
+# ACQUIRE MET TIMEOUT
+# ============================================
+
+class PoolTimeout(Overloaded, asyncio.TimeoutError):
+    """
+    Geen poolverbinding binnen de timeout; een Overloaded (dus 503 + Retry-After),
+    maar ook een asyncio.TimeoutError voor code die daar al op afvangt
+    """
+
+
+class _BoundedAcquire:
+    __slots__ = ("_pool", "_timeout", "_context")
+
+    def __init__(self, pool, timeout: float):
+        self._pool = pool
+        self._timeout = timeout
+        self._context = None
+
+    async def __aenter__(self):
+        self._context = self._pool.acquire(timeout=self._timeout)
+        try:
+            return await self._context.__aenter__()
+        except asyncio.TimeoutError:
+            raise PoolTimeout(
+                f"Geen databaseverbinding beschikbaar binnen {self._timeout:.1f}s", self._timeout
+            ) from None
+
+    async def __aexit__(self, *exc):
+        return await self._context.__aexit__(*exc)
+
+
+class AcquireTimeoutPool:
+    """
+    Dunne laag om een (eventueel geïnstrumenteerde) pool: iedere acquire() krijgt een
+    timeout, ook waar de aanroeper er geen meegeeft; de rest gaat door
+    """
+
+    def __init__(self, pool, timeout: float):
+        self._pool = pool
+        self.timeout = timeout
+
+    def acquire(self, *, timeout: Optional[float] = None) -> _BoundedAcquire:
+        return _BoundedAcquire(self._pool, timeout if timeout is not None else self.timeout)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._pool, attr)
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware: houdt de plek vast tot de response volledig verstuurd is
+    (ook bij streaming responses zoals de NDJSON export van /search)
+
+    policy_for(method, path) bepaalt de policy; None = geen toelatingscontrole.
+    Clients kunnen met de header X-Request-Timeout (seconden) een kortere deadline meegeven.
+    """
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        policy_for: Callable[[str, str], Optional[EndpointPolicy]]
+    ):
+        self.app = app
+        self.controller = controller
+        self.policy_for = policy_for
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        policy = self.policy_for(scope["method"], scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(policy, _deadline(scope["headers"]))
+        except Overloaded as e:
+            await overloaded_response(e)(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(policy, time.monotonic() - started)
+
+
+def _deadline(headers: List[Tuple[bytes, bytes]]) -> Optional[float]:
+    for name, value in headers:
+        if name == b"x-request-timeout":
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return None
+    return None
@@ -0,0 +1,159 @@
+"""
+Incrementeel bijgehouden app-gebruik voor context-aware aanbevelingen
+Vervangt de LEFT JOIN + GROUP BY over user_app_usage per contextrequest
+"""
+
+import asyncio
+import heapq
+import logging
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from asyncpg.pool import Pool
+
+logger = logging.getLogger(__name__)
+
+
+class AppUsageIndex:
+    """
+    Per gebruiker een array met gebruikstellingen, geïndexeerd op app-ordinaal
+
+    Apps krijgen bij het laden een vast volgnummer; per domain type staat een
+    relevantievector klaar. Een top-5 is daarmee één scan over alle apps, zonder SQL.
+    Tellers worden bijgewerkt via NOTIFY app_usage_changed (trigger op user_app_usage),
+    ook voor gebruik dat door andere workers is geregistreerd.
+
+    Tijdens het (her)laden worden delta's gebufferd; daarna worden alleen de delta's
+    toegepast van transacties die niet in de snapshot van het laden zaten. Zo gaat
+    gebruik dat tijdens een herlaadronde binnenkomt niet verloren en telt het niet dubbel.
+    """
+
+    CHANNEL = "app_usage_changed"
+    DOMAIN_RELEVANCE = 10
+
+    def __init__(self):
+        self._apps: List[Dict[str, Any]] = []
+        self._ordinal: Dict[str, int] = {}
+        self._relevance: Dict[Optional[str], array] = {}
+        self._usage: Dict[str, array] = {}
+        self._pool: Optional[Pool] = None
+        self._pending: set = set()
+        self._lock = asyncio.Lock()
+        # (txid, user_id, app_id, delta) die binnenkomen terwijl load() loopt
+        self._buffer: Optional[List[Tuple[int, str, str, int]]] = None
+
+    async def load(self, pool: Pool) -> None:
+        self._pool = pool
+        async with self._lock:
+            self._buffer = []
+            try:
+                await self._load(pool)
+            finally:
+                self._buffer = None
+
+    async def _load(self, pool: Pool) -> None:
+        async with pool.acquire() as conn:
+            # Eén snapshot voor alle queries; de eerste query legt hem vast
+            async with conn.transaction(isolation="repeatable_read", readonly=True):
+                xmax, in_progress = await conn.fetchrow("""
+                    SELECT txid_snapshot_xmax(s), ARRAY(SELECT txid_snapshot_xip(s))
+                    FROM txid_current_snapshot() s
+                """)
+                apps = await conn.fetch("""
+                    SELECT * FROM apps WHERE active = true ORDER BY name
+                """)
+                usage = await conn.fetch("""
+                    SELECT user_id, app_id, SUM(usage_count) as usage_count
+                    FROM user_app_usage
+                    GROUP BY user_id, app_id
+                """)
+
+        self._apps = [dict(a) for a in apps]
+        self._ordinal = {str(a['id']): i for i, a in enumerate(self._apps)}
+        self._relevance = {}
+        self._usage = {}
+        for row in usage:
+            self._add(str(row['user_id']), str(row['app_id']), row['usage_count'])
+
+        # Alleen delta's van transacties die de snapshot niet zag (nog bezig of later gestart)
+        in_progress = set(in_progress)
+        for txid, user_id, app_id, delta in self._buffer:
+            if txid >= xmax or txid in in_progress:
+                self._add(user_id, app_id, delta)
+
+    def recommend(
+        self, user_id: Any, domain_type: Optional[str], limit: int = 5
+    ) -> List[Tuple[Dict[str, Any], int, int]]:
+        """
+        Top apps voor gebruiker binnen een domain type
+        Zelfde volgorde als voorheen in SQL: domain_relevance DESC, usage_count DESC
+        Geeft (app, domain_relevance, usage_count) tuples terug
+        """
+        relevance = self._relevance_vector(domain_type)
+        usage = self._usage.get(str(user_id))
+
+        if usage is None:
+            best = heapq.nlargest(limit, range(len(self._apps)), key=lambda i: relevance[i])
+            return [(self._apps[i], relevance[i], 0) for i in best]
+
+        best = heapq.nlargest(
+            limit, range(len(self._apps)), key=lambda i: (relevance[i], usage[i])
+        )
+        return [(self._apps[i], relevance[i], usage[i]) for i in best]
+
+    def recommendation_key(self, user_id: Any, domain_type: Optional[str]) -> str:
+        """
+        Inhoud van de top-5 voor gebruiker en domain type, voor ETags
+        Afgeleid van de aanbevelingen zelf (apprijen en tellingen), niet van een teller in
+        dit proces: workers met dezelfde stand geven dezelfde sleutel, met een andere stand
+        (bijv. een notificatie die nog niet verwerkt is) een andere
+        """
+        return repr(self.recommend(user_id, domain_type))
+
+    def on_notify(self, connection, pid, channel, payload: str) -> None:
+        """
+        asyncpg listener callback
+        Payload 'txid:user_id:app_id:delta' voor gebruik, leeg voor gewijzigde apps (herladen)
+        """
+        if payload:
+            txid, user_id, app_id, delta = payload.split(":")
+            if self._buffer is not None:
+                self._buffer.append((int(txid), user_id, app_id, int(delta)))
+            else:
+                self._add(user_id, app_id, int(delta))
+            return
+
+        task = asyncio.get_running_loop().create_task(self._reload())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def stats(self) -> Dict[str, int]:
+        return {"apps": len(self._apps), "users": len(self._usage)}
+
+    def _add(self, user_id: str, app_id: str, delta: int) -> None:
+        ordinal = self._ordinal.get(app_id)
+        if ordinal is None:
+            return  # Inactieve of onbekende app
+
+        usage = self._usage.get(user_id)
+        if usage is None:
+            usage = array("q", bytes(8 * len(self._apps)))
+            self._usage[user_id] = usage
+        usage[ordinal] += delta
+
+    def _relevance_vector(self, domain_type: Optional[str]) -> array:
+        vector = self._relevance.get(domain_type)
+        if vector is None:
+            vector = array("b", (
+                self.DOMAIN_RELEVANCE
+                if domain_type in (app['relevant_for_domain_types'] or []) else 0
+                for app in self._apps
+            ))
+            self._relevance[domain_type] = vector
+        return vector
+
+    async def _reload(self) -> None:
+        try:
+            await self.load(self._pool)
+        except Exception:
+            logger.exception("Herladen van app-gebruik mislukt")
@@ -0,0 +1,167 @@
+"""
+Onderhoud van de maandpartities van audit_log
+Maakt partities vooruit aan en archiveert partities ouder dan de bewaartermijn:
+DETACH, export via COPY naar een gzip-gecomprimeerd CSV-bestand op lokale schijf, DROP.
+Meerdere workers kunnen dit draaien; een advisory lock zorgt dat er één tegelijk werkt.
+"""
+
+import asyncio
+import gzip
+import logging
+import os
+import re
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from asyncpg.pool import Pool
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"^audit_log_y(\d{4})m(\d{2})$")
+
+
+def partition_month(name: str) -> Optional[date]:
+    """audit_log_y2025m03 → date(2025, 3, 1); None voor andere tabellen"""
+    match = PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def months_before(day: date, months: int) -> date:
+    """Eerste dag van de maand, `months` maanden vóór de maand van `day`"""
+    index = day.year * 12 + day.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class AuditPartitionManager:
+    """
+    Periodiek onderhoud:
+    - ensure_audit_partitions(huidige maand, months_ahead)
+    - partities waarvan de hele maand vóór de bewaartermijn valt worden gearchiveerd
+      naar <archive_dir>/audit_log_yYYYYmMM.csv.gz (retention_months=0: nooit archiveren)
+    """
+
+    # Willekeurige, vaste sleutel voor pg_try_advisory_lock
+    LOCK_KEY = 0x10A0D17
+
+    def __init__(
+        self,
+        archive_dir: str,
+        retention_months: int = 0,
+        months_ahead: int = 3,
+        interval: float = 3600.0
+    ):
+        self.archive_dir = archive_dir
+        self.retention_months = retention_months
+        self.months_ahead = months_ahead
+        self.interval = interval
+        self._pool: Optional[Pool] = None
+        self._task: Optional[asyncio.Task] = None
+        self._created = 0
+        self._archived: List[str] = []
+        self._last_run: Optional[datetime] = None
+        self._last_error: Optional[str] = None
+
+    async def start(self, pool: Pool) -> None:
+        self._pool = pool
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self._last_error = str(e)
+                logger.exception("Onderhoud audit_log partities mislukt")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """Eén onderhoudsronde; slaat over als een andere worker de lock heeft"""
+        today = today or date.today()
+        async with self._pool.acquire() as conn:
+            if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", self.LOCK_KEY):
+                return {"skipped": True}
+            try:
+                created = await conn.fetchval(
+                    "SELECT ensure_audit_partitions($1, $2)", today, self.months_ahead
+                )
+                self._created += created
+                archived = []
+                if self.retention_months > 0:
+                    cutoff = months_before(today, self.retention_months)
+                    for name in await self._expired_partitions(conn, cutoff):
+                        archived.append(await self._archive(conn, name))
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", self.LOCK_KEY)
+
+        self._last_run = datetime.now()
+        self._last_error = None
+        return {"created": created, "archived": archived}
+
+    async def _expired_partitions(self, conn, cutoff: date) -> List[str]:
+        """
+        Maandtabellen (gekoppeld of al losgekoppeld door een eerder afgebroken ronde)
+        waarvan de maand vóór `cutoff` ligt, oudste eerst
+        """
+        rows = await conn.fetch("""
+            SELECT c.relname
+            FROM pg_class c
+            WHERE c.relkind = 'r'
+            AND c.relname ~ '^audit_log_y[0-9]{4}m[0-9]{2}$'
+            AND pg_table_is_visible(c.oid)
+        """)
+        names = [row["relname"] for row in rows if partition_month(row["relname"]) < cutoff]
+        return sorted(names)
+
+    async def _archive(self, conn, name: str) -> str:
+        """DETACH → COPY naar .csv.gz (eerst .tmp, dan rename) → DROP"""
+        # name is gevalideerd tegen PARTITION_NAME, dus veilig als identifier
+        attached = await conn.fetchval("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_inherits
+                WHERE inhrelid = $1::regclass AND inhparent = 'audit_log'::regclass
+            )
+        """, name)
+        if attached:
+            # Geen DETACH CONCURRENTLY: dat kan niet zolang er een default partitie is
+            await conn.execute(f"ALTER TABLE audit_log DETACH PARTITION {name}")
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"{name}.csv.gz")
+        tmp_path = path + ".tmp"
+        expected = await conn.fetchval(f"SELECT count(*) FROM {name}")
+
+        with gzip.open(tmp_path, "wb") as f:
+            async def sink(chunk: bytes) -> None:
+                await asyncio.to_thread(f.write, chunk)
+
+            status = await conn.copy_from_table(name, output=sink, format="csv", header=True)
+
+        written = int(status.split()[-1])
+        if written != expected:
+            os.remove(tmp_path)
+            raise RuntimeError(f"{name}: {written} van {expected} rijen geëxporteerd")
+
+        os.replace(tmp_path, path)
+        await conn.execute(f"DROP TABLE {name}")
+        self._archived.append(name)
+        logger.info("audit_log partitie %s gearchiveerd naar %s (%d rijen)", name, path, written)
+        return path
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retention_months": self.retention_months,
+            "partitions_created": self._created,
+            "archived": list(self._archived),
+            "last_run": self._last_run.isoformat() if self._last_run else None,
+            "last_error": self._last_error,
+        }
@@ -0,0 +1,223 @@
+"""
+Gebufferde audit trail
+Audit events worden in het geheugen verzameld en in batches via COPY weggeschreven,
+zodat leesrequests geen schrijflatency van audit_log meer betalen
+"""
+
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from asyncpg.pool import Pool
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """
+    Audit sink met twee durability modes:
+    - 'async': events gaan naar een begrensde wachtrij en worden per batch
+      (grootte- of tijdsdrempel) met COPY naar audit_log geschreven
+    - 'sync':  ieder event wordt direct binnen het request weggeschreven
+
+    Is de wachtrij vol, dan schrijft het request zelf synchroon (backpressure)
+    in plaats van audit events te laten vallen.
+
+    Mislukt een batch (database weg), dan volgen max_retries pogingen met exponentiële
+    backoff; daarna gaat de batch naar een begrensde retrybuffer (max_retry_events) die
+    vóór nieuwe events opnieuw wordt geprobeerd. Alleen wat daar niet meer in past gaat
+    verloren; dat telt `dropped` (ook op /metrics).
+    """
+
+    COLUMNS = ("user_id", "action", "object_type", "object_id", "domain_id", "timestamp")
+
+    def __init__(
+        self,
+        mode: str = "async",
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        max_retry_events: Optional[int] = None
+    ):
+        if mode not in ("async", "sync"):
+            raise ValueError(f"Onbekende audit mode: {mode}")
+
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._retry: Deque[Tuple] = deque()
+        self.max_retry_events = max_queue_size if max_retry_events is None else max_retry_events
+        self._pool: Optional[Pool] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.written = 0
+        self.write_errors = 0
+        self.dropped = 0
+
+    async def start(self, pool: Pool) -> None:
+        self._pool = pool
+        if self.mode == "async" and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop de flush-loop en schrijf alle resterende events weg"""
+        self._stopping = True
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+        # Eén ronde: wat nu nog mislukt kan nergens meer heen
+        while self._retry or not self._queue.empty():
+            batch = self._take_batch()
+            if not await self._flush(batch, requeue=False):
+                self._drop(len(batch) + len(self._retry) + self._queue.qsize())
+                self._retry.clear()
+                while not self._queue.empty():
+                    self._queue.get_nowait()
+
+    async def log(
+        self,
+        user_id: Any,
+        action: str,
+        object_type: str,
+        object_id: Any,
+        domain_id: Any,
+        conn=None
+    ) -> None:
+        record = (user_id, action, object_type, object_id, domain_id, datetime.now())
+
+        if self.mode == "async":
+            try:
+                self._queue.put_nowait(record)
+                return
+            except asyncio.QueueFull:
+                logger.warning("Audit wachtrij vol, synchroon wegschrijven")
+
+        if conn is not None:
+            await self._write(conn, [record])
+        else:
+            async with self._pool.acquire() as conn:
+                await self._write(conn, [record])
+
+    async def log_many(self, events: List[Tuple], conn=None) -> None:
+        """
+        Log een reeks events (user_id, action, object_type, object_id, domain_id)
+        In async mode gaan ze in de wachtrij, anders in één COPY naar audit_log
+        """
+        now = datetime.now()
+        records = [(*event, now) for event in events]
+
+        if self.mode == "async":
+            try:
+                for i, record in enumerate(records):
+                    self._queue.put_nowait(record)
+                return
+            except asyncio.QueueFull:
+                logger.warning("Audit wachtrij vol, synchroon wegschrijven")
+                records = records[i:]
+
+        if conn is not None:
+            await self._write(conn, records)
+        else:
+            async with self._pool.acquire() as conn:
+                await self._write(conn, records)
+
+    async def write_many(self, conn, events: List[Tuple]) -> None:
+        """
+        Schrijf een reeks events direct via COPY op de meegegeven verbinding,
+        binnen de lopende transactie (ongeacht mode). Bedoeld voor bulk operaties
+        die zelf al een schrijftransactie hebben.
+        """
+        now = datetime.now()
+        await self._write(conn, [(*event, now) for event in events])
+
+    def pending(self) -> int:
+        return self._queue.qsize() + len(self._retry)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "retrying": len(self._retry),
+            "written": self.written,
+            "write_errors": self.write_errors,
+            "dropped": self.dropped,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            if self._retry:
+                # Eerder mislukte events eerst, in hun oorspronkelijke volgorde
+                await self._flush(self._take_batch())
+                continue
+
+            # Verzamel tot batch_size events of tot flush_interval verstreken is
+            batch = []
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size and not self._stopping:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._flush(batch)
+
+    def _take_batch(self) -> List[Tuple]:
+        batch = []
+        while len(batch) < self.batch_size and self._retry:
+            batch.append(self._retry.popleft())
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _flush(self, batch: List[Tuple], requeue: bool = True) -> bool:
+        """Schrijf een batch weg met retries; False als dat uiteindelijk niet lukte"""
+        if not batch:
+            return True
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(min(self.retry_backoff * 2 ** (attempt - 1), 30.0))
+            try:
+                async with self._pool.acquire() as conn:
+                    await self._write(conn, batch)
+                self.written += len(batch)
+                return True
+            except Exception as e:
+                self.write_errors += 1
+                logger.warning(
+                    "Wegschrijven van %d audit events mislukt (poging %d/%d): %s",
+                    len(batch), attempt + 1, self.max_retries + 1, e
+                )
+
+        if requeue:
+            # Vooraan terug, begrensd: bij overloop vallen de oudste events af
+            room = max(0, self.max_retry_events - len(self._retry))
+            self._retry.extendleft(reversed(batch[-room:] if room else []))
+            self._drop(len(batch) - min(room, len(batch)))
+        return False
+
+    def _drop(self, count: int) -> None:
+        if count > 0:
+            self.dropped += count
+            logger.error("%d audit events verloren (totaal %d)", count, self.dropped)
+
+    async def _write(self, conn, records: List[Tuple]) -> None:
+        if len(records) == 1:
+            await conn.execute("""
+                INSERT INTO audit_log (user_id, action, object_type, object_id, domain_id, timestamp)
+                VALUES ($1, $2, $3, $4, $5, $6)
+            """, *records[0])
+        else:
+            await conn.copy_records_to_table(
+                "audit_log", records=records, columns=self.COLUMNS
+            )
@@ -0,0 +1,115 @@
+"""
+Streaming parser voor bulk ingest van informatieobjecten
+Leest NDJSON of een JSON array incrementeel uit de request body,
+zodat een volledig zaakarchief niet in één keer in het geheugen hoeft
+"""
+
+import codecs
+import json
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+# (document, foutmelding) - precies één van beide is gevuld
+ParsedRow = Tuple[Optional[Any], Optional[str]]
+
+
+class BulkParseError(ValueError):
+    """Body is geen geldige JSON array of NDJSON stream"""
+
+
+async def iter_documents(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    """
+    Parse een byte stream als JSON array ('[{...}, {...}]') of NDJSON (één object per regel)
+    De vorm wordt bepaald aan de hand van het eerste niet-witruimte teken.
+
+    NDJSON: een ongeldige regel levert een foutmelding voor die rij op,
+    de rest van de stream wordt gewoon verwerkt.
+    JSON array: een syntaxfout maakt de rest onleesbaar en geeft BulkParseError.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    mode = None
+    done = False
+
+    async for chunk in chunks:
+        buffer += text.decode(chunk)
+
+        if mode is None:
+            stripped = buffer.lstrip()
+            if not stripped:
+                continue
+            if stripped[0] == "[":
+                mode = "array"
+                buffer = stripped[1:]
+            else:
+                mode = "ndjson"
+
+        if mode == "ndjson":
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                if line.strip():
+                    yield _parse_line(line)
+        elif not done:
+            rows, buffer, done = _drain_array(decoder, buffer, final=False)
+            for row in rows:
+                yield (row, None)
+
+    buffer += text.decode(b"", final=True)
+
+    if mode == "ndjson":
+        if buffer.strip():
+            yield _parse_line(buffer)
+    elif mode == "array" and not done:
+        rows, buffer, done = _drain_array(decoder, buffer, final=True)
+        for row in rows:
+            yield (row, None)
+        if not done:
+            raise BulkParseError("JSON array niet afgesloten met ']'")
+
+
+def _parse_line(line: str) -> ParsedRow:
+    try:
+        return (json.loads(line), None)
+    except json.JSONDecodeError as e:
+        return (None, f"Ongeldige JSON: {e.msg}")
+
+
+def _drain_array(decoder: json.JSONDecoder, buffer: str, final: bool) -> Tuple[List[Any], str, bool]:
+    """Haal alle complete elementen uit de buffer; geeft (rijen, rest, klaar) terug"""
+    rows = []
+    pos = 0
+    length = len(buffer)
+
+    while True:
+        while pos < length and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= length:
+            return rows, "", False
+        if buffer[pos] == "]":
+            return rows, "", True
+
+        try:
+            row, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if final:
+                raise BulkParseError(f"Ongeldige JSON op positie {e.pos}: {e.msg}")
+            # Element nog niet compleet: wacht op de volgende chunk
+            return rows, buffer[pos:], False
+
+        # Een getal aan het einde van de buffer kan nog doorlopen in de volgende chunk
+        if end == length and not final and not isinstance(row, (dict, list)):
+            return rows, buffer[pos:], False
+
+        rows.append(row)
+        pos = end
+
+
+async def chunked(rows: AsyncIterator[ParsedRow], size: int) -> AsyncIterator[List[ParsedRow]]:
+    chunk: List[ParsedRow] = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
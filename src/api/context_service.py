@@ -3,15 +3,49 @@ Context-Aware API Service
 Implementatie van de Organisatorische Context API volgens IOU-principes
 """
 
-from fastapi import FastAPI, Depends, HTTPException, Security
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Security
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, UUID4
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, UUID4, ValidationError
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
 from enum import Enum
+import asyncio
+import base64
+import functools
+import json
+import logging
+import os
+import uuid
 import asyncpg
 from asyncpg.pool import Pool
 
+from src.api.access_index import DomainAccessIndex
+from src.api.admission import (
+    AcquireTimeoutPool, AdmissionController, AdmissionMiddleware, EndpointPolicy, Lane, Overloaded,
+    overloaded_response
+)
+from src.api.app_usage import AppUsageIndex
+from src.api.audit_partitions import AuditPartitionManager
+from src.api.audit_writer import AuditWriter
+from src.api.bulk_ingest import BulkParseError, chunked, iter_documents
+from src.api.context_stream import ContextChangeHub
+from src.api.db_routing import (
+    CONNECTION_ERRORS, DatabaseRouter, ReadYourWritesMiddleware, parse_replica_hosts
+)
+from src.api.instrumentation import MetricsMiddleware, metrics, serialization_timer
+from src.api.instrumentation import create_pool as create_instrumented_pool
+from src.api.principal_cache import PrincipalCache
+from src.api.response_cache import (
+    ResponseCache, content_etag, etag_matches, make_etag, permission_fingerprint
+)
+from src.api import statements
+from src.api.serialization import FastJSONResponse, dumps, project, project_all
+from src.services.ai_metadata_service import AIMetadataService
+from src.services.rule_engine import RuleEngine
+
 app = FastAPI(
     title="IOU Context Service",
     description="Context-aware API voor Informatie Ondersteunde Werkomgeving",
@@ -20,6 +54,8 @@ app = FastAPI(
 
 security = HTTPBearer()
 
+logger = logging.getLogger(__name__)
+
 # ============================================
 # MODELS (Pydantic)
 # ============================================
@@ -43,6 +79,14 @@ class Classification(str, Enum):
     VERTROUWELIJK = "vertrouwelijk"
     GEHEIM = "geheim"
 
+class SearchView(str, Enum):
+    FULL = "full"        # volledige rijen
+    COMPACT = "compact"  # alleen id, titel en snippet
+
+class ResultFormat(str, Enum):
+    JSON = "json"
+    NDJSON = "ndjson"    # streaming export, zonder paginalimiet
+
 class InformationDomain(BaseModel):
     id: Optional[UUID4] = None
     type: DomainType
@@ -102,16 +146,50 @@ class AppRecommendation(BaseModel):
     relevance_score: float
     reason: str
 
+class ContextSection(str, Enum):
+    RELATED_DOMAINS = "related_domains"
+    RECENT_OBJECTS = "recent_objects"
+    RECOMMENDED_APPS = "recommended_apps"
+    STAKEHOLDERS = "stakeholders"
+    USER_PERMISSIONS = "user_permissions"
+
+ALL_CONTEXT_SECTIONS = frozenset(ContextSection)
+
 class ContextResponse(BaseModel):
     """
     Centrale response die volledige context voor gebruiker bevat
+    Met include=... worden alleen de gevraagde onderdelen opgehaald en
+    teruggegeven; current_domain zit er altijd in
     """
     current_domain: InformationDomain
-    related_domains: List[InformationDomain]
-    recent_objects: List[InformationObject]
-    recommended_apps: List[AppRecommendation]
-    stakeholders: List[Dict[str, Any]]
-    user_permissions: Dict[str, bool]
+    related_domains: Optional[List[InformationDomain]] = None
+    recent_objects: Optional[List[InformationObject]] = None
+    recommended_apps: Optional[List[AppRecommendation]] = None
+    stakeholders: Optional[List[Dict[str, Any]]] = None
+    user_permissions: Optional[Dict[str, bool]] = None
+
+class BulkRowResult(BaseModel):
+    index: int
+    status: str  # 'created' of 'rejected'
+    id: Optional[UUID4] = None
+    errors: List[str] = []
+
+class BulkIngestResponse(BaseModel):
+    created: int
+    rejected: int
+    results: List[BulkRowResult]
+
+class BatchContextRequest(BaseModel):
+    domain_ids: List[UUID4]
+    include: Optional[List[ContextSection]] = None  # None = alle onderdelen
+
+class BatchContextResponse(BaseModel):
+    """
+    Context per domein-id; domeinen die niet bestaan of niet toegankelijk zijn
+    staan in errors met hun HTTP-status (404/403)
+    """
+    contexts: Dict[str, ContextResponse]
+    errors: Dict[str, Dict[str, Any]]
 
 # ============================================
 # DATABASE CONNECTION
@@ -119,25 +197,276 @@ class ContextResponse(BaseModel):
 
 db_pool: Optional[Pool] = None
 
+# Aparte verbinding (buiten de pool) voor LISTEN/NOTIFY invalidaties
+db_listener: Optional[asyncpg.Connection] = None
+db_listener_task: Optional[asyncio.Task] = None
+
+DB_SETTINGS = {
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": int(os.getenv("DB_PORT", "5432")),
+    "database": os.getenv("DB_NAME", "iou_context"),
+    "user": os.getenv("DB_USER", "iou_user"),
+    "password": os.getenv("DB_PASSWORD", "iou_password"),
+}
+
+# Histograms per request, query en pool-acquire op GET /metrics (INSTRUMENTATION=off om uit te zetten)
+INSTRUMENTATION = os.getenv("INSTRUMENTATION", "on") == "on"
+
+# Queries boven deze drempel worden gelogd; leeg = geen slow query log
+if os.getenv("SLOW_QUERY_MS"):
+    metrics.slow_query_seconds = float(os.getenv("SLOW_QUERY_MS")) / 1000
+
+# Geregistreerde statements voorbereiden op iedere nieuwe poolverbinding (init-hook)
+PREPARE_STATEMENTS = os.getenv("PREPARE_STATEMENTS", "on") == "on"
+
+# Maximale wachttijd op een poolverbinding; daarna 503 met Retry-After
+DB_POOL_ACQUIRE_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT_SECONDS", "5"))
+
+# Controle-interval van de listener-verbinding; bij uitval herverbinden en caches verversen
+DB_LISTENER_HEALTH_INTERVAL_SECONDS = float(os.getenv("DB_LISTENER_HEALTH_INTERVAL_SECONDS", "5"))
+
+def pool_factory(name: str):
+    """
+    create_pool voor primary of replica, met instrumentatie en statement warm-up volgens
+    configuratie; acquire() heeft altijd een timeout
+    """
+    # InstrumentedConnection is zelf een PreparedConnection
+    create_pool = (
+        functools.partial(create_instrumented_pool, name)
+        if INSTRUMENTATION else
+        functools.partial(asyncpg.create_pool, connection_class=statements.PreparedConnection)
+    )
+    if PREPARE_STATEMENTS:
+        create_pool = functools.partial(create_pool, init=statements.prepare_statements)
+
+    async def create(**kwargs):
+        return AcquireTimeoutPool(await create_pool(**kwargs), DB_POOL_ACQUIRE_TIMEOUT_SECONDS)
+    return create
+
+# Read replicas als 'host:poort,host:poort'; leeg = alles via de primary
+db_router = DatabaseRouter(
+    DB_SETTINGS,
+    parse_replica_hosts(os.getenv("DB_REPLICA_HOSTS", ""), DB_SETTINGS["port"]),
+    pool_min_size=int(os.getenv("DB_REPLICA_POOL_MIN_SIZE", "2")),
+    pool_max_size=int(os.getenv("DB_REPLICA_POOL_MAX_SIZE", "20")),
+    sticky_seconds=float(os.getenv("READ_YOUR_WRITES_SECONDS", "30")),
+    health_interval=float(os.getenv("DB_REPLICA_HEALTH_INTERVAL_SECONDS", "5")),
+    max_lag_seconds=float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "10")),
+    create_pool=pool_factory("replica")
+)
+
+# 'concurrent': onafhankelijke lookups parallel op aparte pool-verbindingen
+# 'sequential': alle lookups na elkaar op één verbinding
+CONTEXT_ASSEMBLY_MODE = os.getenv("CONTEXT_ASSEMBLY_MODE", "concurrent")
+
+# Maximaal aantal poolverbindingen dat één contextrequest tegelijk vasthoudt (fan-out);
+# de toelatingscontrole rekent per contextrequest met dit aantal
+CONTEXT_MAX_CONNECTIONS = int(os.getenv("CONTEXT_MAX_CONNECTIONS", "3"))
+CONTEXT_CONNECTIONS = CONTEXT_MAX_CONNECTIONS if CONTEXT_ASSEMBLY_MODE == "concurrent" else 1
+
+# 'fast': records direct via orjson naar JSON (geen Pydantic hervalidatie)
+# 'validated': responses via Pydantic modellen en response_model validatie
+JSON_RESPONSE_MODE = os.getenv("JSON_RESPONSE_MODE", "fast")
+
+# Maximaal aantal domeinen per POST /context:batch
+CONTEXT_BATCH_MAX_DOMAINS = int(os.getenv("CONTEXT_BATCH_MAX_DOMAINS", "100"))
+
+# Maximale paginagrootte van /search (format=json)
+SEARCH_MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", "200"))
+
+# Aantal rijen per validatie- en schrijfbatch bij POST /objects/bulk
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+
+principal_cache = PrincipalCache(
+    max_size=int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000")),
+    ttl_seconds=float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+)
+
+access_index = DomainAccessIndex()
+
+# App-gebruik per gebruiker in het geheugen, bijgewerkt via NOTIFY app_usage_changed
+app_usage_index = AppUsageIndex()
+
+# Gerenderde contextresponses per (domein, permissie-fingerprint, versie); 0 = uit
+response_cache = ResponseCache(
+    max_size=int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "5000"))
+)
+
+# Push van contextwijzigingen (GET /context:stream) via NOTIFY context_changed
+context_hub = ContextChangeHub(
+    max_subscribers=int(os.getenv("CONTEXT_STREAM_MAX_SUBSCRIBERS", "10000")),
+    max_queue=int(os.getenv("CONTEXT_STREAM_QUEUE_SIZE", "100"))
+)
+CONTEXT_STREAM_HEARTBEAT_SECONDS = float(os.getenv("CONTEXT_STREAM_HEARTBEAT_SECONDS", "15"))
+
+# Gecompileerde regelset, herladen via NOTIFY business_rules_changed
+rule_engine = RuleEngine()
+
+# Metadata-extractie; opgeslagen objecten tellen mee in de corpus stats voor tags
+metadata_service = AIMetadataService()
+
+# AUDIT_MODE=sync voor deployments die synchrone audit trail vereisen
+audit_writer = AuditWriter(
+    mode=os.getenv("AUDIT_MODE", "async"),
+    max_queue_size=int(os.getenv("AUDIT_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("AUDIT_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1.0")),
+    max_retries=int(os.getenv("AUDIT_MAX_RETRIES", "3"))
+)
+metrics.counter(
+    "iou_audit_events_dropped_total", "Audit events die na alle retries niet zijn weggeschreven",
+    lambda: audit_writer.dropped
+)
+metrics.counter(
+    "iou_audit_write_errors_total", "Mislukte schrijfpogingen van audit batches",
+    lambda: audit_writer.write_errors
+)
+
+# Maandpartities van audit_log: vooruit aanmaken, na de bewaartermijn archiveren (0 = nooit)
+audit_partitions = AuditPartitionManager(
+    archive_dir=os.getenv("AUDIT_ARCHIVE_DIR", "archive/audit_log"),
+    retention_months=int(os.getenv("AUDIT_RETENTION_MONTHS", "0")),
+    months_ahead=int(os.getenv("AUDIT_PARTITION_MONTHS_AHEAD", "3")),
+    interval=float(os.getenv("AUDIT_MAINTENANCE_INTERVAL_SECONDS", "3600"))
+)
+
+# Toelatingscontrole: maximaal aantal poolverbindingen tegelijk in gebruik door toegelaten
+# requests (standaard de poolgrootte); per endpoint een eigen limiet, wachtrij en maximale wachttijd
+admission = AdmissionController(
+    capacity=int(os.getenv("ADMISSION_MAX_CONNECTIONS", os.getenv("DB_POOL_MAX_SIZE", "20")))
+)
+
+ADMISSION_POLICIES = {
+    "context": EndpointPolicy.from_env("context", Lane.INTERACTIVE, 20, 100, 2.0, CONTEXT_CONNECTIONS),
+    "apps": EndpointPolicy.from_env("apps", Lane.INTERACTIVE, 10, 50, 2.0),
+    "context_batch": EndpointPolicy.from_env(
+        "context_batch", Lane.STANDARD, 8, 32, 5.0, CONTEXT_MAX_CONNECTIONS
+    ),
+    "write": EndpointPolicy.from_env("write", Lane.STANDARD, 10, 50, 5.0),
+    "search": EndpointPolicy.from_env("search", Lane.BACKGROUND, 6, 30, 5.0),
+    "bulk": EndpointPolicy.from_env("bulk", Lane.BACKGROUND, 2, 4, 30.0),
+}
+
+def admission_policy_for(method: str, path: str) -> Optional[EndpointPolicy]:
+    """Endpoint → policy; endpoints zonder databasewerk (/, stats, docs) vallen erbuiten"""
+    if method == "GET":
+        if path.startswith("/context/"):
+            return ADMISSION_POLICIES["context"]
+        if path == "/search":
+            return ADMISSION_POLICIES["search"]
+        if path == "/apps/recommended":
+            return ADMISSION_POLICIES["apps"]
+    elif method == "POST":
+        if path == "/context:batch":
+            return ADMISSION_POLICIES["context_batch"]
+        if path == "/objects/bulk":
+            return ADMISSION_POLICIES["bulk"]
+        if path in ("/domains", "/objects") or path.startswith("/apps/"):
+            return ADMISSION_POLICIES["write"]
+    return None
+
+# Binnen de toelatingscontrole: een herhaling op de primary gebruikt dezelfde plek
+app.add_middleware(ReadYourWritesMiddleware, router=db_router)
+app.add_middleware(AdmissionMiddleware, controller=admission, policy_for=admission_policy_for)
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """O.a. een verlopen pool.acquire() (PoolTimeout): zelfde 503 als de toelatingscontrole"""
+    return overloaded_response(exc)
+
+# Buitenste laag: ook geweigerde (503) requests worden gemeten
+if INSTRUMENTATION:
+    app.add_middleware(MetricsMiddleware)
+
 async def get_db_pool() -> Pool:
     global db_pool
     if db_pool is None:
-        db_pool = await asyncpg.create_pool(
-            host="localhost",
-            database="iou_context",
-            user="iou_user",
-            password="iou_password",
-            min_size=5,
-            max_size=20
+        db_pool = await pool_factory("primary")(
+            **DB_SETTINGS,
+            min_size=int(os.getenv("DB_POOL_MIN_SIZE", "5")),
+            max_size=int(os.getenv("DB_POOL_MAX_SIZE", "20"))
         )
     return db_pool
 
+async def start_db_listener() -> asyncpg.Connection:
+    """Eén listener-verbinding per worker voor alle cache-invalidaties"""
+    global db_listener
+    db_listener = await asyncpg.connect(**DB_SETTINGS)
+    await db_listener.add_listener(PrincipalCache.CHANNEL, principal_cache.on_notify)
+    await db_listener.add_listener(DomainAccessIndex.CHANNEL, access_index.on_notify)
+    await db_listener.add_listener(RuleEngine.CHANNEL, rule_engine.on_notify)
+    await db_listener.add_listener(AppUsageIndex.CHANNEL, app_usage_index.on_notify)
+    await db_listener.add_listener(ContextChangeHub.CHANNEL, context_hub.on_notify)
+    return db_listener
+
+async def resync_listener_caches(pool: Pool) -> None:
+    """
+    Notificaties tijdens een uitval van de listener zijn gemist: alles wat ervan afhangt
+    opnieuw opbouwen. Pas na het opnieuw LISTEN-en aanroepen, zodat wijzigingen tijdens
+    het herladen niet tussen wal en schip vallen.
+    """
+    principal_cache.invalidate_all()
+    context_hub.resync_all()
+    await access_index.load(pool)
+    await rule_engine.load(pool)
+    await app_usage_index.load(pool)
+
+async def watch_db_listener(pool: Pool) -> None:
+    """Controleert de listener-verbinding periodiek; herverbindt met backoff bij uitval"""
+    while True:
+        await asyncio.sleep(DB_LISTENER_HEALTH_INTERVAL_SECONDS)
+        try:
+            # Een query ontdekt ook een half-open verbinding, is_closed() niet
+            await db_listener.fetchval("SELECT 1", timeout=DB_LISTENER_HEALTH_INTERVAL_SECONDS)
+            continue
+        except (asyncio.TimeoutError, asyncpg.PostgresError, *CONNECTION_ERRORS) as e:
+            logger.warning("Listener-verbinding verloren, herverbinden: %s", e)
+        db_listener.terminate()
+
+        backoff = 1.0
+        while True:
+            try:
+                await start_db_listener()
+                await resync_listener_caches(pool)
+                logger.info("Listener-verbinding hersteld, caches ververst")
+                break
+            except (asyncio.TimeoutError, asyncpg.PostgresError, *CONNECTION_ERRORS) as e:
+                logger.warning("Herverbinden van listener mislukt (opnieuw over %.0fs): %s", backoff, e)
+                if db_listener is not None:
+                    db_listener.terminate()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
 @app.on_event("startup")
 async def startup():
-    await get_db_pool()
+    pool = await get_db_pool()
+    await db_router.start(pool)
+    await audit_writer.start(pool)
+    await audit_partitions.start(pool)
+    await access_index.load(pool)
+    await rule_engine.load(pool)
+    await app_usage_index.load(pool)
+    await metadata_service.start(pool)
+    await start_db_listener()
+    global db_listener_task
+    db_listener_task = asyncio.create_task(watch_db_listener(pool))
 
 @app.on_event("shutdown")
 async def shutdown():
+    # Eerst de audit buffer legen, daarna pas de pool sluiten
+    context_hub.close()
+    await audit_writer.stop()
+    await audit_partitions.stop()
+    await metadata_service.stop()
+    await db_router.stop()
+    if db_listener_task:
+        db_listener_task.cancel()
+        try:
+            await db_listener_task
+        except asyncio.CancelledError:
+            pass
+    if db_listener:
+        await db_listener.close()
     if db_pool:
         await db_pool.close()
 
@@ -155,30 +484,23 @@ async def get_current_user(
     """
     token = credentials.credentials
 
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+    generation = principal_cache.generation()
+
     # In productie: valideer JWT token
     # Voor demo: simpele opzoek
     async with pool.acquire() as conn:
-        user = await conn.fetchrow("""
-            SELECT u.*, d.name as department_name, o.name as organization_name
-            FROM users u
-            JOIN departments d ON u.department_id = d.id
-            JOIN organizations o ON d.organization_id = o.id
-            WHERE u.id = $1 AND u.active = true
-        """, token)
+        user = await conn.fetchrow(statements.PRINCIPAL_USER, token)
 
         if not user:
             raise HTTPException(status_code=401, detail="Invalid authentication")
 
         # Haal permissions op
-        permissions = await conn.fetch("""
-            SELECT r.name, r.permissions
-            FROM user_roles ur
-            JOIN roles r ON ur.role_id = r.id
-            WHERE ur.user_id = $1
-            AND (ur.valid_until IS NULL OR ur.valid_until > CURRENT_TIMESTAMP)
-        """, user['id'])
-
-        return {
+        permissions = await conn.fetch(statements.PRINCIPAL_PERMISSIONS, user['id'])
+
+        principal = {
             "id": user['id'],
             "name": user['name'],
             "email": user['email'],
@@ -187,6 +509,29 @@ async def get_current_user(
             "permissions": {p['name']: p['permissions'] for p in permissions}
         }
 
+    principal_cache.put(token, principal, generation)
+    return principal
+
+async def get_read_pool(
+    request: Request,
+    user: Dict = Depends(get_current_user),
+    pool: Pool = Depends(get_db_pool)
+) -> Pool:
+    """Leesverkeer: gezonde replica die de eigen write-LSN van de client al heeft, anders de primary"""
+    return db_router.read_pool(request.scope)
+
+async def get_write_pool(
+    request: Request,
+    user: Dict = Depends(get_current_user),
+    pool: Pool = Depends(get_db_pool)
+) -> Pool:
+    """
+    Schrijfverkeer: altijd de primary
+    De response krijgt de write-LSN mee voor read-your-writes (ReadYourWritesMiddleware)
+    """
+    db_router.mark_write(request.scope)
+    return pool
+
 # ============================================
 # API ENDPOINTS
 # ============================================
@@ -199,81 +544,229 @@ async def root():
         "description": "Context-aware API voor Informatie Ondersteunde Werkomgeving"
     }
 
-@app.get("/context/{domain_id}", response_model=ContextResponse)
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss tellers van de in-process caches en de lees-routering"""
+    return {
+        "principals": principal_cache.stats(),
+        "domain_access": access_index.stats(),
+        "business_rules": rule_engine.stats(),
+        "app_usage": app_usage_index.stats(),
+        "responses": response_cache.stats(),
+        "context_stream": context_hub.stats(),
+        "audit_pending": audit_writer.pending(),
+        "audit": audit_writer.stats(),
+        "audit_partitions": audit_partitions.stats(),
+        "db_routing": db_router.stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Latency histograms (requests, queries, pool-acquire, serialisatie) in Prometheus formaat"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/admission/stats")
+async def admission_stats():
+    """Toelatingscontrole per endpoint (wachttijd op een databaseplek) en poolbezetting"""
+    return {
+        **admission.stats(),
+        "pool": {
+            "size": db_pool.get_size() if db_pool else 0,
+            "idle": db_pool.get_idle_size() if db_pool else 0,
+            "max_size": db_pool.get_max_size() if db_pool else 0,
+        }
+    }
+
+@app.get(
+    "/context/{domain_id}",
+    response_model=ContextResponse,
+    response_model_exclude_unset=True
+)
 async def get_context(
     domain_id: UUID4,
+    request: Request,
+    include: Optional[str] = None,
     user: Dict = Depends(get_current_user),
-    pool: Pool = Depends(get_db_pool)
+    pool: Pool = Depends(get_read_pool)
 ):
     """
     Kernendpoint: Haalt volledige context op voor een informatiedomein
     Principe: "Alles binnen handbereik" - integraal en op maat
+
+    include: kommagescheiden onderdelen, bijv. include=recent_objects,stakeholders
+    Niet gevraagde onderdelen worden niet opgehaald en ontbreken in de response
+
+    Conditionele GET: de ETag volgt uit de domeinversie en de permissie-fingerprint
+    van de gebruiker; If-None-Match met de huidige ETag geeft 304 zonder de context op te bouwen
     """
-    async with pool.acquire() as conn:
-        # 1. Haal hoofddomein op
-        domain = await conn.fetchrow("""
-            SELECT * FROM information_domains WHERE id = $1
-        """, domain_id)
+    sections = parse_context_sections(include)
 
+    # Versie vóór de context lezen: een schrijfactie daartussen hoogt de versie op,
+    # zodat nooit oudere inhoud onder een nieuwere versie wordt gecached.
+    # Domein en autorisatie gaan mee naar de collector, die ze niet opnieuw controleert
+    async with pool.acquire() as conn:
+        domain = await fetch_domain_with_version(conn, domain_id)
         if not domain:
             raise HTTPException(status_code=404, detail="Domain not found")
-
-        # Autorisatie check
-        has_access = await check_domain_access(conn, domain_id, user['id'])
-        if not has_access:
+        if not await check_domain_access(conn, domain_id, user['id']):
             raise HTTPException(status_code=403, detail="Access denied")
+    version = domain['domain_version']
+
+    key = etag = None
+    if version is not None:
+        # Alleen met recommended_apps hangt de response van het app-gebruik af
+        usage_key = (
+            app_usage_index.recommendation_key(user['id'], domain['type'])
+            if ContextSection.RECOMMENDED_APPS in sections else ""
+        )
+        fingerprint = permission_fingerprint(user, usage_key)
+        key = (str(domain_id), fingerprint, version, sections, JSON_RESPONSE_MODE)
+        etag = make_etag(*key[:3], sorted(s.value for s in sections), JSON_RESPONSE_MODE)
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            response_cache.not_modified += 1
+            await audit_writer.log(user['id'], 'read', 'domain', domain_id, domain_id)
+            return not_modified_response(etag)
+
+        cached = response_cache.get(key)
+        if cached is not None:
+            await audit_writer.log(user['id'], 'read', 'domain', domain_id, domain_id)
+            return cacheable_response(cached[1], cached[0])
+
+    if CONTEXT_ASSEMBLY_MODE == "concurrent":
+        domain, results = await collect_context_concurrent(pool, domain_id, user, sections, domain)
+    else:
+        async with pool.acquire() as conn:
+            domain, results = await collect_context_sequential(conn, domain_id, user, sections, domain)
+
+    # Log access (audit trail)
+    await audit_writer.log(user['id'], 'read', 'domain', domain_id, domain_id)
+
+    if key is None:
+        # Domein zonder versierij (van vóór domain_versions): geen ETag, geen cache
+        if JSON_RESPONSE_MODE == "fast":
+            return FastJSONResponse(render_context(domain, results))
+        return build_context_response(domain, results)
+
+    if JSON_RESPONSE_MODE == "fast":
+        body = dumps(render_context(domain, results))
+    else:
+        with serialization_timer():
+            body = build_context_response(domain, results).model_dump_json(exclude_unset=True).encode()
+    response_cache.put(key, etag, body)
+    return cacheable_response(body, etag)
+
+@app.post(
+    "/context:batch",
+    response_model=BatchContextResponse,
+    response_model_exclude_unset=True
+)
+async def get_context_batch(
+    request: BatchContextRequest,
+    user: Dict = Depends(get_current_user),
+    pool: Pool = Depends(get_read_pool)
+):
+    """
+    Context voor meerdere domeinen tegelijk (tijdlijn, belanghebbenden, dashboard)
+    Een vast aantal set-based queries, ongeacht het aantal domeinen
+    """
+    domain_ids = list(dict.fromkeys(request.domain_ids))
+    if len(domain_ids) > CONTEXT_BATCH_MAX_DOMAINS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximaal {CONTEXT_BATCH_MAX_DOMAINS} domeinen per batch"
+        )
 
-        # 2. Gerelateerde domeinen (netwerk)
-        related = await conn.fetch("""
-            SELECT id.*, dr.relation_type
-            FROM domain_relations dr
-            JOIN information_domains id ON dr.to_domain_id = id.id
-            WHERE dr.from_domain_id = $1
-            LIMIT 10
-        """, domain_id)
-
-        # 3. Recente informatieobjecten in deze context
-        objects = await conn.fetch("""
-            SELECT * FROM v_enriched_information_objects
-            WHERE domain_id = $1
-            ORDER BY created_at DESC
-            LIMIT 20
-        """, domain_id)
-
-        # 4. Context-aware app recommendations
-        apps = await get_recommended_apps(conn, domain['type'], user['id'], domain_id)
-
-        # 5. Betrokken stakeholders
-        stakeholders = await conn.fetch("""
-            SELECT s.*, ds.role
-            FROM domain_stakeholders ds
-            JOIN stakeholders s ON ds.stakeholder_id = s.id
-            WHERE ds.domain_id = $1
-        """, domain_id)
-
-        # 6. Gebruiker permissions voor deze context
-        permissions = await get_context_permissions(conn, domain_id, user['id'])
-
-        # Log access (audit trail)
-        await conn.execute("""
-            INSERT INTO audit_log (user_id, action, object_type, object_id, domain_id)
-            VALUES ($1, 'read', 'domain', $2, $2)
-        """, user['id'], domain_id)
-
-        return ContextResponse(
-            current_domain=InformationDomain(**dict(domain)),
-            related_domains=[InformationDomain(**dict(r)) for r in related],
-            recent_objects=[InformationObject(**dict(o)) for o in objects],
-            recommended_apps=apps,
-            stakeholders=[dict(s) for s in stakeholders],
-            user_permissions=permissions
+    sections = frozenset(request.include) if request.include is not None else ALL_CONTEXT_SECTIONS
+    contexts, errors = await assemble_context_batch(pool, domain_ids, user, sections)
+
+    # Log access (audit trail), één event per gelezen domein
+    await audit_writer.log_many([
+        (user['id'], 'read', 'domain', domain_id, domain_id)
+        for domain_id in contexts
+    ])
+
+    if JSON_RESPONSE_MODE == "fast":
+        return FastJSONResponse({
+            "contexts": {
+                key: render_context(domain, results)
+                for key, (domain, results) in contexts.items()
+            },
+            "errors": errors
+        })
+    return BatchContextResponse(
+        contexts={
+            key: build_context_response(domain, results)
+            for key, (domain, results) in contexts.items()
+        },
+        errors=errors
+    )
+
+@app.get("/context:stream")
+async def stream_context_changes(
+    domain_id: List[UUID4] = Query(...),
+    user: Dict = Depends(get_current_user),
+    pool: Pool = Depends(get_read_pool)
+):
+    """
+    Server-Sent Events met deltas voor de opgegeven domeinen (?domain_id=...&domain_id=...)
+    Events: object, relation, stakeholder, objects (bulk) en resync (client liep achter:
+    context opnieuw ophalen). Na een reconnect haalt de client de context zelf opnieuw op.
+    """
+    domain_ids = list(dict.fromkeys(domain_id))
+    if len(domain_ids) > CONTEXT_BATCH_MAX_DOMAINS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximaal {CONTEXT_BATCH_MAX_DOMAINS} domeinen per stream"
         )
 
+    # Toegang vooraf controleren; de verbinding gaat terug naar de pool vóór het streamen
+    async with pool.acquire() as conn:
+        for requested in domain_ids:
+            if not await check_domain_access(conn, requested, user['id']):
+                raise HTTPException(status_code=403, detail=f"Access denied to domain {requested}")
+
+    await audit_writer.log_many([
+        (user['id'], 'subscribe', 'domain', requested, requested)
+        for requested in domain_ids
+    ])
+
+    subscription = context_hub.subscribe(domain_ids)
+    if subscription is None:
+        return overloaded_response(
+            Overloaded("Maximaal aantal streams bereikt", CONTEXT_STREAM_HEARTBEAT_SECONDS)
+        )
+
+    async def events():
+        try:
+            yield f"retry: {int(CONTEXT_STREAM_HEARTBEAT_SECONDS * 1000)}\n\n".encode()
+            while True:
+                try:
+                    frame = await asyncio.wait_for(
+                        subscription.next_frame(), CONTEXT_STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            context_hub.unsubscribe(subscription)
+
+    # De achtergrondtaak meldt ook af als events() nooit start (client weg vóór de eerste byte)
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        background=BackgroundTask(context_hub.unsubscribe, subscription),
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/domains", response_model=InformationDomain)
 async def create_domain(
     domain: InformationDomain,
     user: Dict = Depends(get_current_user),
-    pool: Pool = Depends(get_db_pool)
+    pool: Pool = Depends(get_write_pool)
 ):
     """
     Creëer nieuw informatiedomein (zaak, project, etc.)
@@ -281,7 +774,7 @@ async def create_domain(
     """
     async with pool.acquire() as conn:
         # Automatische metadata via regelset
-        enriched_metadata = await apply_domain_rules(conn, domain)
+        enriched_metadata = apply_domain_rules(domain)
 
         result = await conn.fetchrow("""
             INSERT INTO information_domains
@@ -291,11 +784,12 @@ async def create_domain(
         """, domain.type, domain.name, domain.description, domain.status,
             domain.organization_id, user['id'], enriched_metadata)
 
+        access_index.add_domain(result['id'], result['organization_id'])
+
         # Audit log
-        await conn.execute("""
-            INSERT INTO audit_log (user_id, action, object_type, object_id, domain_id)
-            VALUES ($1, 'create', 'domain', $2, $2)
-        """, user['id'], result['id'])
+        await audit_writer.log(
+            user['id'], 'create', 'domain', result['id'], result['id'], conn=conn
+        )
 
         return InformationDomain(**dict(result))
 
@@ -303,7 +797,7 @@ async def create_domain(
 async def create_information_object(
     obj: InformationObject,
     user: Dict = Depends(get_current_user),
-    pool: Pool = Depends(get_db_pool)
+    pool: Pool = Depends(get_write_pool)
 ):
     """
     Creëer informatieobject binnen een domein
@@ -321,79 +815,149 @@ async def create_information_object(
         """, obj.domain_id)
 
         # Pas automatisch regelset toe (Compliance by Design)
-        compliance_data = await apply_compliance_rules(
-            conn, obj, domain['type']
-        )
-
-        result = await conn.fetchrow("""
-            INSERT INTO information_objects (
-                domain_id, object_type, title, content_location, mime_type,
-                classification, retention_period, is_woo_relevant, privacy_level,
-                tags, metadata, created_by
-            )
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-            RETURNING *
-        """, obj.domain_id, obj.object_type, obj.title, obj.content_location,
-            obj.mime_type, compliance_data['classification'],
-            compliance_data['retention_period'], compliance_data['is_woo_relevant'],
-            obj.privacy_level, obj.tags, obj.metadata, user['id'])
+        compliance_data = apply_compliance_rules(obj, domain)
+
+        async with conn.transaction():
+            result = await conn.fetchrow("""
+                INSERT INTO information_objects (
+                    domain_id, object_type, title, content_location, mime_type,
+                    classification, retention_period, retention_trigger, is_woo_relevant,
+                    privacy_level, tags, metadata, created_by
+                )
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
+                RETURNING *
+            """, obj.domain_id, obj.object_type, obj.title, obj.content_location,
+                obj.mime_type, compliance_data['classification'],
+                compliance_data['retention_period'], compliance_data['retention_trigger'],
+                compliance_data['is_woo_relevant'], compliance_data['privacy_level'],
+                obj.tags, compliance_data['metadata'], user['id'])
+
+            # Alleen regels die daadwerkelijk matchten, zoals bij de bulk ingest
+            if compliance_data['applied_rules']:
+                await conn.executemany("""
+                    INSERT INTO rule_executions (rule_id, object_id, success, execution_result)
+                    VALUES ($1, $2, true, '{"applied": true}'::jsonb)
+                """, [(uuid.UUID(rule_id), result['id']) for rule_id in compliance_data['applied_rules']])
+
+        metadata_service.observe_object(obj.title, obj.tags)
 
         # Audit log
-        await conn.execute("""
-            INSERT INTO audit_log (user_id, action, object_type, object_id, domain_id)
-            VALUES ($1, 'create', 'information_object', $2, $3)
-        """, user['id'], result['id'], obj.domain_id)
+        await audit_writer.log(
+            user['id'], 'create', 'information_object', result['id'], obj.domain_id, conn=conn
+        )
 
         return InformationObject(**dict(result))
 
+@app.post("/objects/bulk", response_model=BulkIngestResponse)
+async def create_information_objects_bulk(
+    request: Request,
+    user: Dict = Depends(get_current_user),
+    pool: Pool = Depends(get_write_pool)
+):
+    """
+    Bulk ingest van informatieobjecten (migratie van zaakarchieven)
+    Body: JSON array of NDJSON, wordt gestreamd en per chunk verwerkt:
+    valideren, autorisatie en regelset in het geheugen, schrijven via COPY
+    Geeft per rij het resultaat terug; een mislukte chunk raakt andere chunks niet
+    """
+    results: List[BulkRowResult] = []
+    domains: Dict[str, Any] = {}
+    index = 0
+
+    async with pool.acquire() as conn:
+        has_graphrag_queue = await conn.fetchval(
+            "SELECT to_regclass('graphrag_processing_queue') IS NOT NULL"
+        )
+
+        try:
+            async for chunk in chunked(iter_documents(request.stream()), BULK_CHUNK_SIZE):
+                accepted = []
+                for doc, error in chunk:
+                    obj, errors = validate_bulk_row(doc, error, user)
+                    if obj is None:
+                        results.append(BulkRowResult(index=index, status='rejected', errors=errors))
+                    else:
+                        accepted.append((index, obj))
+                    index += 1
+
+                results.extend(
+                    await ingest_bulk_chunk(conn, accepted, domains, user, has_graphrag_queue)
+                )
+        except BulkParseError as e:
+            results.append(BulkRowResult(index=index, status='rejected', errors=[str(e)]))
+
+    created = sum(1 for r in results if r.status == 'created')
+    return BulkIngestResponse(created=created, rejected=len(results) - created, results=results)
+
 @app.get("/search")
 async def search_information(
+    request: Request,
     q: str,
     domain_id: Optional[UUID4] = None,
     object_type: Optional[ObjectType] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    view: SearchView = SearchView.FULL,
+    format: ResultFormat = ResultFormat.JSON,
     user: Dict = Depends(get_current_user),
-    pool: Pool = Depends(get_db_pool)
+    pool: Pool = Depends(get_read_pool)
 ):
     """
     Context-aware semantic search
     Zoekt alleen in domeinen waar gebruiker toegang tot heeft
-    """
-    async with pool.acquire() as conn:
-        query = """
-            SELECT io.*, id.name as domain_name, id.type as domain_type
-            FROM information_objects io
-            JOIN information_domains id ON io.domain_id = id.id
-            WHERE full_text_search @@ to_tsquery('dutch', $1)
-        """
-        params = [q]
-
-        if domain_id:
-            query += " AND io.domain_id = $2"
-            params.append(domain_id)
-
-        if object_type:
-            query += f" AND io.object_type = ${len(params) + 1}"
-            params.append(object_type.value)
-
-        # Alleen resultaten waar gebruiker toegang toe heeft
-        query += """
-            AND EXISTS (
-                SELECT 1 FROM check_domain_access(id.id, $1)
-            )
-        """
-        params[0] = user['id']
 
-        query += " ORDER BY ts_rank(full_text_search, to_tsquery('dutch', $1)) DESC LIMIT 50"
+    Paginering via keyset cursor op (rank, id): geef next_cursor van de vorige
+    pagina mee als cursor. format=ndjson streamt alle resultaten als export.
+    """
+    after = decode_search_cursor(cursor) if cursor else None
 
-        results = await conn.fetch(query, *params)
+    async with pool.acquire() as conn:
+        # Alleen resultaten waar gebruiker toegang toe heeft:
+        # toegankelijke organisaties één keer bepalen i.p.v. een check per rij
+        organization_ids = await access_index.accessible_organizations(conn, user['id'])
+
+    query, params = build_search_query(
+        q, list(organization_ids), domain_id, object_type, view, after,
+        limit=None if format == ResultFormat.NDJSON else limit + 1
+    )
+
+    if format == ResultFormat.NDJSON:
+        return StreamingResponse(
+            stream_search_results(pool, query, params),
+            media_type="application/x-ndjson"
+        )
 
-        return {"results": [dict(r) for r in results], "count": len(results)}
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(query, *params)
+
+    # Eén extra rij opgehaald om te weten of er een volgende pagina is
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(rows[-1]['rank'], rows[-1]['id'])
+
+    # Zoekresultaten beslaan veel domeinen: ETag op basis van de inhoud,
+    # een 304 bespaart dan wel de overdracht maar niet de query
+    if JSON_RESPONSE_MODE == "fast":
+        body = dumps({"results": rows, "count": len(rows), "next_cursor": next_cursor})
+    else:
+        with serialization_timer():
+            body = json.dumps(jsonable_encoder({
+                "results": [dict(r) for r in rows],
+                "count": len(rows),
+                "next_cursor": next_cursor
+            })).encode()
+
+    etag = content_etag(body)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified_response(etag)
+    return cacheable_response(body, etag)
 
 @app.get("/apps/recommended")
 async def get_recommended_apps_endpoint(
     domain_id: Optional[UUID4] = None,
     user: Dict = Depends(get_current_user),
-    pool: Pool = Depends(get_db_pool)
+    pool: Pool = Depends(get_read_pool)
 ):
     """
     Context-aware app recommendations
@@ -402,14 +966,44 @@ async def get_recommended_apps_endpoint(
     async with pool.acquire() as conn:
         domain_type = None
         if domain_id:
-            domain = await conn.fetchrow(
-                "SELECT type FROM information_domains WHERE id = $1", domain_id
-            )
+            domain = await conn.fetchrow(statements.FETCH_DOMAIN_TYPE, domain_id)
             domain_type = domain['type'] if domain else None
 
         apps = await get_recommended_apps(conn, domain_type, user['id'], domain_id)
         return {"recommendations": apps}
 
+@app.post("/apps/{app_id}/usage")
+async def record_app_usage(
+    app_id: UUID4,
+    domain_id: UUID4,
+    user: Dict = Depends(get_current_user),
+    pool: Pool = Depends(get_write_pool)
+):
+    """
+    Registreer gebruik van een app binnen een context
+    Voedt de gebruikstellers voor app recommendations
+    """
+    async with pool.acquire() as conn:
+        has_access = await check_domain_access(conn, domain_id, user['id'])
+        if not has_access:
+            raise HTTPException(status_code=403, detail="Access denied to domain")
+
+        usage_count = await conn.fetchval("""
+            INSERT INTO user_app_usage (user_id, app_id, domain_id, usage_count, last_used_at)
+            SELECT $1, a.id, $3, 1, CURRENT_TIMESTAMP
+            FROM apps a
+            WHERE a.id = $2 AND a.active = true
+            ON CONFLICT (user_id, app_id, domain_id) DO UPDATE
+            SET usage_count = user_app_usage.usage_count + 1,
+                last_used_at = CURRENT_TIMESTAMP
+            RETURNING usage_count
+        """, user['id'], app_id, domain_id)
+
+        if usage_count is None:
+            raise HTTPException(status_code=404, detail="App not found")
+
+        return {"app_id": app_id, "domain_id": domain_id, "usage_count": usage_count}
+
 # ============================================
 # HELPER FUNCTIONS
 # ============================================
@@ -419,70 +1013,62 @@ async def check_domain_access(conn, domain_id: UUID4, user_id: UUID4) -> bool:
     Fijnmazige autorisatie: check of gebruiker toegang heeft tot domein
     Op basis van rollen, permissions en domein-specifieke regels
     """
-    result = await conn.fetchval("""
-        SELECT EXISTS(
-            SELECT 1 FROM information_domains id
-            JOIN organizations o ON id.organization_id = o.id
-            JOIN departments d ON o.id = d.organization_id
-            JOIN users u ON d.id = u.department_id
-            WHERE id.id = $1 AND u.id = $2
-        )
-    """, domain_id, user_id)
-    return result
+    # Via de in-memory toegangsindex (user_organization_access + domein → organisatie)
+    return await access_index.has_access(conn, domain_id, user_id)
 
-async def apply_domain_rules(conn, domain: InformationDomain) -> Dict[str, Any]:
+def apply_domain_rules(domain: InformationDomain) -> Dict[str, Any]:
     """
     Pas automatisch regelset toe bij aanmaken domein
     """
     metadata = domain.metadata or {}
 
-    # Haal toepasselijke regels op
-    rules = await conn.fetch("""
-        SELECT * FROM business_rules
-        WHERE active = true
-        AND $1 = ANY(applies_to_domain_types)
-    """, domain.type.value)
-
-    for rule in rules:
+    # Toepasselijke regels komen uit de gecompileerde regelset (geen query)
+    for rule in rule_engine.domain_rules(domain.type.value):
         # Voer regel uit (vereenvoudigd)
-        if rule['rule_category'] == 'archivering':
+        if rule.rule_category == 'archivering':
             metadata['archiving_applied'] = True
 
     return metadata
 
-async def apply_compliance_rules(
-    conn, obj: InformationObject, domain_type: str
-) -> Dict[str, Any]:
+# Velden die een regel-actie direct op het informatieobject mag zetten;
+# overige acties (bijv. disclosure_class) komen in metadata terecht
+COMPLIANCE_COLUMNS = (
+    'classification', 'retention_period', 'retention_trigger',
+    'is_woo_relevant', 'privacy_level'
+)
+
+def apply_compliance_rules(obj: InformationObject, domain) -> Dict[str, Any]:
     """
     Compliance by Design: pas automatisch wet- en regelgeving toe
     - Archivering
     - WOO
     - AVG
     - BIO
-    """
-    rules = await conn.fetch("""
-        SELECT * FROM business_rules
-        WHERE active = true
-        AND $1 = ANY(applies_to_object_types)
-        AND (applies_to_domain_types IS NULL OR $2 = ANY(applies_to_domain_types))
-        ORDER BY rule_category
-    """, obj.object_type.value, domain_type)
 
+    Condities uit rule_logic worden geëvalueerd tegen het object (veldnamen
+    zonder prefix) en het domein ('domain.<veld>')
+    """
     compliance = {
         'classification': obj.classification.value,
         'retention_period': obj.retention_period,
-        'is_woo_relevant': obj.is_woo_relevant
+        'retention_trigger': None,
+        'is_woo_relevant': obj.is_woo_relevant,
+        'privacy_level': obj.privacy_level
     }
 
-    # Pas regels toe
-    for rule in rules:
-        logic = rule['rule_logic']
-        if rule['rule_category'] == 'archivering':
-            compliance['retention_period'] = logic.get('retention_years', 7)
-        elif rule['rule_category'] == 'woo':
-            compliance['is_woo_relevant'] = True
+    facts = obj.model_dump()
+    facts['domain'] = dict(domain)
 
-    return compliance
+    # Pas regels toe
+    compliance, applied = rule_engine.evaluate(
+        obj.object_type.value, domain['type'], facts, compliance
+    )
+
+    extra = {k: v for k, v in compliance.items() if k not in COMPLIANCE_COLUMNS}
+    result = {k: compliance[k] for k in COMPLIANCE_COLUMNS}
+    result['metadata'] = {**(obj.metadata or {}), **extra}
+    result['applied_rules'] = [rule.id for rule in applied]
+    return result
 
 async def get_recommended_apps(
     conn, domain_type: Optional[str], user_id: UUID4, domain_id: Optional[UUID4]
@@ -495,40 +1081,44 @@ async def get_recommended_apps(
     3. Gebruikshistorie
     4. AI-voorspelling (toekomstig)
     """
-    query = """
-        SELECT
-            a.*,
-            COALESCE(SUM(uau.usage_count), 0) as usage_count,
-            CASE
-                WHEN $1::text = ANY(a.relevant_for_domain_types) THEN 10
-                ELSE 0
-            END as domain_relevance
-        FROM apps a
-        LEFT JOIN user_app_usage uau ON a.id = uau.app_id AND uau.user_id = $2
-        WHERE a.active = true
-        GROUP BY a.id
-        ORDER BY domain_relevance DESC, usage_count DESC
-        LIMIT 5
-    """
-
-    apps = await conn.fetch(query, domain_type, user_id)
-
-    recommendations = []
-    for app in apps:
-        score = (app['domain_relevance'] + app['usage_count']) / 15.0
-        reason = []
-        if app['domain_relevance'] > 0:
-            reason.append(f"Relevant voor {domain_type}")
-        if app['usage_count'] > 0:
-            reason.append(f"Je hebt deze {app['usage_count']}x gebruikt")
-
-        recommendations.append(AppRecommendation(
-            app=App(**dict(app)),
-            relevance_score=min(score, 1.0),
-            reason=" | ".join(reason) if reason else "Populaire app"
-        ))
-
-    return recommendations
+    # Scores komen uit de in-memory gebruikstellers (geen query)
+    return [
+        build_app_recommendation(app, domain_relevance, usage_count, domain_type)
+        for app, domain_relevance, usage_count in app_usage_index.recommend(user_id, domain_type)
+    ]
+
+def build_app_recommendation(
+    app, domain_relevance: int, usage_count: int, domain_type: Optional[str]
+) -> AppRecommendation:
+    score = (domain_relevance + usage_count) / 15.0
+    reason = []
+    if domain_relevance > 0:
+        reason.append(f"Relevant voor {domain_type}")
+    if usage_count > 0:
+        reason.append(f"Je hebt deze {usage_count}x gebruikt")
+
+    return AppRecommendation(
+        app=App(**dict(app)),
+        relevance_score=min(score, 1.0),
+        reason=" | ".join(reason) if reason else "Populaire app"
+    )
+
+def cacheable_response(body: bytes, etag: str) -> Response:
+    """
+    200 met ETag; 'private, no-cache' omdat de inhoud per gebruiker verschilt
+    en clients altijd moeten hervalideren (goedkoop dankzij 304)
+    """
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
+
+def not_modified_response(etag: str) -> Response:
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
 
 async def get_context_permissions(
     conn, domain_id: UUID4, user_id: UUID4
@@ -537,17 +1127,7 @@ async def get_context_permissions(
     Bepaal wat gebruiker mag doen binnen deze context
     Fijnmazig autorisatieschema
     """
-    permissions = await conn.fetchrow("""
-        SELECT
-            bool_or(r.permissions->>'can_read' = 'true') as can_read,
-            bool_or(r.permissions->>'can_write' = 'true') as can_write,
-            bool_or(r.permissions->>'can_delete' = 'true') as can_delete,
-            bool_or(r.permissions->>'can_share' = 'true') as can_share
-        FROM user_roles ur
-        JOIN roles r ON ur.role_id = r.id
-        WHERE ur.user_id = $1
-        AND (ur.valid_until IS NULL OR ur.valid_until > CURRENT_TIMESTAMP)
-    """, user_id)
+    permissions = await conn.fetchrow(statements.CONTEXT_PERMISSIONS, user_id)
 
     return {
         "can_read": permissions['can_read'] or False,
@@ -556,6 +1136,483 @@ async def get_context_permissions(
         "can_share": permissions['can_share'] or False
     }
 
+# ============================================
+# SEARCH
+# ============================================
+
+def encode_search_cursor(rank: float, object_id: Any) -> str:
+    raw = json.dumps([rank, str(object_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_search_cursor(cursor: str) -> tuple:
+    try:
+        rank, object_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), uuid.UUID(object_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def build_search_query(
+    q: str,
+    organization_ids: List[Any],
+    domain_id: Optional[UUID4],
+    object_type: Optional[ObjectType],
+    view: SearchView,
+    after: Optional[tuple],
+    limit: Optional[int]
+) -> tuple:
+    """
+    Kies de vooraf opgesomde zoekvariant (statements.SEARCH_STATEMENTS) en
+    vul de parameters in dezelfde volgorde als de placeholders
+    """
+    variant = (
+        view == SearchView.COMPACT,
+        domain_id is not None,
+        object_type is not None,
+        after is not None,
+        limit is not None
+    )
+    params = [q, organization_ids]
+    if domain_id is not None:
+        params.append(domain_id)
+    if object_type is not None:
+        params.append(object_type.value)
+    if after is not None:
+        params.extend(after)
+    if limit is not None:
+        params.append(limit)
+
+    return statements.SEARCH_STATEMENTS[variant], params
+
+async def stream_search_results(pool: Pool, query: str, params: List[Any]):
+    """Stream zoekresultaten als NDJSON via een server-side cursor"""
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            async for row in conn.cursor(query, *params, prefetch=500):
+                yield json.dumps(dict(row), default=str) + "\n"
+
+# ============================================
+# BULK INGEST
+# ============================================
+
+# Kolommen die via COPY in de staging tabel komen
+BULK_OBJECT_COLUMNS = (
+    'id', 'domain_id', 'object_type', 'title', 'content_location', 'mime_type',
+    'classification', 'retention_period', 'retention_trigger', 'is_woo_relevant',
+    'privacy_level', 'tags', 'metadata', 'created_by'
+)
+
+def validate_bulk_row(doc: Any, parse_error: Optional[str], user: Dict[str, Any]):
+    """Valideer één bulk rij; geeft (InformationObject, []) of (None, fouten) terug"""
+    if parse_error:
+        return None, [parse_error]
+    if not isinstance(doc, dict):
+        return None, ["Rij is geen JSON object"]
+
+    # Zoals bij POST /objects: de aanmaker is altijd de geauthenticeerde gebruiker
+    doc['created_by'] = user['id']
+    try:
+        return InformationObject.model_validate(doc), []
+    except ValidationError as e:
+        return None, [
+            f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+        ]
+
+async def ingest_bulk_chunk(
+    conn,
+    accepted: List[tuple],
+    domains: Dict[str, Any],
+    user: Dict[str, Any],
+    has_graphrag_queue: bool
+) -> List[BulkRowResult]:
+    """
+    Schrijf een chunk gevalideerde objecten weg in één transactie
+    De per-rij triggers slaan zichzelf over (iou.bulk_ingest); full-text search,
+    rule_executions, domeinversies, GraphRAG queue en audit trail worden hier set-based gevuld
+    """
+    if not accepted:
+        return []
+
+    # Domeinen die nog niet bekend zijn in één query ophalen
+    missing = list({str(obj.domain_id) for _, obj in accepted} - domains.keys())
+    if missing:
+        for row in await conn.fetch("""
+            SELECT * FROM information_domains WHERE id = ANY($1::uuid[])
+        """, missing):
+            domains[str(row['id'])] = row
+            access_index.add_domain(row['id'], row['organization_id'])
+
+    results = []
+    records = []
+    stored = []
+    executions = []
+    audit_events = []
+    for index, obj in accepted:
+        domain = domains.get(str(obj.domain_id))
+        if domain is None:
+            results.append(BulkRowResult(index=index, status='rejected', errors=["Domain not found"]))
+            continue
+        if not await check_domain_access(conn, obj.domain_id, user['id']):
+            results.append(BulkRowResult(index=index, status='rejected', errors=["Access denied to domain"]))
+            continue
+
+        compliance = apply_compliance_rules(obj, domain)
+        object_id = uuid.uuid4()
+        records.append((
+            object_id, obj.domain_id, obj.object_type.value, obj.title,
+            obj.content_location, obj.mime_type, compliance['classification'],
+            compliance['retention_period'], compliance['retention_trigger'],
+            compliance['is_woo_relevant'], compliance['privacy_level'],
+            obj.tags, json.dumps(compliance['metadata']), user['id']
+        ))
+        stored.append(obj)
+        executions.extend(
+            (uuid.UUID(rule_id), object_id, True, '{"applied": true, "bulk": true}')
+            for rule_id in compliance['applied_rules']
+        )
+        audit_events.append((user['id'], 'create', 'information_object', object_id, obj.domain_id))
+        results.append(BulkRowResult(index=index, status='created', id=object_id))
+
+    if not records:
+        return results
+
+    try:
+        async with conn.transaction():
+            await conn.execute("SET LOCAL iou.bulk_ingest = 'on'")
+            await conn.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS bulk_information_objects
+                (LIKE information_objects INCLUDING DEFAULTS)
+                ON COMMIT DELETE ROWS
+            """)
+            await conn.copy_records_to_table(
+                'bulk_information_objects', records=records, columns=BULK_OBJECT_COLUMNS
+            )
+            await conn.execute(f"""
+                INSERT INTO information_objects ({', '.join(BULK_OBJECT_COLUMNS)}, full_text_search)
+                SELECT {', '.join(BULK_OBJECT_COLUMNS)},
+                    to_tsvector('dutch',
+                        coalesce(title, '') || ' ' ||
+                        coalesce(array_to_string(tags, ' '), '')
+                    )
+                FROM bulk_information_objects
+            """)
+
+            if executions:
+                await conn.copy_records_to_table(
+                    'rule_executions', records=executions,
+                    columns=('rule_id', 'object_id', 'success', 'execution_result')
+                )
+
+            # Eén versiebump en één stream-event per geraakt domein i.p.v. per rij
+            await conn.execute("""
+                SELECT bump_domain_version(domain_id)
+                FROM (SELECT DISTINCT domain_id FROM bulk_information_objects) d
+            """)
+            await conn.execute("""
+                SELECT pg_notify('context_changed', json_build_object(
+                    'domain_id', domain_id, 'kind', 'objects', 'op', 'BULK_INSERT', 'count', count
+                )::text)
+                FROM (
+                    SELECT domain_id, count(*) as count FROM bulk_information_objects GROUP BY domain_id
+                ) d
+            """)
+
+            if has_graphrag_queue:
+                await conn.execute("""
+                    INSERT INTO graphrag_processing_queue (object_id, processing_type, priority)
+                    SELECT b.id, q.processing_type, q.priority
+                    FROM bulk_information_objects b
+                    CROSS JOIN (VALUES ('ENTITY_EXTRACTION', 7), ('EMBEDDING_GENERATION', 5))
+                        AS q(processing_type, priority)
+                """)
+
+            await audit_writer.write_many(conn, audit_events)
+    except asyncpg.PostgresError as e:
+        # De hele chunk is teruggedraaid
+        return [
+            r if r.status == 'rejected'
+            else BulkRowResult(index=r.index, status='rejected', errors=[str(e)])
+            for r in results
+        ]
+
+    for obj in stored:
+        metadata_service.observe_object(obj.title, obj.tags)
+    return results
+
+# ============================================
+# CONTEXT ASSEMBLY
+# ============================================
+
+async def fetch_related_domains(conn, domain_id: UUID4) -> List[asyncpg.Record]:
+    """Gerelateerde domeinen (netwerk)"""
+    return await conn.fetch(statements.FETCH_RELATED_DOMAINS, domain_id)
+
+async def fetch_recent_objects(conn, domain_id: UUID4) -> List[asyncpg.Record]:
+    """Recente informatieobjecten in deze context"""
+    return await conn.fetch(statements.FETCH_RECENT_OBJECTS, domain_id)
+
+async def fetch_stakeholders(conn, domain_id: UUID4) -> List[asyncpg.Record]:
+    """Betrokken stakeholders"""
+    return await conn.fetch(statements.FETCH_STAKEHOLDERS, domain_id)
+
+async def fetch_domain(conn, domain_id: UUID4) -> Optional[asyncpg.Record]:
+    return await conn.fetchrow(statements.FETCH_DOMAIN, domain_id)
+
+async def fetch_domain_with_version(conn, domain_id: UUID4) -> Optional[asyncpg.Record]:
+    """Domein plus kolom domain_version (None zonder versierij), in één query"""
+    return await conn.fetchrow(statements.FETCH_DOMAIN_WITH_VERSION, domain_id)
+
+async def run_on_pool(pool: Pool, fn, *args, limit: Optional[asyncio.Semaphore] = None):
+    """
+    Voer een lookup uit op een eigen verbinding uit de pool
+    limit begrenst hoeveel verbindingen de lookups van één request tegelijk vasthouden
+    """
+    if limit is None:
+        async with pool.acquire() as conn:
+            return await fn(conn, *args)
+    async with limit:
+        async with pool.acquire() as conn:
+            return await fn(conn, *args)
+
+def parse_context_sections(include: Optional[str]) -> frozenset:
+    """'recent_objects,stakeholders' → {RECENT_OBJECTS, STAKEHOLDERS}; None = alles"""
+    if include is None:
+        return ALL_CONTEXT_SECTIONS
+    try:
+        return frozenset(
+            ContextSection(name.strip()) for name in include.split(",") if name.strip()
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Onbekend onderdeel in include; kies uit {', '.join(s.value for s in ContextSection)}"
+        )
+
+def build_context_response(domain, sections: Dict[ContextSection, Any]) -> ContextResponse:
+    """Bouw de response met alleen de opgehaalde onderdelen (overige blijven 'unset')"""
+    converters = {
+        ContextSection.RELATED_DOMAINS: lambda rows: [InformationDomain(**dict(r)) for r in rows],
+        ContextSection.RECENT_OBJECTS: lambda rows: [InformationObject(**dict(o)) for o in rows],
+        ContextSection.RECOMMENDED_APPS: lambda apps: apps,
+        ContextSection.STAKEHOLDERS: lambda rows: [dict(s) for s in rows],
+        ContextSection.USER_PERMISSIONS: lambda permissions: permissions,
+    }
+    return ContextResponse(
+        current_domain=InformationDomain(**dict(domain)),
+        **{section.value: converters[section](value) for section, value in sections.items()}
+    )
+
+DOMAIN_FIELDS = tuple(InformationDomain.model_fields)
+OBJECT_FIELDS = tuple(InformationObject.model_fields)
+
+def render_context(domain, sections: Dict[ContextSection, Any]) -> Dict[str, Any]:
+    """
+    Snelle variant van build_context_response: zelfde JSON-vorm, maar rijen worden
+    alleen geprojecteerd op de modelvelden en niet gevalideerd (vertrouwde DB-data)
+    """
+    rendered: Dict[str, Any] = {"current_domain": project(domain, DOMAIN_FIELDS)}
+    for section, value in sections.items():
+        if section == ContextSection.RELATED_DOMAINS:
+            value = project_all(value, DOMAIN_FIELDS)
+        elif section == ContextSection.RECENT_OBJECTS:
+            value = project_all(value, OBJECT_FIELDS)
+        rendered[section.value] = value
+    return rendered
+
+# Onderdelen die uit in-memory indexen komen en geen pool-verbinding nodig hebben
+IN_MEMORY_SECTIONS = frozenset({ContextSection.RECOMMENDED_APPS})
+
+def context_lookups(domain, user: Dict[str, Any]) -> Dict[ContextSection, tuple]:
+    """Per onderdeel de lookup-functie en argumenten (zonder verbinding)"""
+    return {
+        ContextSection.RELATED_DOMAINS: (fetch_related_domains, domain['id']),
+        ContextSection.RECENT_OBJECTS: (fetch_recent_objects, domain['id']),
+        ContextSection.RECOMMENDED_APPS: (get_recommended_apps, domain['type'], user['id'], domain['id']),
+        ContextSection.STAKEHOLDERS: (fetch_stakeholders, domain['id']),
+        ContextSection.USER_PERMISSIONS: (get_context_permissions, domain['id'], user['id']),
+    }
+
+async def collect_context_sequential(
+    conn, domain_id: UUID4, user: Dict[str, Any],
+    sections: frozenset = ALL_CONTEXT_SECTIONS,
+    verified_domain: Optional[asyncpg.Record] = None
+) -> tuple:
+    """
+    Bouw context op met opeenvolgende queries op één verbinding
+    Geschikt wanneer de pool klein is of verbindingen schaars zijn
+    verified_domain: al opgehaald en geautoriseerd; fetch en autorisatie vervallen dan
+    """
+    domain = verified_domain
+    if domain is None:
+        # 1. Haal hoofddomein op
+        domain = await fetch_domain(conn, domain_id)
+        if not domain:
+            raise HTTPException(status_code=404, detail="Domain not found")
+
+        # Autorisatie check
+        has_access = await check_domain_access(conn, domain_id, user['id'])
+        if not has_access:
+            raise HTTPException(status_code=403, detail="Access denied")
+
+    # 2. Gevraagde onderdelen: gerelateerde domeinen, recente objecten,
+    # app recommendations, stakeholders en permissions
+    results = {}
+    for section, (fn, *args) in context_lookups(domain, user).items():
+        if section in sections:
+            results[section] = await fn(conn, *args)
+
+    return domain, results
+
+async def collect_context_concurrent(
+    pool: Pool, domain_id: UUID4, user: Dict[str, Any],
+    sections: frozenset = ALL_CONTEXT_SECTIONS,
+    verified_domain: Optional[asyncpg.Record] = None
+) -> tuple:
+    """
+    Bouw context op met parallelle queries op aparte verbindingen
+    De latency is de langste lookup per fase in plaats van de som van alle lookups:
+    fase 1 = domein + autorisatie, fase 2 = alle gevraagde onderdelen.
+    Nooit meer dan CONTEXT_MAX_CONNECTIONS verbindingen tegelijk (zie toelatingscontrole)
+    verified_domain: al opgehaald en geautoriseerd; fase 1 vervalt dan
+    """
+    limit = asyncio.Semaphore(CONTEXT_MAX_CONNECTIONS)
+    domain = verified_domain
+    if domain is None:
+        domain, has_access = await asyncio.gather(
+            run_on_pool(pool, fetch_domain, domain_id, limit=limit),
+            run_on_pool(pool, check_domain_access, domain_id, user['id'], limit=limit)
+        )
+
+        # Zelfde volgorde als sequentieel: eerst 404, dan 403
+        if not domain:
+            raise HTTPException(status_code=404, detail="Domain not found")
+        if not has_access:
+            raise HTTPException(status_code=403, detail="Access denied")
+
+    lookups = {
+        section: lookup
+        for section, lookup in context_lookups(domain, user).items()
+        if section in sections
+    }
+    values = await asyncio.gather(*(
+        fn(None, *args) if section in IN_MEMORY_SECTIONS else run_on_pool(pool, fn, *args, limit=limit)
+        for section, (fn, *args) in lookups.items()
+    ))
+
+    return domain, dict(zip(lookups, values))
+
+async def assemble_context_sequential(
+    conn, domain_id: UUID4, user: Dict[str, Any],
+    sections: frozenset = ALL_CONTEXT_SECTIONS
+) -> ContextResponse:
+    return build_context_response(
+        *await collect_context_sequential(conn, domain_id, user, sections)
+    )
+
+async def assemble_context_concurrent(
+    pool: Pool, domain_id: UUID4, user: Dict[str, Any],
+    sections: frozenset = ALL_CONTEXT_SECTIONS
+) -> ContextResponse:
+    return build_context_response(
+        *await collect_context_concurrent(pool, domain_id, user, sections)
+    )
+
+# ============================================
+# BATCH CONTEXT ASSEMBLY
+# ============================================
+
+async def fetch_domains_batch(conn, domain_ids: List[UUID4]) -> List[asyncpg.Record]:
+    return await conn.fetch(statements.FETCH_DOMAINS_BATCH, domain_ids)
+
+async def fetch_related_domains_batch(conn, domain_ids: List[UUID4]) -> List[asyncpg.Record]:
+    """Gerelateerde domeinen, maximaal 10 per domein"""
+    return await conn.fetch(statements.FETCH_RELATED_DOMAINS_BATCH, domain_ids)
+
+async def fetch_recent_objects_batch(conn, domain_ids: List[UUID4]) -> List[asyncpg.Record]:
+    """Recente informatieobjecten, maximaal 20 per domein"""
+    return await conn.fetch(statements.FETCH_RECENT_OBJECTS_BATCH, domain_ids)
+
+async def fetch_stakeholders_batch(conn, domain_ids: List[UUID4]) -> List[asyncpg.Record]:
+    return await conn.fetch(statements.FETCH_STAKEHOLDERS_BATCH, domain_ids)
+
+async def assemble_context_batch(
+    pool: Pool, domain_ids: List[UUID4], user: Dict[str, Any],
+    sections: frozenset = ALL_CONTEXT_SECTIONS
+) -> tuple:
+    """
+    Bouw context op voor meerdere domeinen met één query per onderdeel (= ANY($1))
+    Geeft (contexts, errors) terug, beide gesleuteld op domein-id als string;
+    contexts bevat per domein (domein-rij, onderdelen) zoals collect_context_*
+    """
+    async with pool.acquire() as conn:
+        domains = {str(d['id']): d for d in await fetch_domains_batch(conn, domain_ids)}
+
+        errors: Dict[str, Dict[str, Any]] = {}
+        allowed = []
+        for domain_id in domain_ids:
+            key = str(domain_id)
+            if key not in domains:
+                errors[key] = {"status_code": 404, "detail": "Domain not found"}
+                continue
+            access_index.add_domain(domain_id, domains[key]['organization_id'])
+            if not await check_domain_access(conn, domain_id, user['id']):
+                errors[key] = {"status_code": 403, "detail": "Access denied"}
+                continue
+            allowed.append(domain_id)
+
+    if not allowed:
+        return {}, errors
+
+    lookups = {
+        ContextSection.RELATED_DOMAINS: (fetch_related_domains_batch, allowed),
+        ContextSection.RECENT_OBJECTS: (fetch_recent_objects_batch, allowed),
+        ContextSection.STAKEHOLDERS: (fetch_stakeholders_batch, allowed),
+        ContextSection.USER_PERMISSIONS: (get_context_permissions, None, user['id']),
+    }
+    lookups = {section: lookup for section, lookup in lookups.items() if section in sections}
+    limit = asyncio.Semaphore(CONTEXT_MAX_CONNECTIONS)
+    values = dict(zip(lookups, await asyncio.gather(*(
+        run_on_pool(pool, fn, *args, limit=limit) for fn, *args in lookups.values()
+    ))))
+
+    def group_by(rows, column: str) -> Dict[str, list]:
+        grouped: Dict[str, list] = {}
+        for row in rows:
+            grouped.setdefault(str(row[column]), []).append(row)
+        return grouped
+
+    related_by_domain = group_by(values.get(ContextSection.RELATED_DOMAINS, []), 'context_domain_id')
+    objects_by_domain = group_by(values.get(ContextSection.RECENT_OBJECTS, []), 'domain_id')
+    stakeholders_by_domain = group_by(values.get(ContextSection.STAKEHOLDERS, []), 'context_domain_id')
+
+    apps_by_type: Dict[str, List[AppRecommendation]] = {}
+    contexts: Dict[str, tuple] = {}
+    for domain_id in allowed:
+        key = str(domain_id)
+        domain = domains[key]
+        per_domain: Dict[ContextSection, Any] = {}
+
+        if ContextSection.RELATED_DOMAINS in values:
+            per_domain[ContextSection.RELATED_DOMAINS] = related_by_domain.get(key, [])
+        if ContextSection.RECENT_OBJECTS in values:
+            per_domain[ContextSection.RECENT_OBJECTS] = objects_by_domain.get(key, [])
+        if ContextSection.RECOMMENDED_APPS in sections:
+            if domain['type'] not in apps_by_type:
+                apps_by_type[domain['type']] = await get_recommended_apps(
+                    None, domain['type'], user['id'], domain_id
+                )
+            per_domain[ContextSection.RECOMMENDED_APPS] = apps_by_type[domain['type']]
+        if ContextSection.STAKEHOLDERS in values:
+            per_domain[ContextSection.STAKEHOLDERS] = [
+                {k: v for k, v in s.items() if k != 'context_domain_id'}
+                for s in stakeholders_by_domain.get(key, [])
+            ]
+        if ContextSection.USER_PERMISSIONS in values:
+            per_domain[ContextSection.USER_PERMISSIONS] = values[ContextSection.USER_PERMISSIONS]
+
+        contexts[key] = (domain, per_domain)
+
+    return contexts, errors
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,174 @@
+"""
+Push van contextwijzigingen naar clients (Server-Sent Events)
+Eén LISTEN context_changed per worker; iedere NOTIFY wordt één keer geparsed en als
+kant-en-klaar SSE-frame uitgedeeld aan alle abonnees van het betreffende domein.
+
+Backpressure: iedere abonnee heeft een begrensde wachtrij. Loopt die vol, dan worden
+de wachtende deltas vervangen door één 'resync' event voor de geraakte domeinen; de
+client haalt dan de volledige context opnieuw op (goedkoop via ETag/304). Geheugen
+per trage client blijft zo begrensd en de listener wacht nooit op een client.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+# Markering in de wachtrij: op deze plek een resync uitleveren
+_RESYNC = object()
+
+
+def sse_frame(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> bytes:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class Subscription:
+    """Abonnement van één client op een set domeinen"""
+
+    __slots__ = ("domains", "queue", "resync", "dropped", "active")
+
+    def __init__(self, domains: Iterable[str], max_queue: int):
+        self.domains = frozenset(domains)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.resync: Set[str] = set()
+        self.dropped = 0
+        self.active = True
+
+    def offer(self, domain_id: str, frame: bytes) -> bool:
+        """Zet een frame klaar; False als de client achterloopt (frame vervalt)"""
+        if self.resync:
+            # Al achter: niets meer bufferen tot de client de resync heeft opgehaald
+            self.resync.add(domain_id)
+            self.dropped += 1
+            return False
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.resync.add(domain_id)
+            self.queue.put_nowait(_RESYNC)
+            return False
+
+    def resync_all(self) -> None:
+        """Alle domeinen opnieuw laten ophalen; wachtende deltas vervallen"""
+        if not self.resync:
+            # Anders staat de resync-markering al in de wachtrij
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_RESYNC)
+        self.resync.update(self.domains)
+
+    async def next_frame(self) -> Optional[bytes]:
+        """Volgende frame; None als het abonnement gesloten is"""
+        frame = await self.queue.get()
+        if frame is _RESYNC:
+            domains, self.resync = sorted(self.resync), set()
+            return sse_frame("resync", {"domain_ids": domains})
+        return frame
+
+    def close(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.resync.clear()
+        self.queue.put_nowait(None)
+
+
+class ContextChangeHub:
+    """
+    Fan-out van NOTIFY context_changed (triggers op information_objects,
+    domain_relations en domain_stakeholders; bulk ingest één event per domein)
+    """
+
+    CHANNEL = "context_changed"
+
+    def __init__(self, max_subscribers: int = 10000, max_queue: int = 100):
+        self.max_subscribers = max_subscribers
+        self.max_queue = max_queue
+        self._by_domain: Dict[str, Set[Subscription]] = {}
+        self._subscribers = 0
+        self._sequence = 0
+        self._events = 0
+        self._delivered = 0
+        self._lagging = 0
+        self._resyncs = 0
+
+    def subscribe(self, domain_ids: Iterable[Any]) -> Optional[Subscription]:
+        """None als deze worker al het maximum aantal abonnees heeft"""
+        if self._subscribers >= self.max_subscribers:
+            return None
+        subscription = Subscription((str(d) for d in domain_ids), self.max_queue)
+        for domain_id in subscription.domains:
+            self._by_domain.setdefault(domain_id, set()).add(subscription)
+        self._subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Mag vaker aangeroepen worden (stream-einde én achtergrondtaak van de response)"""
+        if not subscription.active:
+            return
+        subscription.active = False
+        for domain_id in subscription.domains:
+            subscribers = self._by_domain.get(domain_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_domain[domain_id]
+        self._subscribers -= 1
+
+    def on_notify(self, connection, pid, channel, payload: str) -> None:
+        """asyncpg listener callback; payload is JSON met minimaal domain_id en kind"""
+        self._events += 1
+        try:
+            change = json.loads(payload)
+            domain_id = change["domain_id"]
+        except (ValueError, KeyError):
+            logger.warning("Ongeldige context_changed payload: %.200s", payload)
+            return
+
+        subscribers = self._by_domain.get(domain_id)
+        if not subscribers:
+            return
+
+        self._sequence += 1
+        frame = sse_frame(change.get("kind", "change"), change, self._sequence)
+        for subscription in subscribers:
+            if subscription.offer(domain_id, frame):
+                self._delivered += 1
+            else:
+                self._lagging += 1
+
+    def resync_all(self) -> None:
+        """
+        Notificaties zijn gemist (listener herverbonden): iedere abonnee krijgt een
+        resync voor al zijn domeinen
+        """
+        for subscription in {s for subs in self._by_domain.values() for s in subs}:
+            subscription.resync_all()
+        self._resyncs += 1
+
+    def close(self) -> None:
+        """Bij shutdown: alle streams netjes beëindigen"""
+        for subscription in {s for subs in self._by_domain.values() for s in subs}:
+            subscription.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": self._subscribers,
+            "domains": len(self._by_domain),
+            "events": self._events,
+            "delivered": self._delivered,
+            "lagging": self._lagging,
+            "resyncs": self._resyncs,
+        }
@@ -0,0 +1,317 @@
+"""
+Lees/schrijf-scheiding over een primary en read replicas
+Schrijfacties en de LISTEN-verbinding blijven op de primary; GET endpoints
+lezen van een gezonde replica die de laatste eigen schrijfactie al heeft afgespeeld
+"""
+
+import asyncio
+import itertools
+import logging
+from http.cookies import SimpleCookie
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+from asyncpg.pool import Pool
+
+logger = logging.getLogger(__name__)
+
+# Client draagt de WAL-positie van zijn laatste schrijfactie mee (cookie of header)
+WRITE_LSN_COOKIE = "iou_write_lsn"
+WRITE_LSN_HEADER = "x-write-lsn"
+
+# Fouten waarbij de verbinding met de replica weg is (niet: fouten in de query zelf)
+CONNECTION_ERRORS = (
+    OSError,
+    asyncpg.InterfaceError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError,
+    asyncpg.AdminShutdownError,
+    asyncpg.CrashShutdownError,
+)
+
+
+def parse_lsn(value: Optional[str]) -> Optional[int]:
+    """'16/B374D848' → 0x16B374D848; None bij een ongeldige waarde"""
+    if not value:
+        return None
+    high, sep, low = value.strip().partition("/")
+    try:
+        return (int(high, 16) << 32) | int(low, 16) if sep else None
+    except ValueError:
+        return None
+
+
+def request_write_lsn(scope) -> Optional[int]:
+    """Write-LSN uit de X-Write-LSN header of de cookie van het request"""
+    cookie_header = None
+    for name, value in scope["headers"]:
+        if name == WRITE_LSN_HEADER.encode():
+            return parse_lsn(value.decode("latin-1"))
+        if name == b"cookie":
+            cookie_header = value.decode("latin-1")
+    if cookie_header:
+        cookie = SimpleCookie()
+        try:
+            cookie.load(cookie_header)
+        except Exception:
+            return None
+        if WRITE_LSN_COOKIE in cookie:
+            return parse_lsn(cookie[WRITE_LSN_COOKIE].value)
+    return None
+
+
+def parse_replica_hosts(value: str, default_port: int) -> List[Dict[str, Any]]:
+    """'replica1:5433,replica2' → [{'host': 'replica1', 'port': 5433}, {'host': 'replica2', 'port': default_port}]"""
+    replicas = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.partition(":")
+        replicas.append({"host": host, "port": int(port) if port else default_port})
+    return replicas
+
+
+class Replica:
+    """Eén read replica met pool en laatst gemeten gezondheid"""
+
+    def __init__(self, settings: Dict[str, Any]):
+        self.settings = settings
+        self.pool: Optional[Pool] = None
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        # Afgespeelde WAL-positie bij de laatste health check; None zonder replicatie
+        self.replay_lsn: Optional[int] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.settings['host']}:{self.settings['port']}"
+
+
+class DatabaseRouter:
+    """
+    Kiest per request de pool: primary voor schrijven, replica voor lezen
+
+    Read-your-writes: na een schrijfactie krijgt de client de WAL-positie van de
+    primary mee (cookie iou_write_lsn en header X-Write-LSN, sticky_seconds geldig;
+    zie ReadYourWritesMiddleware). Een leesrequest met die positie gaat alleen naar een
+    replica die haar bij de laatste health check al had afgespeeld, anders naar de
+    primary. Dat werkt over workers en instances heen, zonder gedeeld geheugen.
+
+    Failover: een achtergrondtaak controleert iedere health_interval seconden elke
+    replica (bereikbaar, in recovery, lag onder max_lag_seconds). Zonder gezonde
+    replica gaat al het leesverkeer naar de primary. Valt een replica tussen twee
+    checks weg, dan haalt de middleware haar uit rotatie en herhaalt het leesrequest
+    op de primary.
+    """
+
+    def __init__(
+        self,
+        base_settings: Dict[str, Any],
+        replica_hosts: List[Dict[str, Any]],
+        pool_min_size: int = 2,
+        pool_max_size: int = 20,
+        sticky_seconds: float = 30.0,
+        health_interval: float = 5.0,
+        max_lag_seconds: float = 10.0,
+        create_pool=asyncpg.create_pool
+    ):
+        self.base_settings = base_settings
+        self.replicas = [Replica({**base_settings, **hosts}) for hosts in replica_hosts]
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        self.sticky_seconds = sticky_seconds
+        self.health_interval = health_interval
+        self.max_lag_seconds = max_lag_seconds
+        self._create_pool = create_pool
+        self.primary: Optional[Pool] = None
+        self._round_robin = itertools.count()
+        self._health_task: Optional[asyncio.Task] = None
+        self.reads_primary = 0
+        self.reads_replica = 0
+        self.reads_behind = 0
+        self.failovers = 0
+
+    async def start(self, primary: Pool) -> None:
+        self.primary = primary
+        if not self.replicas:
+            return
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+        self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def stop(self) -> None:
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+        for replica in self.replicas:
+            if replica.pool:
+                await replica.pool.close()
+
+    def mark_write(self, scope) -> None:
+        """Dit request schrijft; de middleware geeft de client straks de write-LSN mee"""
+        scope.setdefault("state", {})["db_write"] = True
+
+    def read_pool(self, scope) -> Pool:
+        """Pool voor een leesrequest; alle queries van één request horen op dezelfde pool"""
+        state = scope.setdefault("state", {})
+        if state.get("db_read_primary"):
+            self.reads_primary += 1
+            return self.primary
+
+        healthy = [r for r in self.replicas if r.healthy and r.pool is not None]
+        min_lsn = request_write_lsn(scope) if healthy else None
+        if min_lsn is not None:
+            caught_up = [r for r in healthy if r.replay_lsn is not None and r.replay_lsn >= min_lsn]
+            if len(caught_up) < len(healthy):
+                self.reads_behind += 1
+            healthy = caught_up
+        if not healthy:
+            self.reads_primary += 1
+            return self.primary
+
+        self.reads_replica += 1
+        replica = healthy[next(self._round_robin) % len(healthy)]
+        state["db_replica"] = replica
+        return replica.pool
+
+    def fail_over(self, scope, error: Exception) -> bool:
+        """
+        Na een verbindingsfout tijdens een leesrequest: replica uit rotatie en het request
+        voortaan op de primary. False als het request niet op een replica liep.
+        """
+        state = scope.get("state", {})
+        replica = state.pop("db_replica", None)
+        if replica is None:
+            return False
+        if replica.healthy:
+            logger.warning("Replica %s uit rotatie na verbindingsfout: %s", replica.name, error)
+        replica.healthy = False
+        replica.last_error = str(error)
+        state["db_read_primary"] = True
+        self.failovers += 1
+        return True
+
+    async def current_lsn(self) -> Optional[str]:
+        """Huidige WAL-positie van de primary (na een commit: inclusief die commit)"""
+        try:
+            return await self.primary.fetchval("SELECT pg_current_wal_lsn()::text")
+        except (asyncpg.PostgresError, *CONNECTION_ERRORS) as e:
+            logger.warning("Write-LSN ophalen mislukt: %s", e)
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "reads_primary": self.reads_primary,
+            "reads_replica": self.reads_replica,
+            # Leesrequests waarvoor minstens één gezonde replica de eigen write nog niet had
+            "reads_behind": self.reads_behind,
+            "failovers": self.failovers,
+            "replicas": [
+                {
+                    "name": r.name,
+                    "healthy": r.healthy,
+                    "lag_seconds": r.lag_seconds,
+                    "replay_lsn": r.replay_lsn,
+                    "last_error": r.last_error,
+                }
+                for r in self.replicas
+            ],
+        }
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _check(self, replica: Replica) -> None:
+        try:
+            if replica.pool is None:
+                replica.pool = await self._create_pool(
+                    **replica.settings,
+                    min_size=self.pool_min_size,
+                    max_size=self.pool_max_size
+                )
+            async with replica.pool.acquire(timeout=self.health_interval) as conn:
+                # Bijgewerkte replica heeft geen lag, ook als de primary een tijd stil is geweest
+                status = await conn.fetchrow("""
+                    SELECT pg_is_in_recovery() as in_recovery,
+                        pg_last_wal_replay_lsn()::text as replay_lsn,
+                        CASE
+                            WHEN NOT pg_is_in_recovery()
+                                OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                            ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+                        END as lag
+                """)
+        except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            if replica.healthy:
+                logger.warning("Replica %s uit rotatie: %s", replica.name, e)
+            replica.healthy = False
+            replica.last_error = str(e)
+            return
+
+        # Geen replay timestamp: nog niets afgespeeld
+        lag = float(status['lag']) if status['lag'] is not None else 0.0
+        healthy = lag <= self.max_lag_seconds
+        if not status['in_recovery']:
+            logger.debug("Replica %s staat niet in recovery (stand-in zonder replicatie?)", replica.name)
+        if healthy != replica.healthy:
+            logger.warning(
+                "Replica %s %s (lag %.1fs)",
+                replica.name, "weer in rotatie" if healthy else "uit rotatie", lag
+            )
+        replica.healthy = healthy
+        replica.lag_seconds = lag
+        replica.replay_lsn = parse_lsn(status['replay_lsn'])
+        replica.last_error = None if healthy else f"Lag {lag:.1f}s boven {self.max_lag_seconds}s"
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware rond de routering:
+    - na een schrijfrequest (router.mark_write) krijgt de response de WAL-positie van de
+      primary mee als cookie en als X-Write-LSN header; clients zonder cookies sturen
+      de header terug bij hun volgende leesrequests
+    - een leesrequest dat op een replica een verbindingsfout krijgt vóórdat de response
+      begonnen is, wordt één keer herhaald op de primary
+    """
+
+    RETRY_METHODS = ("GET", "HEAD")
+
+    def __init__(self, app, router: DatabaseRouter):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        started = False
+
+        async def send_with_lsn(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                if state.get("db_write"):
+                    lsn = await self.router.current_lsn()
+                    if lsn:
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (WRITE_LSN_HEADER.encode(), lsn.encode()),
+                            (b"set-cookie", (
+                                f"{WRITE_LSN_COOKIE}={lsn}; Max-Age={int(self.router.sticky_seconds)}; "
+                                "Path=/; HttpOnly; SameSite=Lax"
+                            ).encode()),
+                        ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_lsn)
+        except CONNECTION_ERRORS as e:
+            if started or scope["method"] not in self.RETRY_METHODS or not self.router.fail_over(scope, e):
+                raise
+            await self.app(scope, receive, send_with_lsn)
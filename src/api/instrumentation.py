@@ -0,0 +1,321 @@
+"""
+Latency-instrumentatie voor requests, queries, pool en serialisatie
+Histograms in het geheugen, geëxporteerd in Prometheus tekstformaat via GET /metrics
+
+- InstrumentedConnection: asyncpg Connection subclass die per statement de duur en
+  het aantal rijen vastlegt, gelabeld met de aanroepende functie als logische querynaam
+  (fetch_related_domains, get_context_permissions, ...)
+- InstrumentedPool: meet de wachttijd van pool.acquire()
+- MetricsMiddleware: requestduur en serialisatietijd per endpoint
+"""
+
+import logging
+import sys
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import asyncpg
+
+from src.api.statements import PreparedConnection
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+ROW_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000)
+
+
+# ============================================
+# HISTOGRAMS
+# ============================================
+
+class Histogram:
+    """Vaste buckets (cumulatief bij export), som en aantal"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class HistogramFamily:
+    """Histograms met dezelfde naam en labelnamen, per combinatie van labelwaarden"""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], Histogram] = {}
+
+    def observe(self, label_values: Tuple[str, ...], value: float) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = Histogram(self.buckets)
+        series.observe(value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            labels = ",".join(
+                f'{name}="{_escape(value)}"' for name, value in zip(self.labels, label_values)
+            )
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, series.counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {series.count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series.sum}")
+            lines.append(f"{self.name}_count{{{labels}}} {series.count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class CallbackCounter:
+    """Counter waarvan de waarde bij export wordt opgevraagd (tellers die elders al bestaan)"""
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} counter",
+            f"{self.name} {self.read()}",
+        ]
+
+
+class Metrics:
+    def __init__(self):
+        self.families: Dict[str, Any] = {}
+        self.slow_query_seconds: Optional[float] = None
+
+    def histogram(
+        self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ) -> HistogramFamily:
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = HistogramFamily(name, help_text, labels, buckets)
+        return family
+
+    def counter(self, name: str, help_text: str, read: Callable[[], float]) -> CallbackCounter:
+        counter = self.families[name] = CallbackCounter(name, help_text, read)
+        return counter
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in self.families.values():
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+REQUEST_SECONDS = metrics.histogram(
+    "iou_http_request_duration_seconds", "Duur van HTTP requests", ("method", "endpoint", "status")
+)
+QUERY_SECONDS = metrics.histogram(
+    "iou_db_query_duration_seconds", "Duur per statement, per logische query", ("query",)
+)
+QUERY_ROWS = metrics.histogram(
+    "iou_db_query_rows", "Aantal rijen per statement, per logische query", ("query",), ROW_BUCKETS
+)
+ACQUIRE_SECONDS = metrics.histogram(
+    "iou_db_pool_acquire_seconds", "Wachttijd op een verbinding uit de pool", ("pool",)
+)
+SERIALIZATION_SECONDS = metrics.histogram(
+    "iou_serialization_seconds", "Tijd besteed aan JSON-serialisatie per request", ("endpoint",)
+)
+
+
+# ============================================
+# QUERIES
+# ============================================
+
+def _caller_name() -> str:
+    # 0 = _caller_name, 1 = InstrumentedConnection methode, 2 = aanroeper
+    return sys._getframe(2).f_code.co_name
+
+
+def _status_rows(status: str) -> int:
+    """'INSERT 0 5' / 'COPY 1000' / 'UPDATE 3' → aantal rijen"""
+    last = status.rsplit(" ", 1)[-1] if status else ""
+    return int(last) if last.isdigit() else 0
+
+
+def _record_query(name: str, query: str, seconds: float, rows: int) -> None:
+    QUERY_SECONDS.observe((name,), seconds)
+    QUERY_ROWS.observe((name,), rows)
+    threshold = metrics.slow_query_seconds
+    if threshold is not None and seconds >= threshold:
+        logger.warning(
+            "Trage query %s: %.1f ms, %d rijen: %s",
+            name, seconds * 1000, rows, " ".join(query.split())[:300]
+        )
+
+
+class InstrumentedConnection(PreparedConnection):
+    """
+    Meet fetch/fetchrow/fetchval/execute/executemany/copy_records_to_table
+    (ook als de query via een voorbereid statement loopt, zie PreparedConnection)
+    """
+
+    async def fetch(self, query, *args, **kwargs):
+        name = _caller_name()
+        started = time.perf_counter()
+        rows = await super().fetch(query, *args, **kwargs)
+        _record_query(name, query, time.perf_counter() - started, len(rows))
+        return rows
+
+    async def fetchrow(self, query, *args, **kwargs):
+        name = _caller_name()
+        started = time.perf_counter()
+        row = await super().fetchrow(query, *args, **kwargs)
+        _record_query(name, query, time.perf_counter() - started, 0 if row is None else 1)
+        return row
+
+    async def fetchval(self, query, *args, **kwargs):
+        name = _caller_name()
+        started = time.perf_counter()
+        value = await super().fetchval(query, *args, **kwargs)
+        _record_query(name, query, time.perf_counter() - started, 0 if value is None else 1)
+        return value
+
+    async def execute(self, query, *args, **kwargs):
+        name = _caller_name()
+        started = time.perf_counter()
+        status = await super().execute(query, *args, **kwargs)
+        _record_query(name, query, time.perf_counter() - started, _status_rows(status))
+        return status
+
+    async def executemany(self, command, args, **kwargs):
+        name = _caller_name()
+        started = time.perf_counter()
+        result = await super().executemany(command, args, **kwargs)
+        _record_query(name, command, time.perf_counter() - started, len(args))
+        return result
+
+    async def copy_records_to_table(self, table_name, **kwargs):
+        name = _caller_name()
+        started = time.perf_counter()
+        status = await super().copy_records_to_table(table_name, **kwargs)
+        _record_query(name, f"COPY {table_name}", time.perf_counter() - started, _status_rows(status))
+        return status
+
+
+# ============================================
+# POOL
+# ============================================
+
+class _TimedAcquire:
+    __slots__ = ("_pool", "_name", "_timeout", "_context")
+
+    def __init__(self, pool, name: str, timeout: Optional[float]):
+        self._pool = pool
+        self._name = name
+        self._timeout = timeout
+        self._context = None
+
+    async def __aenter__(self):
+        started = time.perf_counter()
+        self._context = self._pool.acquire(timeout=self._timeout)
+        conn = await self._context.__aenter__()
+        ACQUIRE_SECONDS.observe((self._name,), time.perf_counter() - started)
+        return conn
+
+    async def __aexit__(self, *exc):
+        return await self._context.__aexit__(*exc)
+
+
+class InstrumentedPool:
+    """Dunne laag om een asyncpg Pool; alleen acquire() wordt gemeten, de rest gaat door"""
+
+    def __init__(self, name: str, pool):
+        self.name = name
+        self._pool = pool
+
+    def acquire(self, *, timeout: Optional[float] = None) -> _TimedAcquire:
+        return _TimedAcquire(self._pool, self.name, timeout)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._pool, attr)
+
+
+async def create_pool(name: str, **kwargs) -> InstrumentedPool:
+    """asyncpg.create_pool met InstrumentedConnection en gemeten acquire"""
+    pool = await asyncpg.create_pool(connection_class=InstrumentedConnection, **kwargs)
+    return InstrumentedPool(name, pool)
+
+
+# ============================================
+# REQUESTS & SERIALISATIE
+# ============================================
+
+# Per request opgetelde serialisatietijd (lijst met één float, gezet door de middleware)
+_serialization: ContextVar[Optional[List[float]]] = ContextVar("serialization", default=None)
+
+
+@contextmanager
+def serialization_timer() -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        total = _serialization.get()
+        if total is not None:
+            total[0] += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: requestduur tot en met de laatste byte (ook bij streaming)
+    Het endpoint-label is het routetemplate (/context/{domain_id}), niet het pad
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+        serialization = [0.0]
+        token = _serialization.set(serialization)
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _serialization.reset(token)
+            route = scope.get("route")
+            endpoint = route.path if route is not None else "unmatched"
+            REQUEST_SECONDS.observe((scope["method"], endpoint, str(status[0])), elapsed)
+            if serialization[0]:
+                SERIALIZATION_SECONDS.observe((endpoint,), serialization[0])
@@ -0,0 +1,136 @@
+"""
+Cache van geauthenticeerde gebruikers (principals)
+Voorkomt de gebruikers- en rollenquery bij ieder request
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+
+
+class PrincipalCache:
+    """
+    Begrensde LRU-cache met TTL, gesleuteld op token
+
+    Invalidatie gebeurt via Postgres LISTEN/NOTIFY (kanaal 'principal_changed');
+    de TTL is de bovengrens voor hoe lang een ingetrokken rol nog geldig kan zijn
+    als een notificatie gemist wordt.
+
+    Een lookup die vóór een invalidatie begon mag zijn resultaat daarna niet meer
+    wegschrijven: haal vóór de query generation() op en geef die mee aan put().
+    Per gebruiker wordt de laatste invalidatie maar ttl_seconds onthouden; een lookup die
+    ouder is dan de oudste onthouden invalidatie wordt dus altijd geweigerd.
+    """
+
+    CHANNEL = "principal_changed"
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 60.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tokens_by_user: Dict[Any, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+        # Teller die bij iedere invalidatie ophoogt; per gebruiker (generatie, tijdstip) van
+        # de laatste, oudste eerst. Lookups van vóór _floor worden altijd geweigerd
+        self._generation = 0
+        self._invalidated_at: "OrderedDict[str, tuple]" = OrderedDict()
+        self._floor = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, principal = entry
+        if expires_at < time.monotonic():
+            self._remove(token)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return principal
+
+    def generation(self) -> int:
+        """Stand vóór een lookup; zie put()"""
+        return self._generation
+
+    def put(self, token: str, principal: Dict[str, Any], generation: int) -> None:
+        """Alleen opslaan als de gebruiker sinds `generation` niet is geïnvalideerd"""
+        user_id = str(principal["id"])
+        invalidated = self._invalidated_at.get(user_id)
+        if generation < self._floor or (invalidated is not None and invalidated[0] > generation):
+            self.stale_puts += 1
+            return
+
+        if token in self._entries:
+            self._remove(token)
+
+        self._entries[token] = (time.monotonic() + self.ttl_seconds, principal)
+        self._tokens_by_user.setdefault(user_id, set()).add(token)
+
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def invalidate_user(self, user_id: Any) -> None:
+        self._generation += 1
+        now = time.monotonic()
+        self._invalidated_at[str(user_id)] = (self._generation, now)
+        self._invalidated_at.move_to_end(str(user_id))
+        # Oude invalidaties vergeten; de vloer neemt hun generatie over
+        while True:
+            generation, at = next(iter(self._invalidated_at.values()))
+            if at >= now - self.ttl_seconds:
+                break
+            self._invalidated_at.popitem(last=False)
+            self._floor = generation
+        for token in self._tokens_by_user.pop(str(user_id), set()):
+            self._entries.pop(token, None)
+        self.invalidations += 1
+
+    def invalidate_all(self) -> None:
+        self._generation += 1
+        self._floor = self._generation
+        # Per-gebruiker standen zijn nu achterhaald door de vloer
+        self._invalidated_at.clear()
+        self._entries.clear()
+        self._tokens_by_user.clear()
+        self.invalidations += 1
+
+    def on_notify(self, connection, pid, channel, payload: str) -> None:
+        """
+        asyncpg listener callback
+        Payload is een user_id, of leeg wanneer een rol zelf gewijzigd is
+        (dan zijn potentieel alle gebruikers geraakt)
+        """
+        if payload:
+            self.invalidate_user(payload)
+        else:
+            self.invalidate_all()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "stale_puts": self.stale_puts,
+            "tracked_invalidations": len(self._invalidated_at),
+        }
+
+    def _remove(self, token: str) -> None:
+        _, principal = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(str(principal["id"]))
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[str(principal["id"])]
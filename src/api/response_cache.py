@@ -0,0 +1,103 @@
+"""
+Conditionele GETs en server-side response cache voor contextresponses
+Sleutel: (domein, permissie-fingerprint van de gebruiker, domeinversie, gevraagde onderdelen)
+De domeinversie wordt door triggers opgehoogd (domain_versions), zodat een
+wijziging de oude sleutel nooit meer laat matchen; expliciete invalidatie is niet nodig.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import orjson
+
+
+def make_etag(*parts: Any) -> str:
+    """Sterke ETag over de sleutelonderdelen (str() per onderdeel, volgorde telt)"""
+    digest = hashlib.blake2b(
+        "\x1f".join(str(p) for p in parts).encode(), digest_size=16
+    )
+    return f'"{digest.hexdigest()}"'
+
+
+def content_etag(body: bytes) -> str:
+    """Sterke ETag op basis van de responsebody zelf (voor responses zonder versie)"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def permission_fingerprint(user: Dict[str, Any], usage_key: str = "") -> str:
+    """
+    Alles van de gebruiker dat de contextresponse beïnvloedt:
+    identiteit, rollen/permissions en de aanbevolen apps (AppUsageIndex.recommendation_key)
+    """
+    permissions = orjson.dumps(
+        user.get('permissions') or {}, default=str, option=orjson.OPT_SORT_KEYS
+    )
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(str(user['id']).encode())
+    digest.update(permissions)
+    digest.update(str(usage_key).encode())
+    return digest.hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match vergelijking (RFC 9110: zwakke vergelijking)
+    Ondersteunt '*', lijsten ('"a", "b"') en W/ prefixen
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Begrensde LRU-cache van gerenderde responsebodies (bytes) met hun ETag
+
+    Entries voor oude versies blijven staan tot ze uit de LRU vallen; ze worden
+    niet meer opgevraagd omdat de versie in de sleutel zit.
+    max_size=0 schakelt de cache uit (ETags en 304's blijven werken).
+    """
+
+    def __init__(self, max_size: int = 5000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[str, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, bytes]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, etag: str, body: bytes) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (etag, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "not_modified": self.not_modified,
+        }
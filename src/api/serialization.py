@@ -0,0 +1,48 @@
+"""
+Snelle JSON-serialisatie voor vertrouwde databaserijen
+asyncpg Records gaan rechtstreeks naar JSON bytes via orjson, zonder tussenstap
+via Pydantic modellen en zonder hervalidatie door response_model
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Tuple
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from src.api.instrumentation import serialization_timer
+
+
+def _default(value: Any) -> Any:
+    """Types die orjson zelf niet kent (asyncpg Record, Decimal, Pydantic modellen)"""
+    if hasattr(value, "items") and hasattr(value, "keys"):
+        return dict(value.items())
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type {type(value).__name__} is niet JSON-serialiseerbaar")
+
+
+def dumps(content: Any) -> bytes:
+    with serialization_timer():
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def project(record, fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """Beperk een rij tot de velden van het responsemodel (zelfde vorm, geen validatie)"""
+    return {field: record.get(field) for field in fields}
+
+
+def project_all(records: Iterable, fields: Tuple[str, ...]) -> list:
+    return [{field: r.get(field) for field in fields} for r in records]
+
+
+class FastJSONResponse(Response):
+    """JSON response die records en modellen direct met orjson serialiseert"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,271 @@
+"""
+Centraal register van benoemde SQL statements voor het leespad
+Alle statements worden via de pool init-hook op iedere nieuwe verbinding
+voorbereid, zodat de eerste requests op een verse worker geen Parse/Describe
+round trips meer betalen. De zoekvarianten worden vooraf opgesomd.
+
+Aanroepers gebruiken de constanten hieronder met gewone conn.fetch/fetchrow/...;
+PreparedConnection herkent exact dezelfde querytekst en voert het voorbereide
+statement uit (publieke conn.prepare(), één register per verbinding).
+"""
+
+import itertools
+import logging
+from typing import Any, Dict, Tuple
+
+import asyncpg
+from asyncpg.prepared_stmt import PreparedStatement
+
+logger = logging.getLogger(__name__)
+
+REGISTRY: Dict[str, str] = {}
+
+
+def statement(name: str, sql: str) -> str:
+    """Registreer een statement onder een logische naam en geef de SQL terug"""
+    if name in REGISTRY and REGISTRY[name] != sql:
+        raise ValueError(f"Statement {name} is al geregistreerd met andere SQL")
+    REGISTRY[name] = sql
+    return sql
+
+
+# ============================================
+# AUTHENTICATIE
+# ============================================
+
+PRINCIPAL_USER = statement("principal_user", """
+    SELECT u.*, d.name as department_name, o.name as organization_name
+    FROM users u
+    JOIN departments d ON u.department_id = d.id
+    JOIN organizations o ON d.organization_id = o.id
+    WHERE u.id = $1 AND u.active = true
+""")
+
+PRINCIPAL_PERMISSIONS = statement("principal_permissions", """
+    SELECT r.name, r.permissions
+    FROM user_roles ur
+    JOIN roles r ON ur.role_id = r.id
+    WHERE ur.user_id = $1
+    AND (ur.valid_until IS NULL OR ur.valid_until > CURRENT_TIMESTAMP)
+""")
+
+CONTEXT_PERMISSIONS = statement("get_context_permissions", """
+    SELECT
+        bool_or(r.permissions->>'can_read' = 'true') as can_read,
+        bool_or(r.permissions->>'can_write' = 'true') as can_write,
+        bool_or(r.permissions->>'can_delete' = 'true') as can_delete,
+        bool_or(r.permissions->>'can_share' = 'true') as can_share
+    FROM user_roles ur
+    JOIN roles r ON ur.role_id = r.id
+    WHERE ur.user_id = $1
+    AND (ur.valid_until IS NULL OR ur.valid_until > CURRENT_TIMESTAMP)
+""")
+
+# ============================================
+# CONTEXT
+# ============================================
+
+FETCH_DOMAIN = statement("fetch_domain", """
+    SELECT * FROM information_domains WHERE id = $1
+""")
+
+FETCH_DOMAIN_TYPE = statement("fetch_domain_type", """
+    SELECT type FROM information_domains WHERE id = $1
+""")
+
+# Domein en versie in één snapshot; version is NULL zonder versierij
+FETCH_DOMAIN_WITH_VERSION = statement("fetch_domain_with_version", """
+    SELECT d.*, v.version AS domain_version
+    FROM information_domains d
+    LEFT JOIN domain_versions v ON v.domain_id = d.id
+    WHERE d.id = $1
+""")
+
+FETCH_RELATED_DOMAINS = statement("fetch_related_domains", """
+    SELECT id.*, dr.relation_type
+    FROM domain_relations dr
+    JOIN information_domains id ON dr.to_domain_id = id.id
+    WHERE dr.from_domain_id = $1
+    LIMIT 10
+""")
+
+FETCH_RECENT_OBJECTS = statement("fetch_recent_objects", """
+    SELECT * FROM v_enriched_information_objects
+    WHERE domain_id = $1
+    ORDER BY created_at DESC
+    LIMIT 20
+""")
+
+FETCH_STAKEHOLDERS = statement("fetch_stakeholders", """
+    SELECT s.*, ds.role
+    FROM domain_stakeholders ds
+    JOIN stakeholders s ON ds.stakeholder_id = s.id
+    WHERE ds.domain_id = $1
+""")
+
+# ============================================
+# BATCH CONTEXT
+# ============================================
+
+FETCH_DOMAINS_BATCH = statement("fetch_domains_batch", """
+    SELECT * FROM information_domains WHERE id = ANY($1::uuid[])
+""")
+
+FETCH_RELATED_DOMAINS_BATCH = statement("fetch_related_domains_batch", """
+    SELECT * FROM (
+        SELECT id.*, dr.relation_type, dr.from_domain_id as context_domain_id,
+            row_number() OVER (PARTITION BY dr.from_domain_id) as rn
+        FROM domain_relations dr
+        JOIN information_domains id ON dr.to_domain_id = id.id
+        WHERE dr.from_domain_id = ANY($1::uuid[])
+    ) related
+    WHERE rn <= 10
+""")
+
+FETCH_RECENT_OBJECTS_BATCH = statement("fetch_recent_objects_batch", """
+    SELECT * FROM (
+        SELECT *,
+            row_number() OVER (PARTITION BY domain_id ORDER BY created_at DESC) as rn
+        FROM v_enriched_information_objects
+        WHERE domain_id = ANY($1::uuid[])
+    ) recent
+    WHERE rn <= 20
+    ORDER BY domain_id, created_at DESC
+""")
+
+FETCH_STAKEHOLDERS_BATCH = statement("fetch_stakeholders_batch", """
+    SELECT s.*, ds.role, ds.domain_id as context_domain_id
+    FROM domain_stakeholders ds
+    JOIN stakeholders s ON ds.stakeholder_id = s.id
+    WHERE ds.domain_id = ANY($1::uuid[])
+""")
+
+# ============================================
+# SEARCH
+# ============================================
+
+# (compact, domain_id, object_type, cursor, limit) → SQL
+SearchVariant = Tuple[bool, bool, bool, bool, bool]
+
+
+def search_sql(compact: bool, by_domain: bool, by_object_type: bool, after: bool, limited: bool) -> str:
+    """
+    Zoekquery met rank als kolom, zodat op (rank, id) gepagineerd kan worden
+    Parameters in vaste volgorde: q, organisaties, [domain_id], [object_type], [rank, id], [limit]
+    """
+    if compact:
+        columns = """
+            io.id, io.title,
+            ts_headline('dutch', io.title, to_tsquery('dutch', $1)) as snippet
+        """
+    else:
+        columns = "io.*, id.name as domain_name, id.type as domain_type"
+
+    query = f"""
+        SELECT * FROM (
+            SELECT {columns},
+                ts_rank(io.full_text_search, to_tsquery('dutch', $1)) as rank
+            FROM information_objects io
+            JOIN information_domains id ON io.domain_id = id.id
+            WHERE io.full_text_search @@ to_tsquery('dutch', $1)
+            AND id.organization_id = ANY($2::uuid[])
+    """
+    position = 2
+
+    if by_domain:
+        position += 1
+        query += f" AND io.domain_id = ${position}"
+
+    if by_object_type:
+        position += 1
+        query += f" AND io.object_type = ${position}"
+
+    query += ") ranked"
+
+    if after:
+        query += f" WHERE (rank, id) < (${position + 1}::real, ${position + 2}::uuid)"
+        position += 2
+
+    query += " ORDER BY rank DESC, id DESC"
+
+    if limited:
+        position += 1
+        query += f" LIMIT ${position}"
+
+    return query
+
+
+SEARCH_STATEMENTS: Dict[SearchVariant, str] = {
+    variant: statement("search_" + "".join("1" if flag else "0" for flag in variant), search_sql(*variant))
+    for variant in itertools.product((False, True), repeat=5)
+}
+
+# ============================================
+# WARM-UP
+# ============================================
+
+# Een voorbereid statement is ongeldig geworden (schemawijziging); opnieuw voorbereiden
+STALE_STATEMENT_ERRORS = (
+    asyncpg.exceptions.InvalidCachedStatementError,
+    asyncpg.exceptions.OutdatedSchemaCacheError,
+)
+
+
+class PreparedConnection(asyncpg.Connection):
+    """
+    Verbinding met een register van voorbereide statements (querytekst → PreparedStatement)
+    fetch/fetchrow/fetchval/cursor met een geregistreerde querytekst gebruiken het
+    voorbereide statement; andere queries gaan zoals altijd via de statement cache.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: Dict[str, PreparedStatement] = {}
+
+    async def fetch(self, query, *args, timeout=None, record_class=None):
+        if query in self.prepared and record_class is None:
+            return await self._run_prepared(query, "fetch", args, timeout=timeout)
+        return await super().fetch(query, *args, timeout=timeout, record_class=record_class)
+
+    async def fetchrow(self, query, *args, timeout=None, record_class=None):
+        if query in self.prepared and record_class is None:
+            return await self._run_prepared(query, "fetchrow", args, timeout=timeout)
+        return await super().fetchrow(query, *args, timeout=timeout, record_class=record_class)
+
+    async def fetchval(self, query, *args, column=0, timeout=None):
+        if query in self.prepared:
+            return await self._run_prepared(query, "fetchval", args, column=column, timeout=timeout)
+        return await super().fetchval(query, *args, column=column, timeout=timeout)
+
+    def cursor(self, query, *args, prefetch=None, timeout=None, record_class=None):
+        statement = self.prepared.get(query)
+        if statement is not None and record_class is None:
+            return statement.cursor(*args, prefetch=prefetch, timeout=timeout)
+        return super().cursor(query, *args, prefetch=prefetch, timeout=timeout, record_class=record_class)
+
+    async def _run_prepared(self, query: str, method: str, args: tuple, **kwargs) -> Any:
+        try:
+            return await getattr(self.prepared[query], method)(*args, **kwargs)
+        except STALE_STATEMENT_ERRORS:
+            # Binnen een transactie is die al afgebroken; de aanroeper moet opnieuw beginnen
+            del self.prepared[query]
+            if self.is_in_transaction():
+                raise
+            self.prepared[query] = await self.prepare(query)
+            return await getattr(self.prepared[query], method)(*args, **kwargs)
+
+
+async def prepare_statements(conn: asyncpg.Connection) -> None:
+    """
+    Pool init-hook (met connection_class=PreparedConnection of een subklasse): bereid
+    alle geregistreerde statements voor met conn.prepare(). Een statement dat niet
+    voorbereid kan worden (bijv. een ontbrekende view) wordt gelogd en overgeslagen;
+    de verbinding blijft bruikbaar.
+    """
+    if not isinstance(conn, PreparedConnection):
+        raise TypeError("prepare_statements vereist connection_class=PreparedConnection")
+    for name, sql in REGISTRY.items():
+        try:
+            conn.prepared[sql] = await conn.prepare(sql)
+        except asyncpg.PostgresError as e:
+            logger.warning("Statement %s niet voorbereid: %s", name, e)
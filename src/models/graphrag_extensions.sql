@@ -340,6 +340,11 @@ EXECUTE FUNCTION update_entity_source_count();
 CREATE OR REPLACE FUNCTION queue_new_document_for_graphrag()
 RETURNS TRIGGER AS $$
 BEGIN
+    -- Bulk ingest (POST /objects/bulk) vult de queue set-based
+    IF current_setting('iou.bulk_ingest', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
+
     -- Queue entity extraction
     INSERT INTO graphrag_processing_queue (object_id, processing_type, priority)
     VALUES (NEW.id, 'ENTITY_EXTRACTION', 7);
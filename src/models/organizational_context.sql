@@ -49,6 +49,16 @@ CREATE TABLE user_roles (
     PRIMARY KEY (user_id, role_id)
 );
 
+-- Gematerialiseerde toegangsindex: tot welke organisaties (en daarmee domeinen)
+-- heeft een gebruiker toegang. Incrementeel bijgehouden via triggers.
+CREATE TABLE user_organization_access (
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    organization_id UUID NOT NULL REFERENCES organizations(id) ON DELETE CASCADE,
+    PRIMARY KEY (user_id, organization_id)
+);
+
+CREATE INDEX idx_user_org_access_org ON user_organization_access(organization_id);
+
 -- ============================================
 -- 2. INFORMATIEDOMEINEN (Context)
 -- ============================================
@@ -168,6 +178,14 @@ CREATE TABLE domain_relations (
     PRIMARY KEY (from_domain_id, to_domain_id, relation_type)
 );
 
+-- Versie per domein: opgehoogd bij iedere wijziging die de context van het domein raakt
+-- Basis voor ETags en de response cache van GET /context/{domain_id}
+CREATE TABLE domain_versions (
+    domain_id UUID PRIMARY KEY REFERENCES information_domains(id) ON DELETE CASCADE,
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- ============================================
 -- 5. REGELSET (Compliance by Design)
 -- ============================================
@@ -255,6 +273,33 @@ CREATE TABLE ai_metadata_suggestions (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Memoization van extractieresultaten per inhoud (zie src/services/suggestion_cache.py):
+-- identieke documenten (her-upload, kopie in een ander domein) worden één keer geëxtraheerd.
+-- Een nieuwe extractorversie matcht de oude rijen niet meer; ze worden na METADATA_CACHE_STALE_DAYS
+-- verwijderd (niet direct, zodat de vorige versie tijdens een rolling deploy haar cache houdt).
+CREATE TABLE ai_metadata_cache (
+    content_sha256 VARCHAR(64) NOT NULL,
+    extractor_version VARCHAR(50) NOT NULL,
+    suggestions JSONB NOT NULL, -- {suggestions: [{field, value, confidence, reasoning}], tag_candidates: {term: tf}}
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (content_sha256, extractor_version)
+);
+
+-- Corpus stats voor tag-generatie (TF-IDF, zie src/services/tag_engine.py):
+-- document frequency per woord/bigram; workers tellen hun delta's periodiek op
+CREATE TABLE tag_term_stats (
+    term TEXT PRIMARY KEY,
+    document_frequency INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE tag_corpus_stats (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id), -- precies één rij
+    document_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO tag_corpus_stats (id, document_count) VALUES (TRUE, 0);
+
 CREATE TABLE ai_context_vectors (
     domain_id UUID PRIMARY KEY REFERENCES information_domains(id),
     embedding VECTOR(1536), -- Voor semantic search (bijv. OpenAI embeddings)
@@ -265,8 +310,11 @@ CREATE TABLE ai_context_vectors (
 -- 8. AUDIT & TRANSPARANTIE
 -- ============================================
 
+-- Gepartitioneerd per maand: queries met een tijdvenster raken alleen de betreffende
+-- partities, en retentie is een DETACH + archiveren in plaats van een trage DELETE
+-- (zie src/api/audit_partitions.py). De partitiesleutel zit daarom in de primary key.
 CREATE TABLE audit_log (
-    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
     user_id UUID REFERENCES users(id),
     action VARCHAR(100) NOT NULL, -- 'create', 'read', 'update', 'delete', 'access'
     object_type VARCHAR(50),
@@ -274,12 +322,60 @@ CREATE TABLE audit_log (
     domain_id UUID REFERENCES information_domains(id),
     ip_address INET,
     metadata JSONB,
-    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- Vangnet voor events buiten de aangemaakte maanden; ensure_audit_partitions haalt
+-- rijen hier weg zodra hun maand een eigen partitie krijgt
+CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT;
+
+-- Samengestelde indexen voor gebruiker/domein binnen een tijdvenster; op de tijd zelf
+-- volstaat BRIN (append-only), wat inserts goedkoper houdt dan een derde B-tree
+CREATE INDEX idx_audit_user ON audit_log(user_id, timestamp);
+CREATE INDEX idx_audit_domain ON audit_log(domain_id, timestamp);
+CREATE INDEX idx_audit_timestamp ON audit_log USING BRIN(timestamp);
+
+-- Maakt maandpartities audit_log_yYYYYmMM aan vanaf de maand van p_from tot en met
+-- p_months_ahead maanden na de huidige. Nieuwe partities worden los aangemaakt en daarna
+-- gekoppeld (ATTACH neemt een lichtere lock dan CREATE ... PARTITION OF); rijen uit de
+-- default partitie voor die maand worden eerst verplaatst. Geeft het aantal nieuwe partities.
+CREATE OR REPLACE FUNCTION ensure_audit_partitions(p_from DATE, p_months_ahead INTEGER DEFAULT 3)
+RETURNS INTEGER AS $$
+DECLARE
+    v_month DATE := date_trunc('month', p_from)::date;
+    v_last DATE := (date_trunc('month', CURRENT_DATE) + make_interval(months => p_months_ahead))::date;
+    v_next DATE;
+    v_name TEXT;
+    v_created INTEGER := 0;
+BEGIN
+    WHILE v_month <= v_last LOOP
+        v_next := (v_month + INTERVAL '1 month')::date;
+        v_name := format('audit_log_y%sm%s', to_char(v_month, 'YYYY'), to_char(v_month, 'MM'));
+
+        IF to_regclass(v_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I (LIKE audit_log INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_name);
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM audit_log_default WHERE timestamp >= %L AND timestamp < %L RETURNING *)
+                 INSERT INTO %I SELECT * FROM moved',
+                v_month, v_next, v_name
+            );
+            EXECUTE format(
+                'ALTER TABLE audit_log ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                v_name, v_month, v_next
+            );
+            v_created := v_created + 1;
+        END IF;
+
+        v_month := v_next;
+    END LOOP;
+
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
 
-CREATE INDEX idx_audit_user ON audit_log(user_id);
-CREATE INDEX idx_audit_domain ON audit_log(domain_id);
-CREATE INDEX idx_audit_timestamp ON audit_log(timestamp);
+-- Vorig jaar tot drie maanden vooruit; daarna houdt de service dit bij
+SELECT ensure_audit_partitions((CURRENT_DATE - INTERVAL '12 months')::date, 3);
 
 -- ============================================
 -- 9. VIEWS VOOR GEBRUIKSGEMAK
@@ -321,39 +417,205 @@ ORDER BY total_usage DESC;
 -- 10. FUNCTIES VOOR REGELTOEPASSING
 -- ============================================
 
--- Functie om automatisch metadata toe te passen op basis van regelset
-CREATE OR REPLACE FUNCTION apply_business_rules()
+-- Regeltoepassing gebeurt in de API (RuleEngine, zie src/services/rule_engine.py): alleen regels
+-- waarvan de condities matchen komen in rule_executions, voor POST /objects én de bulk ingest.
+-- De vroegere per-rij trigger (trigger_apply_rules) las per insert alle regels en registreerde
+-- iedere regel van het objecttype, ook zonder match; bestaande databases:
+--     DROP TRIGGER IF EXISTS trigger_apply_rules ON information_objects;
+--     DROP FUNCTION IF EXISTS apply_business_rules();
+
+-- Functie om de gecompileerde regelset in de API te herladen (LISTEN business_rules_changed)
+CREATE OR REPLACE FUNCTION notify_business_rules_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('business_rules_changed', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_notify_business_rules_change
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON business_rules
+FOR EACH STATEMENT
+EXECUTE FUNCTION notify_business_rules_change();
+
+-- Functie om de app-gebruiktellers in de API bij te werken (LISTEN app_usage_changed)
+-- Payload 'txid:user_id:app_id:delta' bij gebruik, leeg bij gewijzigde apps; met de txid
+-- bepaalt de API of een delta al in de snapshot van een herlaadronde zat
+CREATE OR REPLACE FUNCTION notify_app_usage_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_TABLE_NAME <> 'user_app_usage' THEN
+        PERFORM pg_notify('app_usage_changed', '');
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('app_usage_changed',
+            txid_current()::text || ':' || OLD.user_id::text || ':' || OLD.app_id::text || ':' ||
+            (-COALESCE(OLD.usage_count, 0))::text);
+    ELSE
+        PERFORM pg_notify('app_usage_changed',
+            txid_current()::text || ':' || NEW.user_id::text || ':' || NEW.app_id::text || ':' ||
+            (COALESCE(NEW.usage_count, 0) - COALESCE(OLD.usage_count, 0))::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Bestaande databases: DROP TRIGGER IF EXISTS trigger_notify_app_usage ON user_app_usage;
+CREATE TRIGGER trigger_notify_app_usage
+AFTER INSERT OR UPDATE OF usage_count OR DELETE ON user_app_usage
+FOR EACH ROW
+EXECUTE FUNCTION notify_app_usage_change();
+
+CREATE TRIGGER trigger_notify_apps_change
+AFTER INSERT OR UPDATE OR DELETE ON apps
+FOR EACH STATEMENT
+EXECUTE FUNCTION notify_app_usage_change();
+
+-- Functies om domain_versions op te hogen bij wijzigingen in de context
+CREATE OR REPLACE FUNCTION bump_domain_version(p_domain_id UUID)
+RETURNS VOID AS $$
+    INSERT INTO domain_versions (domain_id) VALUES (p_domain_id)
+    ON CONFLICT (domain_id) DO UPDATE
+    SET version = domain_versions.version + 1,
+        updated_at = CURRENT_TIMESTAMP;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION bump_domain_version_trigger()
 RETURNS TRIGGER AS $$
 DECLARE
-    rule RECORD;
+    row_data RECORD;
 BEGIN
-    -- Loop door alle actieve regels die van toepassing zijn
-    FOR rule IN
-        SELECT * FROM business_rules
-        WHERE active = true
-        AND (valid_from IS NULL OR valid_from <= CURRENT_DATE)
-        AND (valid_until IS NULL OR valid_until >= CURRENT_DATE)
-        AND NEW.object_type = ANY(applies_to_object_types)
-    LOOP
-        -- Hier zou de regellogica worden toegepast
-        -- Dit is vereenvoudigd; in productie zou dit complexer zijn
-        INSERT INTO rule_executions (rule_id, object_id, success, execution_result)
-        VALUES (rule.id, NEW.id, true, '{"applied": true}'::jsonb);
-    END LOOP;
+    IF TG_OP = 'DELETE' THEN
+        row_data := OLD;
+    ELSE
+        row_data := NEW;
+    END IF;
+
+    IF TG_TABLE_NAME = 'information_objects' THEN
+        -- Bulk ingest hoogt de versies per chunk set-based op
+        IF current_setting('iou.bulk_ingest', true) = 'on' THEN
+            RETURN NULL;
+        END IF;
+        PERFORM bump_domain_version(row_data.domain_id);
+        IF TG_OP = 'UPDATE' AND OLD.domain_id IS DISTINCT FROM NEW.domain_id THEN
+            PERFORM bump_domain_version(OLD.domain_id);
+        END IF;
+    ELSIF TG_TABLE_NAME = 'domain_relations' THEN
+        PERFORM bump_domain_version(row_data.from_domain_id);
+    ELSIF TG_TABLE_NAME = 'domain_stakeholders' THEN
+        PERFORM bump_domain_version(row_data.domain_id);
+    ELSIF TG_TABLE_NAME = 'information_domains' THEN
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM bump_domain_version(row_data.id);
+        END IF;
+        -- Domeinen die naar dit domein verwijzen tonen het als gerelateerd domein
+        PERFORM bump_domain_version(dr.from_domain_id)
+        FROM domain_relations dr
+        WHERE dr.to_domain_id = row_data.id AND TG_OP = 'UPDATE';
+    ELSIF TG_TABLE_NAME = 'stakeholders' THEN
+        PERFORM bump_domain_version(ds.domain_id)
+        FROM domain_stakeholders ds
+        WHERE ds.stakeholder_id = row_data.id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
 
-    RETURN NEW;
+CREATE TRIGGER trigger_version_information_objects
+AFTER INSERT OR UPDATE OR DELETE ON information_objects
+FOR EACH ROW
+EXECUTE FUNCTION bump_domain_version_trigger();
+
+CREATE TRIGGER trigger_version_domain_relations
+AFTER INSERT OR UPDATE OR DELETE ON domain_relations
+FOR EACH ROW
+EXECUTE FUNCTION bump_domain_version_trigger();
+
+CREATE TRIGGER trigger_version_domain_stakeholders
+AFTER INSERT OR UPDATE OR DELETE ON domain_stakeholders
+FOR EACH ROW
+EXECUTE FUNCTION bump_domain_version_trigger();
+
+CREATE TRIGGER trigger_version_information_domains
+AFTER INSERT OR UPDATE ON information_domains
+FOR EACH ROW
+EXECUTE FUNCTION bump_domain_version_trigger();
+
+CREATE TRIGGER trigger_version_stakeholders
+AFTER UPDATE ON stakeholders
+FOR EACH ROW
+EXECUTE FUNCTION bump_domain_version_trigger();
+
+-- Deltas voor de context stream (LISTEN context_changed, GET /context:stream)
+-- Payload JSON met domain_id, kind en de gewijzigde rij in het kort (ruim onder 8000 bytes)
+CREATE OR REPLACE FUNCTION notify_context_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    row_data RECORD;
+    payload JSON;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := OLD;
+    ELSE
+        row_data := NEW;
+    END IF;
+
+    IF TG_TABLE_NAME = 'information_objects' THEN
+        -- Bulk ingest stuurt één event per domein
+        IF current_setting('iou.bulk_ingest', true) = 'on' THEN
+            RETURN NULL;
+        END IF;
+        payload := json_build_object(
+            'domain_id', row_data.domain_id, 'kind', 'object', 'op', TG_OP,
+            'id', row_data.id, 'object_type', row_data.object_type,
+            'title', left(row_data.title, 200), 'classification', row_data.classification
+        );
+    ELSIF TG_TABLE_NAME = 'domain_relations' THEN
+        payload := json_build_object(
+            'domain_id', row_data.from_domain_id, 'kind', 'relation', 'op', TG_OP,
+            'to_domain_id', row_data.to_domain_id, 'relation_type', row_data.relation_type
+        );
+    ELSE
+        payload := json_build_object(
+            'domain_id', row_data.domain_id, 'kind', 'stakeholder', 'op', TG_OP,
+            'stakeholder_id', row_data.stakeholder_id, 'role', row_data.role
+        );
+    END IF;
+
+    PERFORM pg_notify('context_changed', payload::text);
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
-CREATE TRIGGER trigger_apply_rules
-AFTER INSERT ON information_objects
+CREATE TRIGGER trigger_notify_context_information_objects
+AFTER INSERT OR UPDATE OR DELETE ON information_objects
+FOR EACH ROW
+EXECUTE FUNCTION notify_context_change();
+
+CREATE TRIGGER trigger_notify_context_domain_relations
+AFTER INSERT OR UPDATE OR DELETE ON domain_relations
+FOR EACH ROW
+EXECUTE FUNCTION notify_context_change();
+
+CREATE TRIGGER trigger_notify_context_domain_stakeholders
+AFTER INSERT OR UPDATE OR DELETE ON domain_stakeholders
 FOR EACH ROW
-EXECUTE FUNCTION apply_business_rules();
+EXECUTE FUNCTION notify_context_change();
+
+-- Bestaande domeinen (bijv. bij migratie) krijgen een startversie
+INSERT INTO domain_versions (domain_id)
+SELECT id FROM information_domains
+ON CONFLICT (domain_id) DO NOTHING;
 
 -- Functie voor automatische full-text search vector
 CREATE OR REPLACE FUNCTION update_fts_vector()
 RETURNS TRIGGER AS $$
 BEGIN
+    -- Bulk ingest berekent de vector al in de INSERT ... SELECT
+    IF current_setting('iou.bulk_ingest', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
+
     NEW.full_text_search := to_tsvector('dutch',
         coalesce(NEW.title, '') || ' ' ||
         coalesce(array_to_string(NEW.tags, ' '), '')
@@ -367,6 +629,121 @@ BEFORE INSERT OR UPDATE ON information_objects
 FOR EACH ROW
 EXECUTE FUNCTION update_fts_vector();
 
+-- Functie om de principal-cache van de API te invalideren (LISTEN principal_changed)
+-- Payload: user_id, of leeg bij een gewijzigde rol (raakt alle gebruikers)
+CREATE OR REPLACE FUNCTION notify_principal_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed_user UUID;
+BEGIN
+    IF TG_TABLE_NAME = 'users' THEN
+        changed_user := COALESCE(NEW.id, OLD.id);
+    ELSIF TG_TABLE_NAME = 'user_roles' THEN
+        IF TG_OP = 'DELETE' THEN
+            changed_user := OLD.user_id;
+        ELSE
+            changed_user := NEW.user_id;
+        END IF;
+    END IF;
+
+    PERFORM pg_notify('principal_changed', COALESCE(changed_user::text, ''));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_notify_users_change
+AFTER UPDATE OR DELETE ON users
+FOR EACH ROW
+EXECUTE FUNCTION notify_principal_change();
+
+CREATE TRIGGER trigger_notify_user_roles_change
+AFTER INSERT OR UPDATE OR DELETE ON user_roles
+FOR EACH ROW
+EXECUTE FUNCTION notify_principal_change();
+
+CREATE TRIGGER trigger_notify_roles_change
+AFTER UPDATE OR DELETE ON roles
+FOR EACH STATEMENT
+EXECUTE FUNCTION notify_principal_change();
+
+-- Functie om user_organization_access bij te werken wanneer een gebruiker
+-- van afdeling wisselt; de API ververst daarna zijn in-memory index
+-- (LISTEN domain_access_changed, payload 'user:<id>', 'domain:<id>' of leeg = alles)
+CREATE OR REPLACE FUNCTION refresh_user_organization_access()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.department_id IS NOT DISTINCT FROM OLD.department_id THEN
+        RETURN NULL;
+    END IF;
+
+    DELETE FROM user_organization_access WHERE user_id = NEW.id;
+
+    INSERT INTO user_organization_access (user_id, organization_id)
+    SELECT NEW.id, d.organization_id
+    FROM departments d
+    WHERE d.id = NEW.department_id;
+
+    PERFORM pg_notify('domain_access_changed', 'user:' || NEW.id::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_refresh_user_access
+AFTER INSERT OR UPDATE OF department_id ON users
+FOR EACH ROW
+EXECUTE FUNCTION refresh_user_organization_access();
+
+-- Afdeling verhuist naar andere organisatie: alle medewerkers herberekenen
+CREATE OR REPLACE FUNCTION refresh_department_organization_access()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.organization_id IS NOT DISTINCT FROM OLD.organization_id THEN
+        RETURN NULL;
+    END IF;
+
+    DELETE FROM user_organization_access uoa
+    USING users u
+    WHERE uoa.user_id = u.id AND u.department_id = NEW.id;
+
+    INSERT INTO user_organization_access (user_id, organization_id)
+    SELECT u.id, NEW.organization_id
+    FROM users u
+    WHERE u.department_id = NEW.id;
+
+    PERFORM pg_notify('domain_access_changed', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_refresh_department_access
+AFTER UPDATE OF organization_id ON departments
+FOR EACH ROW
+EXECUTE FUNCTION refresh_department_organization_access();
+
+-- Domein verhuist naar andere organisatie
+CREATE OR REPLACE FUNCTION notify_domain_organization_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.organization_id IS DISTINCT FROM OLD.organization_id THEN
+        PERFORM pg_notify('domain_access_changed', 'domain:' || NEW.id::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_notify_domain_org_change
+AFTER UPDATE OF organization_id ON information_domains
+FOR EACH ROW
+EXECUTE FUNCTION notify_domain_organization_change();
+
+-- Bestaande gebruikers (bijv. bij migratie) krijgen hun toegang; de trigger vult
+-- user_organization_access pas bij de volgende insert of afdelingswissel
+INSERT INTO user_organization_access (user_id, organization_id)
+SELECT u.id, d.organization_id
+FROM users u
+JOIN departments d ON u.department_id = d.id
+ON CONFLICT DO NOTHING;
+
 -- ============================================
 -- 11. INDEXEN VOOR PERFORMANCE
 -- ============================================
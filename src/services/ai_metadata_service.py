@@ -3,13 +3,24 @@ AI-gedreven Metadata Extractie en Context Herkenning
 Implementatie van AI-componenten voor IOU-concept
 """
 
-from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, AsyncIterator, Union
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
 from datetime import datetime
 import asyncio
+import hashlib
 import json
+import multiprocessing
+import os
 import re
 
+from asyncpg.pool import Pool
+
+from src.services.keyword_scanner import KeywordHits, KeywordScanner
+from src.services.suggestion_cache import SuggestionCache, content_checksum
+from src.services.tag_engine import TagEngine
+
 # Voor productie: OpenAI, Azure OpenAI, of local models
 # Voor demo: simulatie van AI-functionaliteit
 
@@ -31,6 +42,203 @@ class ContextDetection:
     locations: List[str]
     confidence: float
 
+# ============================================
+# TREFWOORDTABELLEN
+# Alle trefwoorden lowercase; ze gaan samen in één Aho-Corasick automaat
+# ============================================
+
+# Keyword mapping naar domeinen
+SUBJECT_KEYWORDS = {
+    "mobiliteit": ["verkeer", "auto", "fiets", "ov", "openbaar vervoer", "weg"],
+    "duurzaamheid": ["circulair", "duurzaam", "energie", "milieu", "klimaat", "co2"],
+    "economie": ["subsidie", "bedrijf", "economisch", "werkgelegenheid", "investering"],
+    "ruimte": ["ruimtelijk", "bestemmingsplan", "bouw", "woning", "ontwikkeling"],
+    "sociaal": ["zorg", "welzijn", "jeugd", "onderwijs", "participatie"]
+}
+
+# Per wet de schrijfwijzen; de eerste vermelding in het document wordt overgenomen
+LEGAL_REFERENCES = [
+    ("Algemene wet bestuursrecht", "Awb"),
+    ("Wet open overheid", "Woo"),
+    ("Algemene verordening gegevensbescherming", "AVG"),
+    ("Archiefwet",),
+    ("Omgevingswet",),
+    ("Wet milieubeheer",),
+]
+
+WOO_INDICATORS = [
+    "raadsvoorstel", "besluit", "advies", "bestuurlijk",
+    "beleidsvoorstel", "collegevoorstel", "bestuursopdracht"
+]
+
+CONFIDENTIAL_INDICATORS = [
+    "vertrouwelijk", "geheim", "confidential", "niet voor publicatie",
+    "bsn", "persoonsgegeven", "privacy"
+]
+
+PUBLIC_INDICATORS = [
+    "openbaar", "public", "publicatie", "bekendmaking"
+]
+
+# Mapping van documenttypes naar bewaartermijnen (volgens Archiefwet); eerste treffer wint
+RETENTION_RULES = {
+    "besluit": (20, "Besluiten: 20 jaar conform Archiefwet"),
+    "raadsvoorstel": (20, "Raadsvoorstellen: 20 jaar"),
+    "advies": (7, "Adviezen: 7 jaar"),
+    "subsidie": (7, "Subsidiedossiers: 7 jaar na afronding"),
+    "contract": (7, "Contracten: 7 jaar na afloop"),
+    "correspondentie": (5, "Reguliere correspondentie: 5 jaar"),
+}
+
+# Plaatsnamen worden hoofdlettergevoelig gecontroleerd
+DUTCH_CITIES = ["Amsterdam", "Rotterdam", "Utrecht", "Eindhoven", "Groningen",
+                "Almere", "Lelystad", "Dronten", "Flevoland"]
+
+PERSON_PATTERN = re.compile(r'\b[A-Z][a-z]+ [A-Z][a-z]+\b')
+# Woorden en losse leestekens/cijfers; die laatste (en korte woorden en stopwoorden)
+# breken een bigram af
+TAG_TOKEN_PATTERN = re.compile(r'[a-zà-ÿ]+|[^\sa-zà-ÿ]')
+TAG_MIN_LENGTH = 4
+TAG_STOPWORDS = {
+    "de", "het", "een", "van", "voor", "en", "in", "op", "is", "aan",
+    "alle", "alleen", "binnen", "daarom", "deze", "door", "hebben", "heeft", "hierbij",
+    "hierin", "kunnen", "maar", "meer", "moet", "moeten", "naar", "omdat", "onder",
+    "over", "tegen", "tussen", "vanuit", "waar", "wanneer", "welke", "werd", "worden",
+    "wordt", "zijn", "zoals", "zonder", "zouden", "zullen",
+}
+
+
+# Ophogen bij iedere wijziging in de extractielogica of het cacheformaat; wijzigingen in
+# de tabellen hierboven veranderen RULESET_VERSION vanzelf. Gecachte suggesties van een
+# andere versie worden niet meer gebruikt (zie SuggestionCache).
+EXTRACTOR_VERSION = "5"
+RULESET_VERSION = EXTRACTOR_VERSION + "-" + hashlib.blake2b(
+    json.dumps([
+        SUBJECT_KEYWORDS, LEGAL_REFERENCES, WOO_INDICATORS, CONFIDENTIAL_INDICATORS,
+        PUBLIC_INDICATORS, RETENTION_RULES, DUTCH_CITIES, PERSON_PATTERN.pattern,
+        TAG_TOKEN_PATTERN.pattern, TAG_MIN_LENGTH, sorted(TAG_STOPWORDS),
+    ]).encode(),
+    digest_size=8
+).hexdigest()
+
+
+def _all_keywords() -> List[str]:
+    keywords = [kw for kws in SUBJECT_KEYWORDS.values() for kw in kws]
+    keywords += [alias for aliases in LEGAL_REFERENCES for alias in aliases]
+    keywords += WOO_INDICATORS + CONFIDENTIAL_INDICATORS + PUBLIC_INDICATORS
+    keywords += list(RETENTION_RULES)
+    return keywords
+
+
+def count_terms(
+    lowered: str,
+    term_freq: Dict[str, int],
+    previous: Optional[str] = None,
+    start: int = 0,
+    end: Optional[int] = None
+) -> Optional[str]:
+    """
+    Tel woorden en bigrammen uit lowercase tekst (tot `end`) bij in term_freq
+    previous: laatste woord van de voorafgaande tekst, voor een bigram over de grens;
+    geeft het laatste woord terug (None als de tekst op een afbreker eindigt)
+    """
+    tokens = TAG_TOKEN_PATTERN.findall(lowered, start, len(lowered) if end is None else end)
+    for token in tokens:
+        if len(token) < TAG_MIN_LENGTH or token in TAG_STOPWORDS:
+            previous = None
+            continue
+        term_freq[token] = term_freq.get(token, 0) + 1
+        if previous is not None:
+            bigram = previous + " " + token
+            term_freq[bigram] = term_freq.get(bigram, 0) + 1
+        previous = token
+    return previous
+
+
+def object_terms(title: Optional[str], tags: Optional[Iterable[str]]) -> Dict[str, int]:
+    """
+    Termen van een informatieobject zoals het in information_objects staat (titel en tags),
+    voor de corpus stats van de tag-generatie; bigrammen lopen niet over een tag heen
+    """
+    term_freq: Dict[str, int] = {}
+    count_terms((title or "").lower(), term_freq)
+    for tag in tags or ():
+        count_terms(tag.lower(), term_freq)
+    return term_freq
+
+
+def _last_whitespace(text: str, start: int) -> int:
+    """Positie van de laatste witruimte vanaf `start`; -1 als die er niet is"""
+    for i in range(len(text) - 1, start - 1, -1):
+        if text[i].isspace():
+            return i
+    return -1
+
+
+class DocumentAccumulator:
+    """
+    Incrementele tellers voor één document dat in stukken binnenkomt (bijv. per pagina)
+
+    Ieder stuk wordt alleen tot de laatste witruimte verwerkt; de rest plus OVERLAP tekens
+    ervoor gaan mee naar het volgende stuk, zodat trefwoorden, namen en woorden over een
+    grens heen niet gemist of dubbel geteld worden (een treffer telt in het stuk waarin
+    hij eindigt). Geheugen is begrensd door de stukgrootte plus OVERLAP, niet door het
+    document; termfrequenties (woorden en bigrammen) groeien alleen met de woordenschat.
+    """
+
+    # Ruim boven het langste trefwoord en een voor- en achternaam
+    OVERLAP = 256
+    # Tekst zonder witruimte wordt hooguit zo lang vastgehouden, daarna hard afgebroken
+    MAX_TOKEN = 64 * 1024
+
+    def __init__(self, scanner: KeywordScanner):
+        self.scanner = scanner
+        self.hits = KeywordHits()
+        self.persons: List[str] = []
+        self.term_freq: Dict[str, int] = {}
+        self.length = 0
+        self._carry = ""
+        self._carry_offset = 0  # positie van _carry[0] in het document
+        self._accepted = 0  # treffers die vóór deze positie eindigen zijn geteld
+        self._person_pos = 0  # namen zoeken vanaf hier (einde van de vorige naam)
+        self._previous_word: Optional[str] = None  # voor een bigram over de stukgrens
+
+    def feed(self, chunk: str) -> None:
+        self.length += len(chunk)
+        self._process(self._carry + chunk, final=False)
+
+    def finish(self) -> "DocumentAccumulator":
+        self._process(self._carry, final=True)
+        self._carry = ""
+        return self
+
+    def _process(self, window: str, final: bool) -> None:
+        offset = self._carry_offset
+        lo = self._accepted - offset
+        hi = len(window) if final else _last_whitespace(window, lo + 1)
+        if hi < 0:
+            # Nog geen nieuwe witruimte: wachten op het volgende stuk, maar begrensd
+            hi = lo if len(window) - lo < self.MAX_TOKEN else len(window)
+
+        lowered = self.scanner.feed(self.hits, window, offset, lo, hi)
+
+        self._previous_word = count_terms(lowered, self.term_freq, self._previous_word, lo, hi)
+
+        if len(self.persons) < 5:
+            for match in PERSON_PATTERN.finditer(window, max(self._person_pos - offset, 0)):
+                if match.end() > hi or len(self.persons) == 5:
+                    break
+                if match.end() > lo:
+                    self.persons.append(match.group(0))
+                    self._person_pos = offset + match.end()
+
+        # Verder vanaf een witruimte binnen de laatste OVERLAP tekens, zodat \b klopt
+        start = max(hi - self.OVERLAP, 0)
+        boundary = next((i for i in range(start, hi) if window[i].isspace()), start)
+        self._carry = window[boundary:]
+        self._carry_offset = offset + boundary
+        self._accepted = offset + hi
+
 class AIMetadataService:
     """
     AI Service voor automatische metadata extractie en verrijking
@@ -42,14 +250,184 @@ class AIMetadataService:
     5. Compliance regel extractie
     """
 
-    def __init__(self, model_provider: str = "openai"):
+    def __init__(self, model_provider: str = "openai", max_workers: Optional[int] = None):
         self.model_provider = model_provider
         # In productie: initialiseer echte AI models
         # self.nlp_model = load_spacy_model("nl_core_news_lg")
         # self.embeddings_model = OpenAIEmbeddings()
-        pass
+        self.scanner = KeywordScanner(_all_keywords(), case_sensitive=DUTCH_CITIES)
+        # Processen voor extract_metadata_batch (0/leeg: één per CPU-core)
+        self.max_workers = (
+            max_workers
+            or int(os.getenv("METADATA_EXTRACTION_WORKERS") or 0)
+            or os.cpu_count()
+            or 1
+        )
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Suggesties per inhoud en corpus stats voor tags; persistent na await start(db_pool)
+        self.cache = SuggestionCache(
+            RULESET_VERSION,
+            max_size=int(os.getenv("METADATA_CACHE_MAX_SIZE", "10000")),
+            stale_days=int(os.getenv("METADATA_CACHE_STALE_DAYS", "7"))
+        )
+        self.tag_engine = TagEngine(
+            max_terms=int(os.getenv("TAG_ENGINE_MAX_TERMS", "1000000")),
+            flush_interval=float(os.getenv("TAG_STATS_FLUSH_INTERVAL_SECONDS", "30"))
+        )
+
+    async def start(self, pool: Pool) -> None:
+        """Persistente cache en tag stats aanzetten (warm starten vanuit de database)"""
+        await self.cache.attach(pool)
+        await self.tag_engine.start(pool, bootstrap=lambda row: object_terms(row["title"], row["tags"]))
+
+    def observe_object(self, title: str, tags: Optional[Iterable[str]]) -> None:
+        """Ingest-pad: tel een opgeslagen informatieobject mee in de corpus stats voor tags"""
+        self.tag_engine.observe(object_terms(title, tags))
+
+    async def stop(self) -> None:
+        await self.cache.detach()
+        await self.tag_engine.stop()
+        self.close()
 
     async def extract_metadata_from_document(
+        self,
+        content: Union[str, Iterable[str]],
+        filename: str,
+        existing_metadata: Optional[Dict] = None,
+        checksum: Optional[str] = None
+    ) -> List[MetadataSuggestion]:
+        """
+        Extract metadata uit één document, in dit proces, gememoïseerd op de inhoud
+        Puur CPU-werk dat de event loop blokkeert (alleen bij een cache miss); voor ingest
+        van veel of grote documenten: extract_metadata_batch
+
+        Sleutel: checksum + RULESET_VERSION (bevat EXTRACTOR_VERSION). checksum is de
+        SHA-256 van het bestand (information_objects.checksum); zonder wordt de SHA-256 van
+        de tekst gebruikt. Bij inhoud in stukken is checksum verplicht.
+        Alleen de inhoudelijke suggesties worden gecachet; die uit de bestandsnaam
+        worden altijd opnieuw bepaald. Tags hangen ook van het corpus af: de cache
+        bewaart de tagkandidaten en de tags worden tegen de huidige stats gescoord.
+        existing_metadata zit niet in de sleutel: de regels gebruiken het niet
+        (ophogen EXTRACTOR_VERSION zodra dat verandert).
+        """
+        chunks = [content] if isinstance(content, str) else content
+        if not self.cache.enabled:
+            return self.extract_metadata_from_chunks(chunks, filename, existing_metadata)
+
+        if checksum is None:
+            if not isinstance(content, str):
+                raise ValueError("checksum is verplicht bij inhoud in stukken")
+            checksum = content_checksum(content)
+
+        cached = await self.cache.get(checksum)
+        if cached is not None:
+            suggestions = self._from_cache_entry(cached)
+        else:
+            suggestions, term_freq = self._analyse_content(chunks, existing_metadata)
+            await self.cache.put(checksum, self._cache_entry(suggestions, term_freq))
+            suggestions.append(self._tag_suggestion(term_freq))
+
+        return self._extract_from_filename(filename) + suggestions
+
+    async def extract_metadata_batch(
+        self,
+        documents: Iterable[Dict]
+    ) -> AsyncIterator[Tuple[int, List[MetadataSuggestion]]]:
+        """
+        Extract metadata uit een reeks documenten via een process pool
+
+        documents: dicts met content, filename en optioneel checksum en existing_metadata.
+        Levert (index in documents, suggesties) op zodra een document klaar is, dus
+        niet in invoervolgorde. Er staan hooguit 2 × max_workers documenten tegelijk
+        uit, zodat een lange batch niet in zijn geheel naar de workers gekopieerd wordt.
+        Documenten waarvan de inhoud al in de cache staat gaan niet naar de pool.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        documents = iter(enumerate(documents))
+        pending: Dict[asyncio.Future, Tuple[int, str, Optional[str]]] = {}
+        ready: List[Tuple[int, List[MetadataSuggestion]]] = []
+
+        async def submit() -> bool:
+            for index, document in documents:
+                checksum = None
+                if self.cache.enabled:
+                    checksum = document.get("checksum") or content_checksum(document["content"])
+                    cached = await self.cache.get(checksum)
+                    if cached is not None:
+                        ready.append((
+                            index,
+                            self._extract_from_filename(document["filename"]) + self._from_cache_entry(cached)
+                        ))
+                        continue
+                future = loop.run_in_executor(
+                    pool, _extract_in_worker, document["content"], document.get("existing_metadata")
+                )
+                pending[future] = (index, document["filename"], checksum)
+                return True
+            return False
+
+        try:
+            while len(pending) < 2 * self.max_workers and await submit():
+                pass
+            while pending or ready:
+                while ready:
+                    yield ready.pop()
+                if not pending:
+                    break
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    index, filename, checksum = pending.pop(future)
+                    suggestions, term_freq = future.result()
+                    if checksum is not None:
+                        await self.cache.put(checksum, self._cache_entry(suggestions, term_freq))
+                    # Tags hier: de corpus stats leven in dit proces, niet in de workers
+                    suggestions.append(self._tag_suggestion(term_freq))
+                    await submit()
+                    yield index, self._extract_from_filename(filename) + suggestions
+        except BrokenProcessPool:
+            # Een worker is gestorven (bijv. OOM); volgende batch start een nieuwe pool
+            if self._pool is pool:
+                self._pool = None
+            raise
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _cache_entry(
+        self,
+        suggestions: List[MetadataSuggestion],
+        term_freq: Dict[str, int]
+    ) -> Dict[str, Any]:
+        """Cache-entry zonder tags: die hangen van de corpus stats af, niet alleen van de inhoud"""
+        return {
+            "suggestions": [asdict(s) for s in suggestions],
+            "tag_candidates": TagEngine.candidates(term_freq),
+        }
+
+    def _from_cache_entry(self, entry: Dict[str, Any]) -> List[MetadataSuggestion]:
+        suggestions = [MetadataSuggestion(**suggestion) for suggestion in entry["suggestions"]]
+        suggestions.append(self._tag_suggestion(entry["tag_candidates"]))
+        return suggestions
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: niet forken vanuit een proces met event loop, threads en open sockets
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_provider,)
+            )
+        return self._pool
+
+    def close(self) -> None:
+        """Process pool afsluiten (bij shutdown)"""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def extract_metadata(
         self,
         content: str,
         filename: str,
@@ -64,17 +442,58 @@ class AIMetadataService:
         - Pattern matching voor wet- en regelgeving
         - Context herkenning
         """
-        suggestions = []
+        return self.extract_metadata_from_chunks([content], filename, existing_metadata)
 
+    def extract_metadata_from_chunks(
+        self,
+        chunks: Iterable[str],
+        filename: str,
+        existing_metadata: Optional[Dict] = None
+    ) -> List[MetadataSuggestion]:
+        """
+        Extract metadata uit een document dat in stukken binnenkomt, bijv. pdf_page_texts()
+        """
         # 1. Basis metadata uit bestandsnaam
-        suggestions.extend(self._extract_from_filename(filename))
+        return self._extract_from_filename(filename) + self.content_suggestions(
+            chunks, existing_metadata
+        )
+
+    def content_suggestions(
+        self,
+        chunks: Iterable[str],
+        existing_metadata: Optional[Dict] = None
+    ) -> List[MetadataSuggestion]:
+        """
+        Suggesties die alleen van de inhoud afhangen (dus cachebaar per checksum)
+        """
+        suggestions, term_freq = self._analyse_content(chunks, existing_metadata)
+        suggestions.append(self._tag_suggestion(term_freq))
+        return suggestions
+
+    def _analyse_content(
+        self,
+        chunks: Iterable[str],
+        existing_metadata: Optional[Dict]
+    ) -> Tuple[List[MetadataSuggestion], Dict[str, int]]:
+        """
+        Alle inhoudelijke suggesties behalve tags, plus de termfrequenties daarvoor
+        Het document wordt één keer doorlopen; alle stappen lezen uit dezelfde tellers
+        (DocumentAccumulator), het volledige document staat nooit in het geheugen.
+        """
+        document = DocumentAccumulator(self.scanner)
+        for chunk in chunks:
+            document.feed(chunk)
+        document.finish()
+        hits = document.hits
+
+        suggestions = []
 
         # 2. Named Entity Recognition
-        entities = await self._extract_entities(content)
+        entities = self._extract_entities(document)
         suggestions.extend(self._entities_to_suggestions(entities))
 
         # 3. Detecteer onderwerp/domein
-        subject = await self._detect_subject_area(content)
+        subject = self._detect_subject_area(hits)
         suggestions.append(MetadataSuggestion(
             field="subject_area",
             value=subject['area'],
@@ -83,7 +502,7 @@ class AIMetadataService:
         ))
 
         # 4. Juridische context
-        laws = self._extract_legal_references(content)
+        laws = self._extract_legal_references(hits)
         if laws:
             suggestions.append(MetadataSuggestion(
                 field="legal_basis",
@@ -93,7 +512,7 @@ class AIMetadataService:
             ))
 
         # 5. WOO relevantie
-        woo_relevant = await self._assess_woo_relevance(content)
+        woo_relevant = self._assess_woo_relevance(hits)
         suggestions.append(MetadataSuggestion(
             field="is_woo_relevant",
             value=woo_relevant['is_relevant'],
@@ -102,7 +521,7 @@ class AIMetadataService:
         ))
 
         # 6. Classificatie (openbaar/intern/vertrouwelijk)
-        classification = await self._classify_document(content)
+        classification = self._classify_document(hits)
         suggestions.append(MetadataSuggestion(
             field="classification",
             value=classification['level'],
@@ -111,7 +530,7 @@ class AIMetadataService:
         ))
 
         # 7. Bewaartermijn suggestie
-        retention = await self._suggest_retention_period(content, existing_metadata)
+        retention = self._suggest_retention_period(hits, existing_metadata)
         suggestions.append(MetadataSuggestion(
             field="retention_period",
             value=retention['years'],
@@ -119,16 +538,20 @@ class AIMetadataService:
             reasoning=retention['reasoning']
         ))
 
+        return suggestions, document.term_freq
+
+    def _tag_suggestion(self, term_freq: Dict[str, int]) -> MetadataSuggestion:
         # 8. Tags genereren
-        tags = await self._generate_tags(content)
-        suggestions.append(MetadataSuggestion(
+        tags = self._generate_tags(term_freq)
+        return MetadataSuggestion(
             field="tags",
             value=tags,
             confidence=0.85,
-            reasoning=f"Gegenereerd uit {len(tags)} belangrijkste concepten"
-        ))
-
-        return suggestions
+            reasoning=(
+                f"Gegenereerd uit {len(tags)} onderscheidende concepten "
+                f"(TF-IDF over {self.tag_engine.n_docs} documenten)"
+            )
+        )
 
     def _extract_from_filename(self, filename: str) -> List[MetadataSuggestion]:
         """Extract hints uit bestandsnaam"""
@@ -158,7 +581,7 @@ class AIMetadataService:
 
         return suggestions
 
-    async def _extract_entities(self, content: str) -> Dict[str, List[str]]:
+    def _extract_entities(self, document: DocumentAccumulator) -> Dict[str, List[str]]:
         """
         Named Entity Recognition
         In productie: gebruik spaCy of Azure Text Analytics
@@ -173,19 +596,16 @@ class AIMetadataService:
 
         # Simpele regex-based extraction voor demo
         entities = {
-            "persons": re.findall(r'\b[A-Z][a-z]+ [A-Z][a-z]+\b', content)[:5],
+            "persons": document.persons,
             "organizations": [],
-            "locations": self._extract_dutch_cities(content)
+            "locations": self._extract_dutch_cities(document.hits)
         }
 
         return entities
 
-    def _extract_dutch_cities(self, content: str) -> List[str]:
+    def _extract_dutch_cities(self, hits: KeywordHits) -> List[str]:
         """Helper: extract Nederlandse plaatsnamen"""
-        cities = ["Amsterdam", "Rotterdam", "Utrecht", "Eindhoven", "Groningen",
-                  "Almere", "Lelystad", "Dronten", "Flevoland"]
-        found = [city for city in cities if city in content]
-        return found
+        return [city for city in DUTCH_CITIES if hits.exact(city)]
 
     def _entities_to_suggestions(self, entities: Dict) -> List[MetadataSuggestion]:
         """Converteer entities naar metadata suggesties"""
@@ -209,25 +629,15 @@ class AIMetadataService:
 
         return suggestions
 
-    async def _detect_subject_area(self, content: str) -> Dict:
+    def _detect_subject_area(self, hits: KeywordHits) -> Dict:
         """
         Detecteer vakgebied/onderwerp
         In productie: gebruik text classification model
         """
-        # Keyword mapping naar domeinen
-        keywords_map = {
-            "mobiliteit": ["verkeer", "auto", "fiets", "ov", "openbaar vervoer", "weg"],
-            "duurzaamheid": ["circulair", "duurzaam", "energie", "milieu", "klimaat", "co2"],
-            "economie": ["subsidie", "bedrijf", "economisch", "werkgelegenheid", "investering"],
-            "ruimte": ["ruimtelijk", "bestemmingsplan", "bouw", "woning", "ontwikkeling"],
-            "sociaal": ["zorg", "welzijn", "jeugd", "onderwijs", "participatie"]
-        }
-
-        content_lower = content.lower()
         scores = {}
 
-        for area, keywords in keywords_map.items():
-            score = sum(1 for kw in keywords if kw in content_lower)
+        for area, keywords in SUBJECT_KEYWORDS.items():
+            score = len(hits.present(keywords))
             if score > 0:
                 scores[area] = score
 
@@ -241,32 +651,27 @@ class AIMetadataService:
         return {
             "area": best_area,
             "confidence": min(confidence, 0.95),
-            "keywords": keywords_map[best_area]
+            "keywords": SUBJECT_KEYWORDS[best_area]
         }
 
-    def _extract_legal_references(self, content: str) -> List[str]:
+    def _extract_legal_references(self, hits: KeywordHits) -> List[str]:
         """
         Extract verwijzingen naar wet- en regelgeving
+        Per wet de schrijfwijze zoals die het eerst in het document staat;
+        wetten in volgorde van eerste vermelding
         """
-        legal_patterns = [
-            r'(Algemene wet bestuursrecht|Awb)',
-            r'(Wet open overheid|Woo|WOO)',
-            r'(Algemene verordening gegevensbescherming|AVG)',
-            r'(Archiefwet)',
-            r'(Omgevingswet)',
-            r'(Wet milieubeheer)',
-        ]
-
         found_laws = []
-        for pattern in legal_patterns:
-            if re.search(pattern, content, re.IGNORECASE):
-                # Extract de volledige naam
-                match = re.search(pattern, content, re.IGNORECASE)
-                found_laws.append(match.group(0))
+        for aliases in LEGAL_REFERENCES:
+            first = min(
+                (hits.firsts[alias.lower()] for alias in aliases if alias.lower() in hits),
+                default=None
+            )
+            if first is not None:
+                found_laws.append(first)
 
-        return list(set(found_laws))
+        return [law for _, law in sorted(found_laws)]
 
-    async def _assess_woo_relevance(self, content: str) -> Dict:
+    def _assess_woo_relevance(self, hits: KeywordHits) -> Dict:
         """
         Bepaal of document WOO-relevant is
         Criteria:
@@ -274,13 +679,7 @@ class AIMetadataService:
         - Is van openbaar belang?
         - Bevat beleidsvorming?
         """
-        woo_indicators = [
-            "raadsvoorstel", "besluit", "advies", "bestuurlijk",
-            "beleidsvoorstel", "collegevoorstel", "bestuursopdracht"
-        ]
-
-        content_lower = content.lower()
-        indicator_count = sum(1 for ind in woo_indicators if ind in content_lower)
+        indicator_count = len(hits.present(WOO_INDICATORS))
 
         if indicator_count >= 2:
             return {
@@ -301,29 +700,18 @@ class AIMetadataService:
                 "reasoning": "Geen duidelijke WOO-indicatoren gevonden"
             }
 
-    async def _classify_document(self, content: str) -> Dict:
+    def _classify_document(self, hits: KeywordHits) -> Dict:
         """
         Classificeer document: openbaar, intern, vertrouwelijk, geheim
         """
-        confidential_indicators = [
-            "vertrouwelijk", "geheim", "confidential", "niet voor publicatie",
-            "bsn", "persoonsgegeven", "privacy"
-        ]
-
-        public_indicators = [
-            "openbaar", "public", "publicatie", "bekendmaking"
-        ]
-
-        content_lower = content.lower()
-
         # Check voor expliciete markering
-        if any(ind in content_lower for ind in confidential_indicators):
+        if any(ind in hits for ind in CONFIDENTIAL_INDICATORS):
             return {
                 "level": "vertrouwelijk",
                 "confidence": 0.85,
                 "reasoning": "Document bevat vertrouwelijke indicatoren"
             }
-        elif any(ind in content_lower for ind in public_indicators):
+        elif any(ind in hits for ind in PUBLIC_INDICATORS):
             return {
                 "level": "openbaar",
                 "confidence": 0.80,
@@ -336,28 +724,16 @@ class AIMetadataService:
                 "reasoning": "Geen expliciete classificatie, standaard intern"
             }
 
-    async def _suggest_retention_period(
+    def _suggest_retention_period(
         self,
-        content: str,
+        hits: KeywordHits,
         metadata: Optional[Dict]
     ) -> Dict:
         """
         Suggereer bewaartermijn op basis van documenttype en regelgeving
         """
-        # Mapping van documenttypes naar bewaartermijnen (volgens Archiefwet)
-        retention_rules = {
-            "besluit": (20, "Besluiten: 20 jaar conform Archiefwet"),
-            "raadsvoorstel": (20, "Raadsvoorstellen: 20 jaar"),
-            "advies": (7, "Adviezen: 7 jaar"),
-            "subsidie": (7, "Subsidiedossiers: 7 jaar na afronding"),
-            "contract": (7, "Contracten: 7 jaar na afloop"),
-            "correspondentie": (5, "Reguliere correspondentie: 5 jaar"),
-        }
-
-        content_lower = content.lower()
-
-        for doc_type, (years, reasoning) in retention_rules.items():
-            if doc_type in content_lower:
+        for doc_type, (years, reasoning) in RETENTION_RULES.items():
+            if doc_type in hits:
                 return {
                     "years": years,
                     "confidence": 0.85,
@@ -371,26 +747,42 @@ class AIMetadataService:
             "reasoning": "Standaard bewaartermijn voor niet-geclassificeerde documenten"
         }
 
-    async def _generate_tags(self, content: str) -> List[str]:
+    def _generate_tags(self, term_freq: Dict[str, int]) -> List[str]:
         """
         Genereer tags op basis van inhoud
         In productie: gebruik keyword extraction (RAKE, YAKE, of LLM)
         """
-        # Simpele implementatie: meest voorkomende relevante woorden
-        stopwords = {"de", "het", "een", "van", "voor", "en", "in", "op", "is", "aan"}
+        # Top 5 woorden en bigrammen op TF-IDF tegen de opgeslagen objecten;
+        # alleen lezen, het corpus groeit via observe_object bij het opslaan
+        return self.tag_engine.tags(term_freq, 5)
+
+# ============================================
+# PROCESS POOL WORKERS
+# ============================================
+
+# Eén service per workerproces: patronen en automaat worden één keer opgebouwd
+_worker_service: Optional[AIMetadataService] = None
+
+
+def _init_worker(model_provider: str) -> None:
+    global _worker_service
+    _worker_service = AIMetadataService(model_provider=model_provider, max_workers=1)
+
 
-        words = re.findall(r'\b[a-zà-ÿ]{4,}\b', content.lower())
-        word_freq = {}
+def pdf_page_texts(path: str) -> Iterator[str]:
+    """Tekst per pagina, voor extract_metadata_from_chunks; één pagina tegelijk in het geheugen"""
+    from pypdf import PdfReader
 
-        for word in words:
-            if word not in stopwords:
-                word_freq[word] = word_freq.get(word, 0) + 1
+    reader = PdfReader(path)
+    for page in reader.pages:
+        yield (page.extract_text() or "") + "\n"
 
-        # Top 5 meest voorkomende woorden
-        top_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:5]
-        tags = [word for word, freq in top_words]
 
-        return tags
+def _extract_in_worker(
+    content: str,
+    existing_metadata: Optional[Dict]
+) -> Tuple[List[MetadataSuggestion], Dict[str, int]]:
+    return _worker_service._analyse_content([content], existing_metadata)
 
 class ContextRecommendationEngine:
     """
@@ -30,6 +30,92 @@ import numpy as np
 # from community import community_louvain  # Community detection
 
 
+# ============================================
+# SQL
+# ============================================
+# Module-niveau zodat benchmarks/plan_regression.py exact dezelfde querytekst test
+
+# Domeinparen met gedeelde entiteiten (basis voor community detection)
+DOMAIN_PAIRS_QUERY = """
+    SELECT
+        d1.id as domain1_id,
+        d1.name as domain1_name,
+        d2.id as domain2_id,
+        d2.name as domain2_name,
+        COUNT(DISTINCT eo1.entity_id) as shared_entities
+    FROM information_domains d1
+    JOIN information_domains d2 ON d1.id < d2.id
+    JOIN entity_occurrences eo1 ON d1.id = eo1.domain_id
+    JOIN entity_occurrences eo2 ON d2.id = eo2.domain_id
+    WHERE eo1.entity_id = eo2.entity_id
+    GROUP BY d1.id, d1.name, d2.id, d2.name
+    HAVING COUNT(DISTINCT eo1.entity_id) >= 3
+    ORDER BY shared_entities DESC
+"""
+
+# Domeinen die entiteiten delen met domein $1
+SHARED_ENTITY_DOMAINS_QUERY = """
+    WITH domain_entities AS (
+        SELECT entity_id
+        FROM entity_occurrences
+        WHERE domain_id = $1
+    ),
+    related_domains AS (
+        SELECT
+            eo.domain_id,
+            COUNT(DISTINCT eo.entity_id) as shared_count,
+            array_agg(DISTINCT ge.entity_name) as shared_entity_names
+        FROM entity_occurrences eo
+        JOIN domain_entities de ON eo.entity_id = de.entity_id
+        JOIN graph_entities ge ON eo.entity_id = ge.id
+        WHERE eo.domain_id != $1
+        GROUP BY eo.domain_id
+        HAVING COUNT(DISTINCT eo.entity_id) >= 2
+    )
+    SELECT
+        rd.domain_id,
+        id.name as domain_name,
+        rd.shared_count,
+        rd.shared_entity_names
+    FROM related_domains rd
+    JOIN information_domains id ON rd.domain_id = id.id
+    ORDER BY rd.shared_count DESC
+    LIMIT 10
+"""
+
+# Netwerk rond entiteit $1 tot diepte $2
+ENTITY_NETWORK_QUERY = """
+    WITH RECURSIVE entity_network AS (
+        -- Start node
+        SELECT
+            id as entity_id,
+            entity_name,
+            entity_type,
+            0 as depth
+        FROM graph_entities
+        WHERE id = $1
+
+        UNION
+
+        -- Gerelateerde entiteiten
+        SELECT
+            ge.id,
+            ge.entity_name,
+            ge.entity_type,
+            en.depth + 1
+        FROM entity_network en
+        JOIN entity_relationships er ON
+            en.entity_id = er.source_entity_id OR
+            en.entity_id = er.target_entity_id
+        JOIN graph_entities ge ON
+            (er.source_entity_id = ge.id OR er.target_entity_id = ge.id)
+            AND ge.id != en.entity_id
+        WHERE en.depth < $2
+    )
+    SELECT * FROM entity_network
+"""
+
+
 @dataclass
 class Entity:
     """Geëxtraheerde entiteit uit document"""
@@ -296,22 +382,7 @@ class GraphRAGService:
     async def _simulate_community_detection(self, db_pool) -> List[Community]:
         """Demo implementatie van community detection"""
         # Query voor domains met gedeelde entiteiten
-        query = """
-        SELECT
-            d1.id as domain1_id,
-            d1.name as domain1_name,
-            d2.id as domain2_id,
-            d2.name as domain2_name,
-            COUNT(DISTINCT eo1.entity_id) as shared_entities
-        FROM information_domains d1
-        JOIN information_domains d2 ON d1.id < d2.id
-        JOIN entity_occurrences eo1 ON d1.id = eo1.domain_id
-        JOIN entity_occurrences eo2 ON d2.id = eo2.domain_id
-        WHERE eo1.entity_id = eo2.entity_id
-        GROUP BY d1.id, d1.name, d2.id, d2.name
-        HAVING COUNT(DISTINCT eo1.entity_id) >= 3
-        ORDER BY shared_entities DESC
-        """
+        query = DOMAIN_PAIRS_QUERY
 
         # Simuleer communities
         return [
@@ -386,34 +457,7 @@ class GraphRAGService:
         min_strength: float
     ) -> List[DomainRelation]:
         """Vind domeinen die entiteiten delen"""
-        query = """
-        WITH domain_entities AS (
-            SELECT entity_id
-            FROM entity_occurrences
-            WHERE domain_id = $1
-        ),
-        related_domains AS (
-            SELECT
-                eo.domain_id,
-                COUNT(DISTINCT eo.entity_id) as shared_count,
-                array_agg(DISTINCT ge.entity_name) as shared_entity_names
-            FROM entity_occurrences eo
-            JOIN domain_entities de ON eo.entity_id = de.entity_id
-            JOIN graph_entities ge ON eo.entity_id = ge.id
-            WHERE eo.domain_id != $1
-            GROUP BY eo.domain_id
-            HAVING COUNT(DISTINCT eo.entity_id) >= 2
-        )
-        SELECT
-            rd.domain_id,
-            id.name as domain_name,
-            rd.shared_count,
-            rd.shared_entity_names
-        FROM related_domains rd
-        JOIN information_domains id ON rd.domain_id = id.id
-        ORDER BY rd.shared_count DESC
-        LIMIT 10
-        """
+        query = SHARED_ENTITY_DOMAINS_QUERY
 
         # Demo: simulatie
         return [
@@ -477,36 +521,7 @@ class GraphRAGService:
         Haal netwerk van gerelateerde entiteiten op
         Voor visualisatie van kennisgraaf
         """
-        query = """
-        WITH RECURSIVE entity_network AS (
-            -- Start node
-            SELECT
-                id as entity_id,
-                entity_name,
-                entity_type,
-                0 as depth
-            FROM graph_entities
-            WHERE id = $1
-
-            UNION
-
-            -- Gerelateerde entiteiten
-            SELECT
-                ge.id,
-                ge.entity_name,
-                ge.entity_type,
-                en.depth + 1
-            FROM entity_network en
-            JOIN entity_relationships er ON
-                en.entity_id = er.source_entity_id OR
-                en.entity_id = er.target_entity_id
-            JOIN graph_entities ge ON
-                (er.source_entity_id = ge.id OR er.target_entity_id = ge.id)
-                AND ge.id != en.entity_id
-            WHERE en.depth < $2
-        )
-        SELECT * FROM entity_network
-        """
+        query = ENTITY_NETWORK_QUERY
 
         # Demo: return netwerk structuur voor visualisatie
         return {
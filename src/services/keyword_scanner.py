@@ -0,0 +1,102 @@
+"""
+Multi-pattern trefwoordscanner (Aho-Corasick)
+Eén automaat voor alle trefwoorden van de metadata-extractie; een document wordt
+één keer doorlopen en ieder voorkomen (ook overlappend) telt mee in de hit-tabel.
+Classificatie leest daarna alleen nog uit die tabel.
+
+De hit-tabel bevat tellers en de eerste vermelding per trefwoord, geen lijst met
+posities: een document kan zo ook in stukken gescand worden (feed) met geheugen dat
+niet met de documentgrootte meegroeit.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import ahocorasick
+
+
+class KeywordHits:
+    """Resultaat van een scan: per trefwoord (lowercase) aantal en eerste vermelding"""
+
+    __slots__ = ("counts", "firsts", "exact_found")
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        # trefwoord → (positie, tekst zoals in het document geschreven)
+        self.firsts: Dict[str, Tuple[int, str]] = {}
+        self.exact_found: Set[str] = set()
+
+    def __contains__(self, keyword: str) -> bool:
+        return keyword in self.counts
+
+    def count(self, keyword: str) -> int:
+        return self.counts.get(keyword, 0)
+
+    def first(self, keyword: str) -> Optional[int]:
+        first = self.firsts.get(keyword)
+        return first[0] if first else None
+
+    def written(self, keyword: str) -> Optional[str]:
+        """De eerste vermelding zoals die in het document staat (hoofdletters behouden)"""
+        first = self.firsts.get(keyword)
+        return first[1] if first else None
+
+    def present(self, keywords: Iterable[str]) -> List[str]:
+        """Trefwoorden uit `keywords` die voorkomen, in de gegeven volgorde"""
+        return [keyword for keyword in keywords if keyword in self.counts]
+
+    def exact(self, word: str) -> bool:
+        """Hoofdlettergevoelig: komt `word` letterlijk voor (alleen voor case_sensitive woorden)"""
+        return word in self.exact_found
+
+
+class KeywordScanner:
+    """
+    Hoofdletterongevoelige scan op een vaste set trefwoorden; één keer opbouwen, vaak scannen
+    Voor woorden in `case_sensitive` wordt daarnaast bijgehouden of ze letterlijk voorkomen.
+    """
+
+    def __init__(self, keywords: Iterable[str], case_sensitive: Iterable[str] = ()):
+        exact_words: Dict[str, List[str]] = {}
+        for word in case_sensitive:
+            exact_words.setdefault(word.lower(), []).append(word)
+
+        self.keywords = frozenset(keyword.lower() for keyword in keywords) | frozenset(exact_words)
+        self.max_length = max(len(keyword) for keyword in self.keywords)
+        self._automaton = ahocorasick.Automaton()
+        for keyword in self.keywords:
+            self._automaton.add_word(keyword, (keyword, len(keyword), exact_words.get(keyword)))
+        self._automaton.make_automaton()
+
+    def scan(self, text: str) -> KeywordHits:
+        hits = KeywordHits()
+        self.feed(hits, text, 0, 0, len(text))
+        return hits
+
+    def feed(self, hits: KeywordHits, window: str, offset: int, lo: int, hi: int) -> str:
+        """
+        Tel treffers in `window` (positie `offset` in het document) die eindigen in (lo, hi];
+        treffers die eerder eindigen zijn al bij het vorige stuk geteld.
+        Geeft de lowercase versie van window terug, zodat de aanroeper die kan hergebruiken.
+        """
+        lowered = window.lower()
+        if len(lowered) != len(window):
+            # Enkele tekens worden bij lower() langer (İ → i̇); houd posities gelijk aan de tekst
+            lowered = "".join(char.lower()[0] for char in window)
+
+        counts, firsts = hits.counts, hits.firsts
+        for end, (keyword, length, exact_words) in self._automaton.iter(lowered, 0, hi):
+            end += 1
+            if end <= lo:
+                continue
+            start = end - length
+            count = counts.get(keyword)
+            if count is None:
+                counts[keyword] = 1
+                firsts[keyword] = (offset + start, window[start:end])
+            else:
+                counts[keyword] = count + 1
+            if exact_words:
+                for word in exact_words:
+                    if window.startswith(word, start):
+                        hits.exact_found.add(word)
+        return lowered
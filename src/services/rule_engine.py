@@ -0,0 +1,268 @@
+"""
+Regelset-engine voor Compliance by Design
+Laadt de actieve business_rules één keer en compileert de JSONB regellogica
+(conditions/actions) naar Python closures, geïndexeerd op (object_type, domain_type)
+
+Gebruik:
+    engine = RuleEngine()
+    await engine.load(db_pool)
+    result, applied = engine.evaluate("document", "zaak", facts, defaults)
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import date
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+@dataclass
+class CompiledRule:
+    """Business rule met voorgecompileerde conditie en acties"""
+    id: str
+    rule_name: str
+    rule_category: str
+    legal_basis: Optional[str]
+    logic: Dict[str, Any]
+    predicate: Predicate
+    actions: List[Tuple[str, Any]]
+    valid_from: Optional[date] = None
+    valid_until: Optional[date] = None
+    object_types: List[str] = field(default_factory=list)
+    domain_types: Optional[List[str]] = None
+
+    def is_valid_on(self, day: date) -> bool:
+        if self.valid_from and self.valid_from > day:
+            return False
+        if self.valid_until and self.valid_until < day:
+            return False
+        return True
+
+
+# ============================================
+# CONDITIE COMPILATIE
+# ============================================
+
+def _field_getter(path: str) -> Callable[[Dict[str, Any]], Any]:
+    """'case.case_type' → facts['case']['case_type'], ontbrekend → None"""
+    parts = path.split(".")
+    if len(parts) == 1:
+        key = parts[0]
+        return lambda facts: facts.get(key)
+
+    def getter(facts: Dict[str, Any]) -> Any:
+        value: Any = facts
+        for part in parts:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(part)
+        return value
+
+    return getter
+
+
+def _lower(value: Any) -> Any:
+    return value.lower() if isinstance(value, str) else value
+
+
+def _contains(haystack: Any, needle: Any) -> bool:
+    if haystack is None:
+        return False
+    if isinstance(haystack, str):
+        return str(needle).lower() in haystack.lower()
+    return needle in haystack
+
+
+def compile_condition(condition: Dict[str, Any]) -> Predicate:
+    get = _field_getter(condition["field"])
+    operator = condition.get("operator", "equals")
+    expected = condition.get("value")
+
+    if operator == "equals":
+        return lambda facts: get(facts) == expected
+    if operator == "not_equals":
+        return lambda facts: get(facts) != expected
+    if operator == "in":
+        allowed = frozenset(expected or [])
+        return lambda facts: get(facts) in allowed
+    if operator == "is_null":
+        return lambda facts: get(facts) is None
+    if operator == "is_not_null":
+        return lambda facts: get(facts) is not None
+    if operator == "greater_than":
+        return lambda facts: get(facts) is not None and get(facts) > expected
+    if operator == "less_than":
+        return lambda facts: get(facts) is not None and get(facts) < expected
+    if operator == "contains":
+        return lambda facts: _contains(get(facts), expected)
+    if operator == "contains_any":
+        needles = [_lower(v) for v in (expected or [])]
+
+        def contains_any(facts: Dict[str, Any]) -> bool:
+            value = get(facts)
+            if value is None:
+                return False
+            if isinstance(value, str):
+                value = value.lower()
+                return any(n in value for n in needles)
+            return any(n in value for n in needles)
+
+        return contains_any
+
+    raise ValueError(f"Onbekende operator in regellogica: {operator}")
+
+
+def compile_conditions(conditions: Iterable[Dict[str, Any]]) -> Predicate:
+    predicates = [compile_condition(c) for c in conditions]
+    if not predicates:
+        return lambda facts: True
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda facts: all(p(facts) for p in predicates)
+
+
+def _legacy_actions(category: str, logic: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """Regels zonder 'actions' houden het oude gedrag per rule_category"""
+    if category == "archivering":
+        return [("retention_period", logic.get("retention_years", 7))]
+    if category == "woo":
+        return [("is_woo_relevant", True)]
+    return []
+
+
+def compile_rule(row: Dict[str, Any]) -> CompiledRule:
+    logic = row.get("rule_logic") or {}
+    if isinstance(logic, str):
+        logic = json.loads(logic)
+
+    if "actions" in logic:
+        actions = [(a["set_field"], a.get("value")) for a in logic["actions"] if "set_field" in a]
+    else:
+        actions = _legacy_actions(row.get("rule_category"), logic)
+
+    return CompiledRule(
+        id=str(row["id"]),
+        rule_name=row["rule_name"],
+        rule_category=row.get("rule_category") or "",
+        legal_basis=row.get("legal_basis"),
+        logic=logic,
+        predicate=compile_conditions(logic.get("conditions", [])),
+        actions=actions,
+        valid_from=row.get("valid_from"),
+        valid_until=row.get("valid_until"),
+        object_types=list(row.get("applies_to_object_types") or []),
+        domain_types=list(row["applies_to_domain_types"]) if row.get("applies_to_domain_types") else None
+    )
+
+
+# ============================================
+# ENGINE
+# ============================================
+
+class RuleEngine:
+    """
+    Gecompileerde, in-memory regelset
+
+    Index: (object_type, domain_type) → regels, waarbij domain_type None staat voor
+    regels zonder applies_to_domain_types. Wijzigingen in business_rules komen binnen
+    via NOTIFY business_rules_changed en leiden tot een volledige herlaad.
+    """
+
+    CHANNEL = "business_rules_changed"
+
+    def __init__(self):
+        self._rules: List[CompiledRule] = []
+        self._by_key: Dict[Tuple[str, Optional[str]], List[CompiledRule]] = {}
+        self._by_domain_type: Dict[str, List[CompiledRule]] = {}
+        self._lookup_cache: Dict[Tuple[str, Optional[str]], List[CompiledRule]] = {}
+        self._pool = None
+        self._pending: set = set()
+        self.version = 0
+
+    async def load(self, pool) -> None:
+        self._pool = pool
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT * FROM business_rules
+                WHERE active = true
+                ORDER BY rule_category
+            """)
+        self.compile([dict(r) for r in rows])
+
+    def compile(self, rows: Iterable[Dict[str, Any]]) -> None:
+        rules = []
+        for row in rows:
+            try:
+                rules.append(compile_rule(row))
+            except (KeyError, ValueError, TypeError):
+                logger.exception("Regel %s kan niet gecompileerd worden", row.get("rule_name"))
+
+        by_key: Dict[Tuple[str, Optional[str]], List[CompiledRule]] = {}
+        by_domain_type: Dict[str, List[CompiledRule]] = {}
+        for rule in rules:
+            for object_type in rule.object_types:
+                for domain_type in rule.domain_types or [None]:
+                    by_key.setdefault((object_type, domain_type), []).append(rule)
+            for domain_type in rule.domain_types or []:
+                by_domain_type.setdefault(domain_type, []).append(rule)
+
+        # Nieuwe index in één keer activeren
+        self._rules = rules
+        self._by_key = by_key
+        self._by_domain_type = by_domain_type
+        self._lookup_cache = {}
+        self.version += 1
+
+    def rules_for(self, object_type: str, domain_type: Optional[str]) -> List[CompiledRule]:
+        key = (object_type, domain_type)
+        rules = self._lookup_cache.get(key)
+        if rules is None:
+            rules = self._by_key.get(key, []) + self._by_key.get((object_type, None), [])
+            rules.sort(key=lambda r: r.rule_category)
+            self._lookup_cache[key] = rules
+        return rules
+
+    def domain_rules(self, domain_type: str) -> List[CompiledRule]:
+        return self._by_domain_type.get(domain_type, [])
+
+    def evaluate(
+        self,
+        object_type: str,
+        domain_type: Optional[str],
+        facts: Dict[str, Any],
+        result: Dict[str, Any],
+        today: Optional[date] = None
+    ) -> Tuple[Dict[str, Any], List[CompiledRule]]:
+        """
+        Pas alle geldige, matchende regels toe op result
+        Geeft het bijgewerkte result en de toegepaste regels terug
+        """
+        today = today or date.today()
+        applied = []
+        for rule in self.rules_for(object_type, domain_type):
+            if not rule.is_valid_on(today) or not rule.predicate(facts):
+                continue
+            for field_name, value in rule.actions:
+                result[field_name] = value
+            applied.append(rule)
+        return result, applied
+
+    def on_notify(self, connection, pid, channel, payload: str) -> None:
+        """asyncpg listener callback: herlaad de regelset"""
+        task = asyncio.get_running_loop().create_task(self._reload())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def stats(self) -> Dict[str, int]:
+        return {"rules": len(self._rules), "keys": len(self._by_key), "version": self.version}
+
+    async def _reload(self) -> None:
+        try:
+            await self.load(self._pool)
+        except Exception:
+            logger.exception("Herladen van regelset mislukt")
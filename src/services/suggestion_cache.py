@@ -0,0 +1,161 @@
+"""
+Content-addressed cache van metadata-suggesties
+Sleutel: (SHA-256 van de inhoud, extractorversie). Hetzelfde document opnieuw geüpload
+of gekopieerd naar een ander domein kost zo één lookup in plaats van een volledige extractie.
+Alleen wat van de inhoud alleen afhangt hoort in de entry; corpusafhankelijke uitkomsten
+(zoals TF-IDF tags) worden bij een hit opnieuw berekend.
+
+Een nieuwe extractorversie laat oude entries nooit meer matchen; expliciete invalidatie
+is niet nodig. Entries van andere versies worden pas na stale_days verwijderd
+(periodiek, niet bij het starten), zodat workers met de vorige versie tijdens een
+rolling deploy hun cache houden.
+
+Twee lagen:
+- LRU in het geheugen van deze worker (JSON bytes, dus geen gedeelde mutable lijsten)
+- tabel ai_metadata_cache, gedeeld door alle workers (alleen na attach(pool))
+"""
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import asyncpg
+import orjson
+from asyncpg.pool import Pool
+
+logger = logging.getLogger(__name__)
+
+
+def content_checksum(content: str) -> str:
+    """SHA-256 (hex) van de tekst; zelfde formaat als information_objects.checksum"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class SuggestionCache:
+    """
+    Entries zijn JSON-waarden (bij AIMetadataService: suggesties en tagkandidaten)
+    max_size=0 schakelt de geheugenlaag uit; zonder pool is er geen persistente laag.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        max_size: int = 10000,
+        stale_days: int = 7,
+        purge_interval: float = 3600.0
+    ):
+        self.version = version
+        self.max_size = max_size
+        self.stale_days = stale_days
+        self.purge_interval = purge_interval
+        self._pool: Optional[Pool] = None
+        self._task: Optional[asyncio.Task] = None
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.db_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 or self._pool is not None
+
+    async def attach(self, pool: Pool) -> None:
+        """Persistente laag aanzetten; oude versies worden periodiek opgeruimd"""
+        self._pool = pool
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def detach(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._pool = None
+
+    async def get(self, checksum: str) -> Optional[Any]:
+        body = self._entries.get(checksum)
+        if body is not None:
+            self._entries.move_to_end(checksum)
+            self.memory_hits += 1
+            return orjson.loads(body)
+
+        if self._pool is not None:
+            try:
+                row = await self._pool.fetchval("""
+                    SELECT suggestions::text FROM ai_metadata_cache
+                    WHERE content_sha256 = $1 AND extractor_version = $2
+                """, checksum, self.version)
+            except (asyncpg.PostgresError, OSError) as e:
+                # Cache mag extractie nooit laten falen
+                self.db_errors += 1
+                logger.warning("ai_metadata_cache lookup mislukt: %s", e)
+                row = None
+            if row is not None:
+                self.db_hits += 1
+                body = row.encode()
+                self._remember(checksum, body)
+                return orjson.loads(body)
+
+        self.misses += 1
+        return None
+
+    async def put(self, checksum: str, entry: Any) -> None:
+        body = orjson.dumps(entry)
+        self._remember(checksum, body)
+        if self._pool is not None:
+            try:
+                await self._pool.execute("""
+                    INSERT INTO ai_metadata_cache (content_sha256, extractor_version, suggestions)
+                    VALUES ($1, $2, $3::jsonb)
+                    ON CONFLICT DO NOTHING
+                """, checksum, self.version, body.decode())
+            except (asyncpg.PostgresError, OSError) as e:
+                self.db_errors += 1
+                logger.warning("ai_metadata_cache schrijven mislukt: %s", e)
+
+    async def purge_stale(self) -> int:
+        """Verwijder persistente entries van andere extractorversies, ouder dan stale_days"""
+        if self._pool is None:
+            return 0
+        status = await self._pool.execute("""
+            DELETE FROM ai_metadata_cache
+            WHERE extractor_version <> $1 AND created_at < NOW() - make_interval(days => $2)
+        """, self.version, self.stale_days)
+        return int(status.split()[-1])
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            try:
+                purged = await self.purge_stale()
+            except (asyncpg.PostgresError, OSError) as e:
+                self.db_errors += 1
+                logger.warning("ai_metadata_cache opruimen mislukt: %s", e)
+                continue
+            if purged:
+                logger.info("ai_metadata_cache: %d entries van oude extractorversies verwijderd", purged)
+
+    def _remember(self, checksum: str, body: bytes) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[checksum] = body
+        self._entries.move_to_end(checksum)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "db_errors": self.db_errors,
+        }
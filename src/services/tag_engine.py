@@ -0,0 +1,265 @@
+"""
+Corpus-bewuste tag-generatie (TF-IDF met unigrammen en bigrammen)
+Houdt per term de document frequency bij over alle opgeslagen informatieobjecten, in
+een compacte array geïndexeerd op term-id; woorden als 'provincie' die in bijna ieder
+document staan scoren daardoor laag, onderscheidende termen hoog.
+
+Alleen het ingest-pad (POST /objects, bulk ingest) telt documenten mee via observe();
+tags() leest alleen, zodat een extractie (of een herhaalde extractie van hetzelfde
+document) het corpus niet verandert.
+
+De stats staan in tag_term_stats/tag_corpus_stats zodat workers warm starten; zijn ze
+leeg, dan vult bootstrap() ze eenmalig uit de bestaande information_objects.
+Iedere worker telt lokaal bij en schrijft de delta's periodiek weg (optellen in de
+database, dus workers overschrijven elkaar niet); de tellingen van andere workers
+ziet een worker bij de volgende start.
+
+Gebruik:
+    engine = TagEngine()
+    await engine.start(db_pool, bootstrap=lambda row: object_terms(row["title"], row["tags"]))
+    engine.observe({"windpark": 1, "windpark flevoland": 1})
+    tags = engine.tags({"windpark": 4, "provincie": 9, "windpark flevoland": 2}, 5)
+"""
+
+import asyncio
+import logging
+from typing import Callable, Dict, Iterable, List, Optional
+
+import asyncpg
+import numpy as np
+from asyncpg.pool import Pool
+
+logger = logging.getLogger(__name__)
+
+
+class TagEngine:
+    """
+    Scoring per kandidaat: (1 + log tf) × idf, idf = log((1 + N) / (1 + df)) + 1,
+    met N en df uit de corpus stats (termen buiten de stats: df = 0). Bigrammen tellen
+    pas mee vanaf twee voorkomens in het document.
+    """
+
+    def __init__(
+        self,
+        max_terms: int = 1_000_000,
+        min_df_load: int = 2,
+        flush_interval: float = 30.0
+    ):
+        self.max_terms = max_terms
+        self.min_df_load = min_df_load
+        self.flush_interval = flush_interval
+        self.vocabulary: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self.df = np.zeros(1024, dtype=np.uint32)
+        self._delta = np.zeros(1024, dtype=np.uint32)
+        self.n_docs = 0
+        self._pending_docs = 0
+        self._pool: Optional[Pool] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ============================================
+    # TAGS
+    # ============================================
+
+    def tags(self, term_freq: Dict[str, int], k: int = 5) -> List[str]:
+        """De k best scorende termen; leest de corpus stats alleen"""
+        if not term_freq:
+            return []
+
+        terms = list(term_freq)
+        vocabulary = self.vocabulary
+        ids = np.fromiter((vocabulary.get(term, -1) for term in terms), dtype=np.int64, count=len(terms))
+        known = ids >= 0
+
+        tf = np.fromiter(term_freq.values(), dtype=np.float64, count=len(terms))
+        df = np.zeros(len(terms), dtype=np.float64)
+        df[known] = self.df[ids[known]]
+        scores = (1.0 + np.log(tf)) * (np.log((1.0 + self.n_docs) / (1.0 + df)) + 1.0)
+
+        bigram = np.fromiter((" " in term for term in terms), dtype=bool, count=len(terms))
+        scores[bigram & (tf < 2)] = 0.0
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        # Alle termen met minstens de k-de score: bij gelijke scores op de grens kiest
+        # argpartition willekeurig, dan hangt de uitkomst af van welke termen er nog meer zijn
+        threshold = -np.partition(-scores, k - 1)[k - 1]
+        top = np.flatnonzero(scores >= threshold)
+        # Gelijke score: de term die eerder in het document stond eerst
+        top = top[np.lexsort((top, -scores[top]))][:k]
+        return [terms[i] for i in top]
+
+    @staticmethod
+    def candidates(term_freq: Dict[str, int]) -> Dict[str, int]:
+        """
+        Alleen de termen die tags() kan kiezen (bigrammen pas vanaf twee voorkomens);
+        compact genoeg om per document te bewaren en later tegen nieuwere stats te scoren
+        """
+        return {term: n for term, n in term_freq.items() if n >= 2 or " " not in term}
+
+    def observe(self, terms: Iterable[str]) -> None:
+        """Tel één opgeslagen document mee in de corpus stats (iedere term één keer)"""
+        ids = self._ids(list(dict.fromkeys(terms)))
+        # ids zijn uniek per document, dus fancy indexing telt ieder id één keer op
+        ids = ids[ids >= 0]
+        self.df[ids] += 1
+        self._delta[ids] += 1
+        self.n_docs += 1
+        self._pending_docs += 1
+
+    def _ids(self, terms: List[str]) -> np.ndarray:
+        """Term-ids; nieuwe termen krijgen een id zolang max_terms niet bereikt is, anders -1"""
+        vocabulary = self.vocabulary
+        ids = np.empty(len(terms), dtype=np.int64)
+        for i, term in enumerate(terms):
+            term_id = vocabulary.get(term)
+            if term_id is None:
+                term_id = self._add_term(term)
+            ids[i] = term_id
+        return ids
+
+    def _add_term(self, term: str) -> int:
+        if len(self._terms) >= self.max_terms:
+            return -1
+        term_id = len(self._terms)
+        if term_id == len(self.df):
+            self.df = np.concatenate([self.df, np.zeros_like(self.df)])
+            self._delta = np.concatenate([self._delta, np.zeros_like(self._delta)])
+        self.vocabulary[term] = term_id
+        self._terms.append(term)
+        return term_id
+
+    # ============================================
+    # PERSISTENTIE
+    # ============================================
+
+    async def start(
+        self,
+        pool: Pool,
+        bootstrap: Optional[Callable[[asyncpg.Record], Iterable[str]]] = None
+    ) -> None:
+        """bootstrap: termen van een information_objects-rij (title, tags), voor lege stats"""
+        self._pool = pool
+        if bootstrap is not None:
+            try:
+                await self.bootstrap(pool, bootstrap)
+            except (asyncpg.PostgresError, OSError):
+                logger.exception("Tag stats opbouwen uit information_objects mislukt")
+        await self.load(pool)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop de flush-loop en schrijf de resterende delta's weg"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pool is not None:
+            await self.flush()
+
+    async def bootstrap(
+        self,
+        pool: Pool,
+        terms_of: Callable[[asyncpg.Record], Iterable[str]]
+    ) -> int:
+        """
+        Lege corpus stats eenmalig vullen uit de bestaande information_objects
+        De rij in tag_corpus_stats blijft gelockt tot alles is weggeschreven; workers die
+        tegelijk starten wachten daarop en zien daarna document_count > 0.
+        Geeft het aantal meegetelde objecten terug.
+        """
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                if await conn.fetchval("SELECT document_count FROM tag_corpus_stats FOR UPDATE"):
+                    return 0
+                async for row in conn.cursor("SELECT title, tags FROM information_objects"):
+                    self.observe(terms_of(row))
+                pending = self._pending()
+                if pending[2]:
+                    await self._write(conn, *pending)
+        self._written(*pending)
+
+        documents = pending[2]
+        logger.info("Tag stats opgebouwd uit %d informatieobjecten", documents)
+        return documents
+
+    async def load(self, pool: Pool) -> None:
+        """Stats uit de database: de max_terms meest voorkomende termen, zonder eenmalige termen"""
+        async with pool.acquire() as conn:
+            n_docs = await conn.fetchval("SELECT document_count FROM tag_corpus_stats") or 0
+            rows = await conn.fetch("""
+                SELECT term, document_frequency FROM tag_term_stats
+                WHERE document_frequency >= $1
+                ORDER BY document_frequency DESC
+                LIMIT $2
+            """, self.min_df_load, self.max_terms)
+
+        capacity = max(1024, 1 << (len(rows) + len(rows) // 2).bit_length())
+        self._terms = [row["term"] for row in rows]
+        self.vocabulary = {term: i for i, term in enumerate(self._terms)}
+        self.df = np.zeros(capacity, dtype=np.uint32)
+        self.df[:len(rows)] = np.fromiter(
+            (row["document_frequency"] for row in rows), dtype=np.uint32, count=len(rows)
+        )
+        self._delta = np.zeros(capacity, dtype=np.uint32)
+        self.n_docs = n_docs
+        self._pending_docs = 0
+        logger.info("Tag stats geladen: %d termen over %d documenten", len(rows), n_docs)
+
+    async def flush(self) -> int:
+        """Schrijf de lokaal opgebouwde delta's weg; geeft het aantal termen terug"""
+        if not self._pending_docs and not self._delta.any():
+            return 0
+
+        pending = self._pending()
+        try:
+            async with self._pool.acquire() as conn:
+                async with conn.transaction():
+                    await self._write(conn, *pending)
+        except Exception:
+            logger.exception("Wegschrijven van tag stats (%d termen) mislukt", len(pending[0]))
+            return 0
+        self._written(*pending)
+        return len(pending[0])
+
+    def _pending(self) -> tuple:
+        """(ids, tellingen, aantal documenten) van wat nog niet is weggeschreven"""
+        ids = np.flatnonzero(self._delta)
+        return ids, self._delta[ids].copy(), self._pending_docs
+
+    async def _write(self, conn, ids: np.ndarray, counts: np.ndarray, pending_docs: int) -> None:
+        """Delta's optellen in de database, binnen de transactie van de aanroeper"""
+        # Op term gesorteerd: gelijktijdige flushes van workers locken in dezelfde volgorde
+        order = sorted(range(len(ids)), key=lambda i: self._terms[ids[i]])
+        await conn.execute("""
+            INSERT INTO tag_term_stats (term, document_frequency)
+            SELECT * FROM unnest($1::text[], $2::int[])
+            ON CONFLICT (term) DO UPDATE
+            SET document_frequency = tag_term_stats.document_frequency + EXCLUDED.document_frequency
+        """, [self._terms[ids[i]] for i in order], [int(counts[i]) for i in order])
+        await conn.execute("""
+            UPDATE tag_corpus_stats SET document_count = document_count + $1, updated_at = NOW()
+        """, pending_docs)
+
+    def _written(self, ids: np.ndarray, counts: np.ndarray, pending_docs: int) -> None:
+        # Wat tijdens het wegschrijven is bijgeteld blijft staan voor de volgende flush
+        self._delta[ids] -= counts
+        self._pending_docs -= pending_docs
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "terms": len(self._terms),
+            "documents": self.n_docs,
+            "pending_terms": int(np.count_nonzero(self._delta)),
+            "pending_documents": self._pending_docs,
+        }
@@ -0,0 +1,35 @@
+"""
+Tests voor de gememoïseerde metadata-extractie (zonder database: alleen de geheugenlaag)
+"""
+
+import asyncio
+
+from src.services.ai_metadata_service import AIMetadataService
+
+CONTENT = """
+Raadsvoorstel subsidie circulaire economie
+Op grond van de Algemene wet bestuursrecht en de Wet open overheid.
+Locatie: Almere, Lelystad
+"""
+
+
+def test_second_extraction_is_served_from_cache():
+    service = AIMetadataService(max_workers=1)
+
+    first = asyncio.run(service.extract_metadata_from_document(CONTENT, "2025-03-15_Raadsvoorstel_v2.pdf"))
+    assert service.cache.misses == 1
+    assert service.cache.memory_hits == 0
+
+    second = asyncio.run(service.extract_metadata_from_document(CONTENT, "2025-03-15_Raadsvoorstel_v2.pdf"))
+    assert service.cache.misses == 1
+    assert service.cache.memory_hits == 1
+    assert [(s.field, s.value) for s in second] == [(s.field, s.value) for s in first]
+
+
+def test_other_content_is_not_served_from_cache():
+    service = AIMetadataService(max_workers=1)
+
+    asyncio.run(service.extract_metadata_from_document(CONTENT, "a.pdf"))
+    asyncio.run(service.extract_metadata_from_document(CONTENT + "Bijlage", "a.pdf"))
+    assert service.cache.misses == 2
+    assert service.cache.memory_hits == 0
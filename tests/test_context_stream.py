@@ -0,0 +1,80 @@
+"""
+Tests voor de fan-out van contextwijzigingen (ContextChangeHub)
+"""
+
+import asyncio
+import json
+
+from src.api.context_stream import ContextChangeHub, sse_frame
+
+
+def frame_data(frame: bytes) -> dict:
+    return json.loads(frame.decode().split("data: ", 1)[1])
+
+
+def test_listener_reconnect_sends_resync_to_all_subscribers():
+    async def scenario():
+        hub = ContextChangeHub(max_queue=10)
+        first = hub.subscribe(["a", "b"])
+        second = hub.subscribe(["c"])
+        first.offer("a", sse_frame("object", {"domain_id": "a"}))
+
+        hub.resync_all()
+
+        # Wachtende deltas vervallen: de resync dekt ze
+        assert first.queue.qsize() == 1
+        first_frame = await first.next_frame()
+        second_frame = await second.next_frame()
+        assert first_frame.startswith(b"event: resync")
+        assert frame_data(first_frame) == {"domain_ids": ["a", "b"]}
+        assert frame_data(second_frame) == {"domain_ids": ["c"]}
+
+    asyncio.run(scenario())
+
+
+def test_resync_merges_with_pending_backpressure_resync():
+    async def scenario():
+        hub = ContextChangeHub(max_queue=1)
+        subscription = hub.subscribe(["a", "b"])
+        subscription.offer("a", sse_frame("object", {"domain_id": "a"}))
+        subscription.offer("a", sse_frame("object", {"domain_id": "a"}))  # wachtrij vol: resync
+
+        hub.resync_all()
+
+        assert subscription.queue.qsize() == 1
+        assert frame_data(await subscription.next_frame()) == {"domain_ids": ["a", "b"]}
+
+    asyncio.run(scenario())
+
+
+def test_reconnect_resyncs_context_streams(monkeypatch):
+    from src.api import context_service
+
+    async def noop(pool):
+        pass
+
+    async def scenario():
+        hub = ContextChangeHub()
+        subscription = hub.subscribe(["a"])
+        monkeypatch.setattr(context_service, "context_hub", hub)
+        for index in ("access_index", "rule_engine", "app_usage_index"):
+            monkeypatch.setattr(getattr(context_service, index), "load", noop)
+
+        await context_service.resync_listener_caches(None)
+
+        assert frame_data(await subscription.next_frame()) == {"domain_ids": ["a"]}
+
+    asyncio.run(scenario())
+
+
+def test_unsubscribe_twice_frees_one_slot():
+    hub = ContextChangeHub(max_subscribers=2)
+    subscription = hub.subscribe(["a"])
+    hub.subscribe(["a"])
+
+    hub.unsubscribe(subscription)
+    hub.unsubscribe(subscription)
+
+    assert hub.stats()["subscribers"] == 1
+    assert hub.subscribe(["b"]) is not None
+    assert hub.subscribe(["b"]) is None
@@ -0,0 +1,44 @@
+"""
+Tests voor de generatiecheck van PrincipalCache
+"""
+
+import time
+
+from src.api.principal_cache import PrincipalCache
+
+
+def test_lookup_from_before_invalidation_is_not_stored():
+    cache = PrincipalCache()
+    generation = cache.generation()
+    cache.invalidate_user("u1")
+
+    cache.put("token", {"id": "u1"}, generation)
+
+    assert cache.get("token") is None
+    assert cache.stats()["stale_puts"] == 1
+
+
+def test_invalidation_of_other_user_does_not_block_put():
+    cache = PrincipalCache()
+    generation = cache.generation()
+    cache.invalidate_user("u2")
+
+    cache.put("token", {"id": "u1"}, generation)
+
+    assert cache.get("token") == {"id": "u1"}
+
+
+def test_invalidations_are_forgotten_after_ttl():
+    cache = PrincipalCache(ttl_seconds=0.01)
+    old = cache.generation()
+    for i in range(100):
+        cache.invalidate_user(f"u{i}")
+    time.sleep(0.02)
+    cache.invalidate_user("recent")
+
+    assert cache.stats()["tracked_invalidations"] == 1
+    # Ouder dan wat nog onthouden wordt: conservatief geweigerd
+    cache.put("old", {"id": "u1"}, old)
+    assert cache.get("old") is None
+    cache.put("new", {"id": "u1"}, cache.generation())
+    assert cache.get("new") == {"id": "u1"}